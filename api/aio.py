@@ -0,0 +1,104 @@
+'''
+Async (ASGI) serving of the read endpoints
+
+Notes:
+    django 3.2 runs a sync view under ASGI with
+    sync_to_async(thread_sensitive=True): all the sync views of the
+    process share one thread, one request at a time. Django 3.2 has no
+    async ORM either.
+    AsyncReadView.as_view(SyncView) is an async view: a GET runs the
+    same DRF view (the same authentication, permissions, throttles,
+    negotiation, cache and queries) in a bounded thread pool
+    (settings.ASYNC_DB_POOL_SIZE threads, so at most that many db
+    connections), while the event loop keeps the slow clients (the
+    request body and the response are read/written by the ASGI server).
+    The writes keep the default django behavior.
+    The streamed lists (?stream=true, api.streaming) are a 400 here.
+    api.urls use these views when settings.API_ASYNC_VIEWS (app.asgi).
+'''
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .db import check_connections
+from .middleware import count_queries
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_POOL_SIZE,
+            thread_name_prefix='api-db')
+    return _executor
+
+
+def _reset_executor():
+    # a forked worker (manage.py serve) doesn't have the threads of the
+    # master's pool
+    global _executor
+    _executor = None
+
+
+os.register_at_fork(after_in_child=_reset_executor)
+
+
+def _run(view, request, args, kwargs):
+    # the request_started/request_finished of the pool thread
+    close_old_connections()
+    check_connections()
+    try:
+        with count_queries(request):
+            return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(view, request, *args, **kwargs):
+    '''
+    run the sync view in the db thread pool
+    '''
+    loop = asyncio.get_running_loop()
+    # run_in_executor does not copy the context (api.routers)
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(context.run, _run, view, request, args, kwargs))
+
+
+class AsyncReadView:
+    '''
+    async view over a DRF view, the reads run in the db thread pool
+    '''
+
+    @classmethod
+    def as_view(cls, view_class, **initkwargs):
+        if hasattr(view_class, 'stream_allowed'):
+            # django 3.2 iterates a stream in the event loop (no orm)
+            initkwargs = dict(initkwargs, stream_allowed=False)
+        sync_view = view_class.as_view(**initkwargs)
+        write_view = sync_to_async(
+            functools.partial(_run, sync_view), thread_sensitive=True)
+
+        async def view(request, *args, **kwargs):
+            if request.method in SAFE_METHODS:
+                return await run_in_pool(sync_view, request, *args, **kwargs)
+            return await write_view(request, args, kwargs)
+
+        # the attributes used by the middlewares and the api docs
+        # (django 3.2 csrf_exempt() does not keep a coroutine function)
+        view.view_class = view_class
+        view.cls = view_class
+        view.initkwargs = initkwargs
+        view.csrf_exempt = True
+        return view
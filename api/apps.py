@@ -6,4 +6,6 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     def ready(self):
+        import api.checks
+        import api.db
         import api.signals
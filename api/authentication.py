@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class TTLCache:
+    '''
+    Bounded in-process map with expiration (LRU eviction)
+    '''
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TokenCache:
+    '''
+    token key -> (user, token) for CachedTokenAuthentication
+
+    Notes:
+        settings.TOKEN_CACHE is a django cache alias shared between the
+        workers, with settings.TOKEN_CACHE_LOCAL a TTLCache in the memory
+        of the process (one worker only), without both nothing is cached.
+        The entries are removed by the Token/User signals (api.signals),
+        a signal only reaches the cache of its own process: a revoked
+        token would stay valid in the other workers until the ttl
+        (manage.py serve refuses many workers with a per process cache).
+    '''
+    prefix = 'token:'
+
+    def __init__(self):
+        self.local = TTLCache(
+            settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL)
+
+    def _shared_cache(self):
+        alias = getattr(settings, 'TOKEN_CACHE', None)
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        cache = self._shared_cache()
+        if cache is not None:
+            return cache.get(self.prefix + key)
+        if settings.TOKEN_CACHE_LOCAL:
+            return self.local.get(key)
+        return None
+
+    def set(self, key, value):
+        cache = self._shared_cache()
+        if cache is not None:
+            cache.set(
+                self.prefix + key, value, timeout=settings.TOKEN_CACHE_TTL)
+        elif settings.TOKEN_CACHE_LOCAL:
+            self.local.set(key, value)
+
+    def delete(self, key):
+        self.local.delete(key)
+        cache = self._shared_cache()
+        if cache is not None:
+            cache.delete(self.prefix + key)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    '''
+    TokenAuthentication without the Token/User query in every request
+
+    Notes:
+        only the valid credentials are cached, an unknown or inactive
+        token go to the db every time (and fail like TokenAuthentication).
+    '''
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+        return credentials
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''
+    sqlite backend with BEGIN IMMEDIATE transactions (api.db)
+
+    Notes:
+        a deferred transaction (django's BEGIN) that reads and then
+        writes can't wait for the lock of another writer: with wal it
+        fails at once with 'database is locked' (busy_timeout doesn't
+        apply). An immediate transaction takes the write lock at the
+        BEGIN and waits busy_timeout for it.
+        settings.SQLITE_TRANSACTION_MODE ('' is DEFERRED).
+    '''
+
+    def _start_transaction_under_autocommit(self):
+        mode = settings.SQLITE_TRANSACTION_MODE
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,266 @@
+'''
+Micro-benchmarks of the study/patient serializers and views
+
+Notes:
+    every case is a setup function registered with @benchmark, it gets
+    a payload size and returns the function to time. A case is timed
+    like timeit: the number of calls per round is calibrated to ~0.2 s
+    and the best round of --repeat is kept (the noise only adds time).
+    The results are seconds per call, saved as a json baseline and
+    compared with a threshold (manage.py benchmark_suite).
+    The cases read and write the current db, the command runs them on
+    an in-memory sqlite test db.
+'''
+import json
+import timeit
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from . import catalogs
+from .models import BodyPart, Patient, Study, Type
+from .serializers import PatientSerializer, StudySerializer
+from .views import StudyRetrieveUpdateDestroyView, StudytListCreateView
+
+# payload sizes (rows) of the cases with a size
+SIZES = (1, 100, 1000)
+
+# name: (setup, sized)
+BENCHMARKS = {}
+
+
+def benchmark(name, sized=False):
+    def register(setup):
+        BENCHMARKS[name] = (setup, sized)
+        return setup
+    return register
+
+
+def case_names(sizes=SIZES) -> list:
+    '''
+    name[size] of every case
+    '''
+    names = []
+    for name, (_, sized) in BENCHMARKS.items():
+        names += [f'{name}[{size}]' for size in sizes] if sized else [name]
+    return names
+
+
+def study_payload(index) -> dict:
+    body_parts = catalogs.body_parts.names()
+    types = catalogs.types.names()
+    return {
+        'urgency_level': Study.URGENCIES[index % 3][0],
+        'body_part': body_parts[index % len(body_parts)],
+        'type': types[index % len(types)],
+        'description': f'study {index}: normal thyroid, no findings',
+    }
+
+
+def patient_with_studies(size) -> Patient:
+    '''
+    a patient with size studies (created once per size)
+    '''
+    email = f'benchmark{size}@example.com'
+    patient = Patient.objects.filter(email=email).first()
+    if patient is None:
+        patient = Patient.objects.create(
+            first_name='Bench', last_name='Mark',
+            birth_date='1980-01-01', email=email)
+        body_parts = list(BodyPart.objects.all())
+        types = list(Type.objects.all())
+        Study.objects.bulk_create(
+            Study(
+                patient=patient,
+                urgency_level=Study.URGENCIES[index % 3][0],
+                body_part=body_parts[index % len(body_parts)],
+                type=types[index % len(types)],
+                description=f'study {index}: normal thyroid, no findings')
+            for index in range(size))
+    return patient
+
+
+def patients(size) -> list:
+    '''
+    size patients (created once)
+    '''
+    missing = size - Patient.objects.count()
+    Patient.objects.bulk_create(
+        Patient(
+            first_name=f'name {index}', last_name=f'last name {index}',
+            birth_date='1980-01-01', email=f'patient{index}@example.com')
+        for index in range(missing))
+    return list(Patient.objects.order_by('id')[:size])
+
+
+@benchmark('study_serializer.init_cold_catalogs')
+def init_cold_catalogs(size):
+    def run():
+        catalogs.body_parts.invalidate()
+        catalogs.types.invalidate()
+        StudySerializer()
+    return run
+
+
+@benchmark('study_serializer.init')
+def init(size):
+    return StudySerializer
+
+
+@benchmark('study_serializer.validate_catalogs')
+def validate_catalogs(size):
+    serializer = StudySerializer()
+    payload = study_payload(0)
+
+    def run():
+        serializer.validate_body_part(payload['body_part'])
+        serializer.validate_type(payload['type'])
+    return run
+
+
+@benchmark('study_serializer.is_valid', sized=True)
+def is_valid(size):
+    patient = patient_with_studies(1)
+    data = [
+        dict(study_payload(index), patient=patient.pk)
+        for index in range(size)]
+
+    def run():
+        serializer = StudySerializer(data=data, many=True)
+        assert serializer.is_valid(), serializer.errors
+    return run
+
+
+@benchmark('study_serializer.to_representation', sized=True)
+def study_representation(size):
+    studies = list(Study.objects.filter(
+        patient=patient_with_studies(size)))
+
+    def run():
+        return StudySerializer(studies, many=True).data
+    return run
+
+
+@benchmark('patient_serializer.encode', sized=True)
+def patient_encode(size):
+    rows = patients(size)
+    renderer = JSONRenderer()
+
+    def run():
+        return renderer.render(PatientSerializer(rows, many=True).data)
+    return run
+
+
+def view_client(view_class, method, path, data=None, **kwargs):
+    '''
+    a function that dispatch a request to the view (no middleware)
+
+    notes:
+        the writes are rolled back, so every call finds the same db
+    '''
+    view = view_class.as_view()
+    factory = APIRequestFactory()
+    user = get_user_model()(username='benchmark', is_staff=True)
+
+    def run():
+        request = getattr(factory, method)(path, data, format='json')
+        force_authenticate(request, user)
+        with transaction.atomic():
+            response = view(request, **kwargs)
+            response.render()
+            transaction.set_rollback(True)
+        assert response.status_code < 300, response.data
+        return response
+    return run
+
+
+@benchmark('study_list.get', sized=True)
+def study_list_get(size):
+    patient = patient_with_studies(size)
+    return view_client(
+        StudytListCreateView, 'get', f'/?page_size={size}',
+        patient_pk=patient.pk)
+
+
+@benchmark('study_list.post', sized=True)
+def study_list_post(size):
+    patient = patient_with_studies(1)
+    # one study is a post of an object, more a bulk post of an array
+    data = (
+        study_payload(0) if size == 1
+        else [study_payload(index) for index in range(size)])
+    return view_client(
+        StudytListCreateView, 'post', '/', data, patient_pk=patient.pk)
+
+
+@benchmark('study_detail.get')
+def study_detail_get(size):
+    study = Study.objects.get(patient=patient_with_studies(1))
+    return view_client(
+        StudyRetrieveUpdateDestroyView, 'get', '/',
+        patient_pk=study.patient_id, pk=study.pk)
+
+
+@benchmark('study_detail.put')
+def study_detail_put(size):
+    study = Study.objects.get(patient=patient_with_studies(1))
+    return view_client(
+        StudyRetrieveUpdateDestroyView, 'put', '/', study_payload(1),
+        patient_pk=study.patient_id, pk=study.pk)
+
+
+def measure(setup, size, repeat, min_time=0.2) -> float:
+    '''
+    best seconds per call of the function returned by setup(size)
+    '''
+    timer = timeit.Timer(setup(size))
+    # calls per round: double until a round takes min_time
+    number = 1
+    while (elapsed := timer.timeit(number)) < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat, number) + [elapsed]) / number
+
+
+def run(names=None, sizes=SIZES, repeat=5, min_time=0.2, report=None):
+    '''
+    time the cases (all or the names), return name[size] -> seconds
+    '''
+    results = {}
+    # the view responses are not cached between the calls
+    with override_settings(RESPONSE_CACHE=None):
+        for name, (setup, sized) in BENCHMARKS.items():
+            for size in (sizes if sized else (None,)):
+                key = f'{name}[{size}]' if sized else name
+                if names and not any(part in key for part in names):
+                    continue
+                results[key] = measure(setup, size, repeat, min_time)
+                if report:
+                    report(key, results[key])
+    return results
+
+
+def compare(baseline, results, threshold) -> list:
+    '''
+    (name, baseline, result, change) of the cases slower than the
+    baseline by more than threshold (0.2: 20%)
+    '''
+    regressions = []
+    for name, seconds in results.items():
+        old = baseline.get(name)
+        if old and (seconds - old) / old > threshold:
+            regressions.append((name, old, seconds, (seconds - old) / old))
+    return regressions
+
+
+def load(path) -> dict:
+    with open(path) as file:
+        return json.load(file)['results']
+
+
+def save(path, results):
+    with open(path, 'w') as file:
+        json.dump({'results': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
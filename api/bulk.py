@@ -0,0 +1,44 @@
+from django.db import connection, transaction
+from django.dispatch import Signal
+
+# bulk_create does not send post_save, receivers get (sender, objects),
+# inside the transaction of the insert
+post_bulk_create = Signal()
+
+
+def bulk_create(model, objects: list, batch_size: int = None) -> list:
+    '''
+    bulk_create that always fill the pk of the objects
+
+    Notes:
+        sqlite (django 3.2) does not return the ids from a bulk insert.
+        inside the transaction the db is locked for other writers and the pk
+        is an AUTOINCREMENT, so the new ids are the last len(objects) ids.
+        post_bulk_create is sent in the same transaction.
+    '''
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        missing_ids = objects and objects[0].pk is None
+        if missing_ids and connection.vendor == 'sqlite':
+            last_id = model.objects.order_by('-pk').values_list(
+                'pk', flat=True)[0]
+            for pk, obj in enumerate(objects, last_id - len(objects) + 1):
+                obj.pk = pk
+        if objects:
+            post_bulk_create.send(sender=model, objects=objects)
+    return objects
+
+
+def insert_queries(model, count: int, batch_size: int = None) -> int:
+    '''
+    INSERT statements of a bulk_create of count new objects (the batch
+    size of the backend: 999 sqlite params / the columns)
+    '''
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key]
+    max_batch_size = max(
+        connection.ops.bulk_batch_size(fields, [None] * count), 1)
+    batch_size = min(batch_size, max_batch_size) if batch_size else (
+        max_batch_size)
+    return -(-count // batch_size)
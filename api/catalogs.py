@@ -0,0 +1,129 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import BodyPart, Type
+
+
+class Catalog:
+    '''
+    In-memory registry of a catalog table (BodyPart, Type)
+
+    Notes:
+        catalogs are small and almost never change, but the study serializer
+        needs them in every request (choices, validation and representation).
+        The registry loads the whole table once (name -> object and
+        id -> name maps) and keeps it until a post_save/post_delete signal
+        invalidates it (api.signals).
+
+        Signals only reach the current process. If settings.CATALOG_CACHE
+        is set (a django cache shared by the workers), a version stamp is
+        kept there, so the invalidation done by one worker reloads the
+        catalog in the others. Without it the maps of a process are
+        reloaded after settings.CATALOG_CHECK_SECONDS, a change of another
+        worker is seen after that delay.
+        The shared version is read at most once per
+        settings.CATALOG_CHECK_SECONDS (not one cache round trip per
+        serialized field), the invalidations of the process are immediate.
+    '''
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._by_name = None
+        self._by_id = None
+        self._version = None
+        # last load or read of the shared version (time.monotonic)
+        self._checked_at = 0
+
+    def __deepcopy__(self, memo):
+        # serializer fields are deepcopied for every serializer instance,
+        # the registry is shared by all of them.
+        return self
+
+    @property
+    def version_key(self) -> str:
+        return f'catalog:{self.model._meta.db_table}:version'
+
+    def _shared_cache(self):
+        alias = getattr(settings, 'CATALOG_CACHE', None)
+        return caches[alias] if alias else None
+
+    def _shared_version(self):
+        cache = self._shared_cache()
+        if cache is None:
+            return None
+        return cache.get(self.version_key, 0)
+
+    def _maps(self):
+        by_name, by_id = self._by_name, self._by_id
+        if by_name is None:
+            return self._load(self._shared_version())
+        now = time.monotonic()
+        if now - self._checked_at < settings.CATALOG_CHECK_SECONDS:
+            return by_name, by_id
+        version = self._shared_version()
+        if version is None or version != self._version:
+            return self._load(version)
+        self._checked_at = now
+        return by_name, by_id
+
+    def _load(self, version):
+        with self._lock:
+            objects = list(self.model.objects.all())
+            self._by_name = {obj.name: obj for obj in objects}
+            self._by_id = {obj.id: obj.name for obj in objects}
+            self._version = version
+            self._checked_at = time.monotonic()
+            return self._by_name, self._by_id
+
+    def names(self) -> list:
+        return list(self._maps()[0])
+
+    def get(self, name):
+        '''
+        return the catalog object for the name (or None)
+        '''
+        return self._maps()[0].get(name)
+
+    def name_of(self, pk):
+        '''
+        return the name for the catalog id (or None)
+        '''
+        return self._maps()[1].get(pk)
+
+    def id_names(self) -> dict:
+        '''
+        id -> name map (read only), for the translation of many rows
+        '''
+        return self._maps()[1]
+
+    def invalidate(self):
+        '''
+        reload the catalog, now and after the commit (a read between the
+        write and the commit can load the old rows again)
+        '''
+        self._invalidate()
+        transaction.on_commit(self._invalidate)
+
+    def _invalidate(self):
+        with self._lock:
+            self._by_name = None
+            self._by_id = None
+            self._version = None
+        cache = self._shared_cache()
+        if cache is not None:
+            cache.add(self.version_key, 0, timeout=None)
+            cache.incr(self.version_key)
+
+
+body_parts = Catalog(BodyPart)
+types = Catalog(Type)
+
+CATALOGS = {
+    BodyPart: body_parts,
+    Type: types,
+}
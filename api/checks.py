@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+@register()
+def replica_pin_cache(app_configs, **kwargs):
+    '''
+    the pins of api.routers must be shared by the workers: with a locmem
+    cache a client that wrote in a worker reads from a replica in the
+    others (manage.py serve refuses many workers)
+    '''
+    if not settings.DATABASE_REPLICAS:
+        return []
+    if not isinstance(caches[settings.REPLICA_PIN_CACHE], LocMemCache):
+        return []
+    return [Warning(
+        f'REPLICA_PIN_CACHE is the locmem cache '
+        f'"{settings.REPLICA_PIN_CACHE}", the read-your-writes pins are '
+        'per process.',
+        hint='set a cache shared by the workers (CACHE_BACKEND) or run '
+             'one worker.',
+        id='api.W001')]
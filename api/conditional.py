@@ -0,0 +1,72 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+
+class ConditionalGetMixin:
+    '''
+    Conditional GET (ETag, Last-Modified, 304) for the patient/study views
+
+    Notes:
+        before the view runs, one cheap query read the version of the
+        response (updated_at of the object, or the id/updated_at of the
+        rows of the page and its links) and
+        django.views.decorators.http.condition answer If-None-Match /
+        If-Modified-Since with a 304, without load or serialize the rows.
+        The version of a list is bounded by the page: it is the page
+        query of the paginator over two columns (a seek of the pk index
+        and LIMIT page_size + 1), not an aggregate of the whole table.
+        The ETag is strong: it include the view, the query string and the
+        negotiated format, so every representation has its own ETag.
+        Lists do not send Last-Modified, a delete does not move
+        max(updated_at) (the ETag changes with the ids). A streamed list
+        (?stream=true) is the whole table, it has no ETag.
+    '''
+
+    def get(self, request, *args, **kwargs):
+        self._version = None
+        view = condition(
+            etag_func=self.get_etag,
+            last_modified_func=self.get_last_modified)(super().get)
+        return view(request, *args, **kwargs)
+
+    def get_version(self) -> tuple:
+        '''
+        (last_modified, version) of the response, None if it does not exist
+        '''
+        if 'pk' in self.kwargs:
+            updated_at = self.get_queryset().filter(
+                pk=self.kwargs['pk']).values_list(
+                    'updated_at', flat=True).first()
+            return updated_at and (updated_at, updated_at.isoformat())
+        paginator = self.paginator
+        if paginator is None or getattr(
+                self, 'is_streaming', lambda request: False)(self.request):
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = paginator.paginate_queryset(
+            queryset.values('id', 'updated_at'), self.request, view=self)
+        version = (
+            [(row['id'], row['updated_at'].isoformat()) for row in rows],
+            paginator.get_next_link(),
+            paginator.get_previous_link())
+        return None, repr(version)
+
+    def _get_version(self) -> tuple:
+        if self._version is None:
+            self._version = self.get_version() or (None, None)
+        return self._version
+
+    def get_etag(self, request, *args, **kwargs):
+        version = self._get_version()[1]
+        if version is None:
+            return None
+        key = '|'.join((
+            type(self).__name__,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            version))
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return self._get_version()[0]
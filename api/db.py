@@ -0,0 +1,54 @@
+'''
+Database connection profile
+
+Notes:
+    settings.SQLITE_PRAGMAS run on every new sqlite connection: wal lets
+    the readers run during a write (and the writer during the reads),
+    synchronous=normal only syncs at the checkpoints (a power loss can
+    lose the last commits, not corrupt the db), busy_timeout waits for
+    a lock instead of failing with 'database is locked', mmap_size reads
+    the pages without a copy. The writers wait for each other with
+    BEGIN IMMEDIATE (api.backends.sqlite3).
+    The CONN_MAX_AGE of DATABASES keeps the connection of a thread
+    between its requests (the gthread/asgi threads are the pool). With
+    settings.DB_HEALTH_CHECKS a kept connection is checked at the start
+    of a request and closed if the server dropped it, the first query
+    opens a new one (the CONN_HEALTH_CHECKS of django 4.1).
+'''
+import logging
+import sqlite3
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('debug')
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # the raw connection, the pragmas are not counted as queries
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        try:
+            connection.connection.execute(f'PRAGMA {name} = {value}')
+        except sqlite3.OperationalError as error:
+            # journal_mode of a read only replica (it is kept in the file)
+            logger.debug('%s: PRAGMA %s: %s', connection.alias, name, error)
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    '''
+    close the kept connections that are not usable
+    '''
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            logger.warning('%s: connection closed by the server',
+                           connection.alias)
+            connection.close()
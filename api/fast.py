@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields, relations
+from rest_framework.response import Response
+
+from .serializers import CatalogChoiceField
+
+# fields where to_representation(value) is value for the db value
+IDENTITY_FIELDS = (fields.IntegerField, fields.CharField, fields.EmailField)
+
+
+class RowSerializer:
+    '''
+    Read only serializer for values() rows
+
+    Notes:
+        ModelSerializer(many=True) build a model instance per row and walk
+        the fields with get_attribute/to_representation. The RowSerializer
+        read the same fields from a values() dict, and the field list is
+        compiled once (per serializer class and field names) into a python
+        function with one dict literal:
+
+            def to_representation(row):
+                return {'id': row['id'], 'birth_date': c1(row['birth_date'])}
+
+        the converters are the to_representation of the serializer fields
+        (skipped when it is the identity) and the in-memory catalogs for
+        body_part/type, so the output is the same than the serializer.
+    '''
+    _compiled = {}
+
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise ValueError(f'{name}: unsupported source {field.source}')
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                raise ValueError(f'{name}: {field.source} is not a field')
+            if model_field.many_to_many or model_field.one_to_many:
+                raise ValueError(f'{name}: {field.source} is not a column')
+            self.fields.append((name, field, model_field.null))
+        self.columns = [field.source for _, field, _ in self.fields]
+        key = (type(serializer), tuple(name for name, _, _ in self.fields))
+        if key not in self._compiled:
+            self._compiled[key] = self._compile()
+        self._make = self._compiled[key]
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        '''
+        RowSerializer for the serializer or None if it is not supported
+        '''
+        try:
+            return cls(serializer)
+        except ValueError:
+            return None
+
+    def _compile(self):
+        items = []
+        for index, (name, field, null) in enumerate(self.fields):
+            value = f'row[{field.source!r}]'
+            converted = f'c{index}({value})'
+            if self.is_identity(field):
+                items.append(f'{name!r}: {value}')
+            elif null:
+                items.append(
+                    f'{name!r}: None if {value} is None else {converted}')
+            else:
+                items.append(f'{name!r}: {converted}')
+        converters = ', '.join(f'c{index}' for index in range(len(items)))
+        source = (
+            f'def make({converters}):\n'
+            f'    def to_representation(row):\n'
+            f'        return {{{", ".join(items)}}}\n'
+            f'    return to_representation\n')
+        namespace = {}
+        exec(compile(source, f'<RowSerializer {id(self)}>', 'exec'), namespace)
+        return namespace['make']
+
+    @staticmethod
+    def is_identity(field) -> bool:
+        if type(field) in IDENTITY_FIELDS:
+            return True
+        return (
+            type(field) is relations.PrimaryKeyRelatedField
+            and field.pk_field is None)
+
+    def converter(self, field):
+        if isinstance(field, CatalogChoiceField):
+            return field.catalog.id_names().get
+        return field.to_representation
+
+    def bind(self):
+        '''
+        row -> dict function (the catalogs are read now, once per call)
+        '''
+        return self._make(*(
+            self.converter(field) for _, field, _ in self.fields))
+
+    def many(self, rows) -> list:
+        to_representation = self.bind()
+        return [to_representation(row) for row in rows]
+
+
+class FastListMixin:
+    '''
+    List the rows with a RowSerializer (settings.API_FAST_SERIALIZERS)
+
+    Notes:
+        the queryset is a values() over the serializer columns, the cursor
+        pagination also works with dicts. Serializers with fields that are
+        not a model column use the normal ModelSerializer path.
+    '''
+
+    def get_row_serializer(self):
+        if not settings.API_FAST_SERIALIZERS:
+            return None
+        return RowSerializer.for_serializer(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        if row_serializer is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # the pagination needs the pk, even if it is not in the fields
+        pk = queryset.model._meta.pk.name
+        columns = row_serializer.columns
+        queryset = queryset.values(
+            *columns, *([] if pk in columns else [pk]))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.many(page))
+        return Response(row_serializer.many(queryset))
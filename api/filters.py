@@ -0,0 +1,84 @@
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from . import catalogs
+from .models import Study
+
+
+class StudyFilterBackend(BaseFilterBackend):
+    '''
+    Filters for the studies
+
+        ?urgency_level=HIGH,MID  ?type=XRAY  ?body_part=NECK,CHEST
+        ?min_id=100  ?max_id=200
+
+    Notes:
+        the catalog names are translated to ids with the in-memory
+        catalogs (no join). The filters match the composite indexes of
+        the study table (api.models.Study.Meta.indexes):
+        (patient_id, urgency_level, id), (type_id, urgency_level) and
+        (body_part_id, urgency_level).
+    '''
+    catalog_params = {
+        'type': catalogs.types,
+        'body_part': catalogs.body_parts,
+    }
+    range_params = {
+        'min_id': 'id__gte',
+        'max_id': 'id__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters, errors = {}, {}
+        if 'urgency_level' in params:
+            values = self.split(params['urgency_level'])
+            valid = [urgency for urgency, _ in Study.URGENCIES]
+            if unknown := [value for value in values if value not in valid]:
+                errors['urgency_level'] = [
+                    f'Unknown urgency levels: {", ".join(unknown)}.']
+            filters['urgency_level__in'] = values
+        for param, catalog in self.catalog_params.items():
+            if param not in params:
+                continue
+            values = self.split(params[param])
+            objects = [catalog.get(value) for value in values]
+            if None in objects:
+                unknown = [
+                    value for value in values if catalog.get(value) is None]
+                errors[param] = [f'Not in the catalog: {", ".join(unknown)}.']
+            else:
+                filters[f'{param}_id__in'] = [obj.id for obj in objects]
+        for param, lookup in self.range_params.items():
+            if param not in params:
+                continue
+            try:
+                filters[lookup] = int(params[param])
+            except ValueError:
+                errors[param] = ['A valid integer is required.']
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**filters)
+
+    @staticmethod
+    def split(value: str) -> list:
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed'
+        assert coreschema is not None, 'coreschema must be installed'
+        descriptions = {
+            'urgency_level': 'comma separated urgency levels',
+            'type': 'comma separated type names',
+            'body_part': 'comma separated body part names',
+            'min_id': 'studies with id >= min_id',
+            'max_id': 'studies with id <= max_id',
+        }
+        return [
+            coreapi.Field(
+                name=name,
+                required=False,
+                location='query',
+                schema=coreschema.String(title=name, description=description))
+            for name, description in descriptions.items()]
@@ -0,0 +1,160 @@
+import codecs
+import csv
+import json
+import time
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .bulk import bulk_create
+from .models import Patient, Study
+from .serializers import PatientSerializer, StudyBulkSerializer
+
+PATIENT_FIELDS = ('first_name', 'last_name', 'birth_date', 'email')
+STUDY_FIELDS = ('urgency_level', 'body_part', 'description', 'type')
+
+
+def read_ndjson(lines):
+    '''
+    yield (line number, patient) for every line of a ndjson input
+
+    one line is one patient, with its studies in "studies" (optional)
+    {"first_name": "Jose", ..., "studies": [{"urgency_level": "HIGH", ...}]}
+    '''
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def read_csv(lines):
+    '''
+    yield (line number, patient) for every row of a csv input
+
+    one row is one patient, and optionally one study if the study
+    columns (urgency_level, body_part, description, type) are filled.
+    '''
+    reader = csv.DictReader(
+        codecs.iterdecode(lines, 'utf-8'), skipinitialspace=True)
+    for row in reader:
+        row = {
+            key.strip(): (value or '').strip()
+            for key, value in row.items() if isinstance(key, str)}
+        patient = {
+            field: row[field] for field in PATIENT_FIELDS if field in row}
+        if row.get('urgency_level'):
+            patient['studies'] = [
+                {field: row.get(field) for field in STUDY_FIELDS}]
+        yield reader.line_num, patient
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+class PatientImporter:
+    '''
+    Import patients (with studies) from a stream of rows
+
+    Notes:
+        the rows are validated with the PatientSerializer/StudyBulkSerializer
+        rules (run_validation over one serializer instance, not one
+        serializer per row), and written in chunks of chunk_size patients
+        with bulk_create, one transaction per chunk.
+        Only one chunk and the first max_rejects rejects are kept in memory,
+        the memory does not grow with the input size.
+    '''
+
+    def __init__(self, chunk_size=1000, max_rejects=100,
+                 on_progress=None, on_reject=None):
+        self.chunk_size = chunk_size
+        self.max_rejects = max_rejects
+        self.on_progress = on_progress
+        self.on_reject = on_reject
+        self.patient_serializer = PatientSerializer()
+        self.study_serializer = StudyBulkSerializer()
+        self.rows = 0
+        self.patients = 0
+        self.studies = 0
+        self.rejected = 0
+        self.rejects = []
+        self.started = None
+
+    @property
+    def seconds(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def run(self, rows) -> dict:
+        self.started = time.monotonic()
+        chunk = []
+        for number, row in rows:
+            self.rows += 1
+            try:
+                chunk.append(self.validate(row))
+            except ValidationError as error:
+                self.reject(number, error.detail)
+            if len(chunk) >= self.chunk_size:
+                self.write(chunk)
+                chunk = []
+        if chunk:
+            self.write(chunk)
+        return self.summary()
+
+    def validate(self, row) -> tuple:
+        if not isinstance(row, dict):
+            raise ValidationError({'non_field_errors': ['Invalid row.']})
+        studies = row.get('studies') or []
+        if not isinstance(studies, list):
+            raise ValidationError({'studies': ['Expected a list.']})
+        patient = self.patient_serializer.run_validation(row)
+        valid, errors = [], {}
+        for index, study in enumerate(studies):
+            try:
+                valid.append(self.study_serializer.run_validation(study))
+            except ValidationError as error:
+                errors[index] = error.detail
+        if errors:
+            raise ValidationError({'studies': errors})
+        return patient, valid
+
+    def reject(self, number, errors):
+        self.rejected += 1
+        reject = {'row': number, 'errors': errors}
+        if len(self.rejects) < self.max_rejects:
+            self.rejects.append(reject)
+        if self.on_reject:
+            self.on_reject(reject)
+
+    def write(self, chunk):
+        with transaction.atomic():
+            patients = bulk_create(
+                Patient, [Patient(**patient) for patient, _ in chunk])
+            studies = [
+                Study(patient=patient, **study)
+                for patient, (_, items) in zip(patients, chunk)
+                for study in items]
+            bulk_create(Study, studies)
+        self.patients += len(patients)
+        self.studies += len(studies)
+        if self.on_progress:
+            self.on_progress(self)
+
+    def summary(self) -> dict:
+        return {
+            'rows': self.rows,
+            'patients': self.patients,
+            'studies': self.studies,
+            'rejected': self.rejected,
+            'rejects': self.rejects,
+            'seconds': round(self.seconds, 3),
+            'rows_per_sec': round(self.rows_per_sec, 1),
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrency benchmark of a running server (WSGI or ASGI): '
+        'throughput and latency percentiles of --concurrency clients, '
+        'while --slow-clients keep connections open sending one header '
+        'byte per second. Example:\n'
+        '  gunicorn app.wsgi -k gthread --threads 8 &\n'
+        '  uvicorn app.asgi:application &\n'
+        '  python manage.py benchmark_concurrency '
+        'http://127.0.0.1:8000/api/patients/ --token <key>')
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--token', help='api token of an admin user')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--slow-clients', type=int, default=0)
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='seconds per request')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('only http:// urls')
+        self.host = url.hostname
+        self.port = url.port or 80
+        path = url.path + (f'?{url.query}' if url.query else '')
+        headers = f'Host: {url.netloc}\r\nConnection: close\r\n'
+        if options['token']:
+            headers += f'Authorization: Token {options["token"]}\r\n'
+        self.request = f'GET {path} HTTP/1.1\r\n{headers}\r\n'.encode()
+        self.timeout = options['timeout']
+        asyncio.run(self.run(
+            options['concurrency'], options['requests'],
+            options['slow_clients']))
+
+    async def run(self, concurrency, requests, slow_clients):
+        stop = asyncio.Event()
+        slow = [
+            asyncio.create_task(self.slow_client(stop))
+            for _ in range(slow_clients)]
+        # let the slow clients take their connections
+        await asyncio.sleep(1 if slow_clients else 0)
+        queue = asyncio.Queue()
+        for _ in range(requests):
+            queue.put_nowait(None)
+        latencies, errors = [], []
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.client(queue, latencies, errors)
+            for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*slow, return_exceptions=True)
+        self.report(latencies, errors, elapsed, concurrency, slow_clients)
+
+    async def client(self, queue, latencies, errors):
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(self.fetch(), self.timeout)
+            except (OSError, asyncio.TimeoutError) as error:
+                errors.append(type(error).__name__)
+                continue
+            if status != 200:
+                errors.append(f'HTTP {status}')
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    async def fetch(self) -> int:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(self.request)
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    async def slow_client(self, stop):
+        '''
+        a client on a slow network: one byte of the request per second
+        '''
+        try:
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port)
+        except OSError:
+            return
+        try:
+            for byte in self.request:
+                writer.write(bytes((byte,)))
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(stop.wait(), 1)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+    def report(self, latencies, errors, elapsed, concurrency, slow_clients):
+        self.stdout.write(
+            f'{concurrency} clients, {slow_clients} slow clients: '
+            f'{len(latencies)} ok, {len(errors)} errors '
+            f'in {elapsed:.1f} s, {len(latencies) / elapsed:,.0f} req/s')
+        if errors:
+            self.stdout.write(
+                f'errors: {", ".join(sorted(set(errors)))}')
+        if len(latencies) < 2:
+            return
+        cuts = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'latency p50 {cuts[49] * 1000:.1f} ms, '
+            f'p95 {cuts[94] * 1000:.1f} ms, '
+            f'p99 {cuts[98] * 1000:.1f} ms, '
+            f'max {max(latencies) * 1000:.1f} ms')
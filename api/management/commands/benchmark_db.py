@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import catalogs
+from api.models import Patient
+
+# journal mode, pragmas, transaction mode and CONN_MAX_AGE
+# (None: the settings)
+PROFILES = {
+    'default': ('delete', {}, '', 0),
+    'tuned': ('wal', None, None, None),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrent study create/list benchmark of the db profiles (api.db) '
+        'on a copy of the sqlite db: --writers processes POST studies and '
+        '--readers processes GET the study list of one patient.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument(
+            '--profile', action='append', choices=PROFILES,
+            help='default: all')
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != 'sqlite':
+            raise CommandError('the default db is not sqlite')
+        source = connection.settings_dict['NAME']
+        saved = dict(connection.settings_dict)
+        self.stdout.write(
+            f'{options["writers"]} writers, {options["readers"]} readers, '
+            f'{options["seconds"]} s')
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for name in options['profile'] or PROFILES:
+                    path = os.path.join(directory, f'{name}.sqlite3')
+                    self.copy(source, path, PROFILES[name][0])
+                    self.report(name, self.run(name, path, options))
+        finally:
+            connection.close()
+            connection.settings_dict.update(saved)
+
+    def copy(self, source, path, journal_mode):
+        source = sqlite3.connect(source)
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+            target.execute(f'PRAGMA journal_mode = {journal_mode}')
+        finally:
+            target.close()
+            source.close()
+
+    def run(self, name, path, options) -> dict:
+        _, pragmas, transaction_mode, conn_max_age = PROFILES[name]
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.close()
+        connection.settings_dict['NAME'] = path
+        connection.settings_dict['CONN_MAX_AGE'] = (
+            settings.DB_CONN_MAX_AGE if conn_max_age is None
+            else conn_max_age)
+        with override_settings(
+                SQLITE_PRAGMAS=(
+                    settings.SQLITE_PRAGMAS if pragmas is None else pragmas),
+                SQLITE_TRANSACTION_MODE=(
+                    settings.SQLITE_TRANSACTION_MODE
+                    if transaction_mode is None else transaction_mode),
+                ALLOWED_HOSTS=['*'], RESPONSE_CACHE=None):
+            patient = Patient.objects.create(
+                first_name='Bench', last_name='Mark',
+                birth_date='1990-01-01', email='bench@example.com')
+            study = {
+                'urgency_level': 'LOW',
+                'body_part': catalogs.body_parts.names()[0],
+                'type': catalogs.types.names()[0],
+                'description': 'benchmark',
+            }
+            # the processes open their own connections
+            connection.close()
+            context = multiprocessing.get_context('fork')
+            results = context.Queue()
+            deadline = time.monotonic() + options['seconds']
+            processes = [
+                context.Process(target=client, args=(
+                    kind, patient.id, study, deadline, results))
+                for kind, count in (
+                    ('create', options['writers']),
+                    ('list', options['readers']))
+                for _ in range(count)]
+            for process in processes:
+                process.start()
+            merged = {'create': ([], 0), 'list': ([], 0)}
+            for _ in processes:
+                kind, latencies, errors = results.get()
+                merged[kind] = (
+                    merged[kind][0] + latencies, merged[kind][1] + errors)
+            for process in processes:
+                process.join()
+        merged['seconds'] = options['seconds']
+        return merged
+
+    def report(self, name, merged):
+        columns = []
+        for kind in ('create', 'list'):
+            latencies, errors = merged[kind]
+            if len(latencies) < 2:
+                columns.append(f'{kind}: {len(latencies)} ok, {errors} errors')
+                continue
+            cuts = statistics.quantiles(latencies, n=100)
+            columns.append(
+                f'{kind} {len(latencies) / merged["seconds"]:,.0f}/s '
+                f'p50 {cuts[49] * 1000:.1f} ms p99 {cuts[98] * 1000:.1f} ms '
+                f'{errors} errors')
+        self.stdout.write(f'{name:>8}: ' + ' | '.join(columns))
+
+
+def client(kind, patient_pk, study, deadline, results):
+    '''
+    a benchmark process: POST (create) or GET (list) until the deadline
+    '''
+    api = APIClient()
+    api.force_authenticate(get_user_model()(username='bench', is_staff=True))
+    url = reverse('study_list_create', kwargs={'patient_pk': patient_pk})
+    latencies, errors = [], 0
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if kind == 'create':
+                ok = api.post(url, study, format='json').status_code == 201
+            else:
+                ok = api.get(url).status_code == 200
+        except DatabaseError:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    results.put((kind, latencies, errors))
@@ -0,0 +1,72 @@
+import io
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import msgpack_codec
+from api.models import Study
+from api.parsers import FastJSONParser, MessagePackParser
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+
+BODY_PARTS = ('STOMACH', 'NECK', 'CHEST', 'BREASTS')
+TYPES = ('MAMMOGRAM', 'XRAY')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare encode/decode time and size of the json and msgpack '
+        'renderers/parsers with a list of studies (no db needed).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        payload = [
+            {
+                'id': index,
+                'urgency_level': Study.URGENCIES[index % 3][0],
+                'body_part': BODY_PARTS[index % len(BODY_PARTS)],
+                'description': f'study {index}: normal thyroid, no findings',
+                'type': TYPES[index % len(TYPES)],
+                'patient': index // 10,
+                'updated_at': '2021-06-18T00:55:01.123456Z',
+            }
+            for index in range(options['rows'])]
+        codecs = [
+            ('json (stdlib)', JSONRenderer(), JSONParser(), None),
+            ('json (fast)', FastJSONRenderer(), FastJSONParser(), None),
+            ('msgpack', MessagePackRenderer(), MessagePackParser(), None),
+            ('msgpack (pure python)', MessagePackRenderer(),
+             MessagePackParser(), mock.patch.object(
+                 msgpack_codec, 'msgpack', None)),
+        ]
+        for name, renderer, parser, patch in codecs:
+            if patch:
+                patch.start()
+            try:
+                self.compare(
+                    name, renderer, parser, payload, options['repeat'])
+            finally:
+                if patch:
+                    patch.stop()
+
+    def compare(self, name, renderer, parser, payload, repeat):
+        data = renderer.render(payload)
+        encode = self.best(lambda: renderer.render(payload), repeat)
+        decode = self.best(
+            lambda: parser.parse(io.BytesIO(data), None, {}), repeat)
+        self.stdout.write(
+            f'{name:>22}: {len(data) / 1024:,.0f} KiB, '
+            f'encode {encode * 1000:.1f} ms, decode {decode * 1000:.1f} ms')
+
+    def best(self, function, repeat) -> float:
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - started)
+        return min(times)
@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Patient
+from api.search import get_search_backend
+
+FIRST_NAMES = (
+    'john', 'maria', 'jose', 'ana', 'luis', 'carmen', 'juan', 'laura',
+    'pedro', 'sofia', 'miguel', 'lucia', 'jorge', 'elena', 'pablo')
+LAST_NAMES = (
+    'smith', 'garcia', 'martinez', 'lopez', 'gonzalez', 'perez',
+    'sanchez', 'ramirez', 'torres', 'flores', 'rivera', 'gomez')
+QUERIES = (
+    'maria', 'garc', 'jose lopez', 'john smi', 'patient123',
+    'patient999999')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Latency of the ?q= search (api.search) over N patients, first page '
+        'ordered by relevance. The rows are created in a transaction '
+        'that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=100000)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'backend: {type(backend).__name__}')
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                self.populate(options['patients'])
+                self.stdout.write(
+                    f'{options["patients"]:,} patients indexed in '
+                    f'{time.perf_counter() - started:.1f} s')
+                for query in QUERIES:
+                    self.measure(
+                        backend, query, options['page_size'],
+                        options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, patients):
+        rnd = random.Random(0)
+        batch = []
+        for index in range(patients):
+            batch.append(Patient(
+                first_name=rnd.choice(FIRST_NAMES),
+                last_name=rnd.choice(LAST_NAMES),
+                birth_date='1980-01-01',
+                email=f'patient{index}@example.com'))
+            if len(batch) == 10000:
+                Patient.objects.bulk_create(batch)
+                batch = []
+        Patient.objects.bulk_create(batch)
+
+    def measure(self, backend, query, page_size, repeat):
+        queryset = backend.search(Patient.objects.all(), query)
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = list(queryset.all()[:page_size])
+            times.append(time.perf_counter() - started)
+        matches = queryset.count()
+        self.stdout.write(
+            f'{query!r:>16}: {matches:>8,} matches, first {len(rows)} '
+            f'in {min(times) * 1000:.1f} ms')
@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.fast import RowSerializer
+from api.models import BodyPart, Patient, Study, Type
+from api.serializers import PatientSerializer, StudySerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rows/sec of the ModelSerializer and the RowSerializer '
+        '(api.fast) for patients and studies. The rows are created in a '
+        'transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.populate(options['rows'])
+                self.compare(
+                    'patients', PatientSerializer, Patient.objects.all(),
+                    options['repeat'])
+                self.compare(
+                    'studies', StudySerializer, Study.objects.all(),
+                    options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, rows):
+        patients = Patient.objects.bulk_create(
+            Patient(
+                first_name=f'name {index}',
+                last_name=f'last name {index}',
+                birth_date='1980-01-01',
+                email=f'patient{index}@example.com')
+            for index in range(rows))
+        patient = Patient.objects.order_by('-id').first()
+        body_parts = list(BodyPart.objects.all())
+        types = list(Type.objects.all())
+        Study.objects.bulk_create(
+            Study(
+                patient=patient,
+                urgency_level=Study.URGENCIES[index % 3][0],
+                body_part=body_parts[index % len(body_parts)],
+                type=types[index % len(types)],
+                description=f'description {index}')
+            for index in range(len(patients)))
+
+    def compare(self, name, serializer_class, queryset, repeat):
+        serializer = serializer_class()
+        row_serializer = RowSerializer(serializer)
+        renderer = JSONRenderer()
+
+        def model_path():
+            return serializer_class(queryset.all(), many=True).data
+
+        def fast_path():
+            return row_serializer.many(
+                queryset.values(*row_serializer.columns))
+
+        same = renderer.render(model_path()) == renderer.render(fast_path())
+        rows = queryset.count()
+        model = self.best(model_path, repeat)
+        fast = self.best(fast_path, repeat)
+        self.stdout.write(
+            f'{name}: {rows} rows, '
+            f'ModelSerializer {rows / model:,.0f} rows/sec, '
+            f'RowSerializer {rows / fast:,.0f} rows/sec '
+            f'(x{model / fast:.1f}), same json: {same}')
+
+    def best(self, function, repeat) -> float:
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - started)
+        return min(times)
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment)
+
+from api import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmarks of the StudySerializer stages, the '
+        'PatientSerializer encoding and the study views dispatch '
+        '(api.benchmarks) on an in-memory sqlite db. --save writes the '
+        'results as a baseline, --baseline compares with one and fails '
+        'when a case is slower than --threshold.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*', help='only the cases with these names')
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=benchmarks.SIZES)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--min-time', type=float, default=0.2,
+            help='seconds per round')
+        parser.add_argument('--save', help='json file of the results')
+        parser.add_argument('--baseline', help='json file to compare')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='a regression is slower than the baseline by this '
+                 'fraction (0.2: 20%%)')
+        parser.add_argument('--list', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            self.stdout.write('\n'.join(
+                benchmarks.case_names(options['sizes'])))
+            return
+        baseline = (
+            benchmarks.load(options['baseline'])
+            if options['baseline'] else {})
+        results = self.run_in_memory(options, baseline)
+        if options['save']:
+            benchmarks.save(options['save'], results)
+        regressions = benchmarks.compare(
+            baseline, results, options['threshold'])
+        for name, old, new, change in regressions:
+            self.stderr.write(
+                f'{name}: {self.format(old)} -> {self.format(new)} '
+                f'({change:+.0%})')
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} regressions over '
+                f'{options["threshold"]:.0%}')
+
+    def run_in_memory(self, options, baseline) -> dict:
+        '''
+        run the cases on a new in-memory sqlite db (migrated)
+        '''
+        if connection.vendor != 'sqlite':
+            raise CommandError('the default db is not sqlite')
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            return benchmarks.run(
+                options['names'], options['sizes'], options['repeat'],
+                options['min_time'],
+                report=lambda name, seconds: self.report(
+                    name, seconds, baseline.get(name)))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, name, seconds, old):
+        line = f'{name:<45} {self.format(seconds):>10}'
+        if old:
+            line += f' {(seconds - old) / old:+6.0%}'
+        self.stdout.write(line)
+
+    def format(self, seconds) -> str:
+        if seconds < 1e-3:
+            return f'{seconds * 1e6:.1f} us'
+        return f'{seconds * 1e3:.2f} ms'
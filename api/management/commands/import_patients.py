@@ -0,0 +1,51 @@
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import READERS, PatientImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Import patients (with studies) from a ndjson or csv file. '
+        'The file is read line by line, the rejected rows are written '
+        'to stderr as ndjson.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='input file, - for stdin')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='input format (default: from the file extension)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.IMPORT_CHUNK_SIZE,
+            help='patients per bulk insert')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if input_format not in READERS:
+            raise CommandError(
+                f'unknown format {input_format!r}, use --format')
+        importer = PatientImporter(
+            chunk_size=max(options['chunk_size'], 1),
+            max_rejects=0,
+            on_progress=self.write_progress,
+            on_reject=self.write_reject)
+        if path == '-':
+            summary = importer.run(READERS[input_format](sys.stdin.buffer))
+        else:
+            with open(path, 'rb') as stream:
+                summary = importer.run(READERS[input_format](stream))
+        del summary['rejects']
+        self.stdout.write(self.style.SUCCESS(json.dumps(summary)))
+
+    def write_progress(self, importer):
+        self.stdout.write(
+            f'{importer.rows} rows, {importer.patients} patients, '
+            f'{importer.studies} studies, {importer.rejected} rejected '
+            f'({importer.rows_per_sec:.0f} rows/sec)')
+
+    def write_reject(self, reject):
+        self.stderr.write(json.dumps(reject))
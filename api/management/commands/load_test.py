@@ -0,0 +1,273 @@
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Patient, Study
+
+# name: url name, query string and the ids of the url kwargs
+ENDPOINTS = {
+    'patient_list': ('patient_list_create', '', ()),
+    'patient_search': ('patient_list_create', '?q={last_name}', ()),
+    'patient_detail': ('patient_get_update_delete', '', ('pk',)),
+    'study_list': ('study_list_create', '', ('patient_pk',)),
+    'study_detail': (
+        'study_get_update_delete', '', ('patient_pk', 'pk')),
+    'study_worklist': ('study_worklist', '?urgency_level=HIGH', ()),
+    'patient_stats': ('patient_study_stats', '', ('patient_pk',)),
+    'stats': ('study_stats', '', ()),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test of the api routes (api.urls) over the data of the db '
+        '(see seed_dataset): --concurrency clients send --requests GETs '
+        'per endpoint, in process (django test client, the queries per '
+        'request are counted) or to a running server (--url). The '
+        'latency percentiles, throughput and queries per request are '
+        'written to --output as json to diff between releases.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoint', action='append', choices=ENDPOINTS,
+            help='default: all')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='requests per endpoint before the measure')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--url', help='a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--token', help='api token of an admin user')
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='in process without the response cache')
+        parser.add_argument('--output', help='json file of the results')
+        parser.add_argument(
+            '--compare', help='json file of a previous run')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            url = urlsplit(options['url'])
+            if url.scheme != 'http':
+                raise CommandError('only http:// urls')
+            if not options['token']:
+                raise CommandError('--url needs the --token of an admin')
+            self.client = HTTPClient(
+                url.hostname, url.port or 80, options['token'])
+        else:
+            self.client = InProcessClient
+        paths = self.sample_paths(
+            options['endpoint'] or ENDPOINTS,
+            options['warmup'] + options['requests'], options['seed'])
+        # the ids are sampled, the threads open their own connections
+        connection.close()
+        settings = {'ALLOWED_HOSTS': ['*']}
+        if options['no_cache']:
+            settings['RESPONSE_CACHE'] = None
+        results = {}
+        with override_settings(**settings):
+            for name, urls in paths.items():
+                results[name] = self.run(
+                    urls, options['warmup'], options['concurrency'])
+                self.report(name, results[name])
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.compare(json.load(file)['endpoints'], results)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'options': {
+                        key: options[key] for key in (
+                            'requests', 'concurrency', 'seed', 'url',
+                            'no_cache')},
+                    'patients': self.patients,
+                    'studies': self.studies,
+                    'endpoints': results,
+                }, file, indent=2, sort_keys=True)
+                file.write('\n')
+
+    def sample_paths(self, endpoints, count, seed) -> dict:
+        '''
+        the same paths for a seed and a dataset: random existing ids
+        '''
+        rnd = random.Random(seed)
+        self.patients = Patient.objects.count()
+        self.studies = Study.objects.count()
+        if not self.studies:
+            raise CommandError('no studies, run seed_dataset')
+        bounds = Study.objects.aggregate(first=Min('id'), last=Max('id'))
+        studies = []
+        while len(studies) < count:
+            # the ids can have holes, sample more than needed
+            ids = [rnd.randint(bounds['first'], bounds['last'])
+                   for _ in range(count * 2)]
+            found = dict(Study.objects.filter(id__in=ids).values_list(
+                'id', 'patient_id'))
+            studies += [(id, found[id]) for id in ids if id in found]
+        studies = studies[:count]
+        last_names = dict(Patient.objects.filter(
+            id__in={patient_pk for _, patient_pk in studies}
+        ).values_list('id', 'last_name'))
+        paths = {}
+        for name in endpoints:
+            url_name, query, kwargs = ENDPOINTS[name]
+            paths[name] = []
+            for pk, patient_pk in studies:
+                # the pk of a patient url is the patient
+                ids = {
+                    'pk': pk if name.startswith('study') else patient_pk,
+                    'patient_pk': patient_pk}
+                paths[name].append(
+                    reverse(url_name, kwargs={
+                        kwarg: ids[kwarg] for kwarg in kwargs})
+                    + query.format(last_name=last_names[patient_pk]))
+        return paths
+
+    def run(self, urls, warmup, concurrency) -> dict:
+        # the first requests (warmup) are not measured
+        queue = iter(enumerate(urls))
+        lock = threading.Lock()
+        latencies, queries, errors = [], [], []
+        # start of the measured requests
+        measured = [time.perf_counter()]
+
+        def worker():
+            client = self.client()
+            try:
+                while True:
+                    with lock:
+                        index, url = next(queue, (None, None))
+                        if index == warmup:
+                            measured[0] = time.perf_counter()
+                    if url is None:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        status, query_count = client.get(url)
+                    except OSError as error:
+                        status, query_count = type(error).__name__, None
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        if status != 200:
+                            errors.append(status)
+                        elif index >= warmup:
+                            latencies.append(elapsed)
+                            if query_count is not None:
+                                queries.append(query_count)
+            finally:
+                client.close()
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - measured[0]
+        result = {
+            'requests': len(latencies),
+            'errors': len(errors),
+            'throughput': round(len(latencies) / elapsed, 1),
+            'queries': (
+                round(statistics.mean(queries), 2) if queries else None),
+        }
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            for percentile in (50, 95, 99):
+                result[f'p{percentile}_ms'] = round(
+                    cuts[percentile - 1] * 1000, 2)
+        return result
+
+    def report(self, name, result):
+        line = (
+            f'{name:>15}: {result["requests"]} ok, {result["errors"]} '
+            f'errors, {result["throughput"]:,.0f} req/s')
+        if 'p50_ms' in result:
+            line += (
+                f', p50 {result["p50_ms"]:.1f} ms, '
+                f'p95 {result["p95_ms"]:.1f} ms, '
+                f'p99 {result["p99_ms"]:.1f} ms')
+        if result['queries'] is not None:
+            line += f', {result["queries"]:g} queries'
+        self.stdout.write(line)
+
+    def compare(self, previous, results):
+        self.stdout.write('compared with the previous run:')
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            changes = []
+            for key in ('throughput', 'p50_ms', 'p99_ms', 'queries'):
+                old, new = previous[name].get(key), result.get(key)
+                if old and new is not None:
+                    changes.append(f'{key} {(new - old) / old:+.0%}')
+            self.stdout.write(f'{name:>15}: {", ".join(changes)}')
+
+
+class InProcessClient:
+    '''
+    the django test client of a thread, the queries are counted by the
+    QueryBudgetMiddleware
+    '''
+
+    def __init__(self):
+        self.api = APIClient()
+        self.api.force_authenticate(
+            get_user_model()(username='load_test', is_staff=True))
+
+    def get(self, url):
+        response = self.api.get(url)
+        return (
+            response.status_code,
+            getattr(response.wsgi_request, 'query_count', None))
+
+    def close(self):
+        connection.close()
+
+
+class HTTPClient:
+    '''
+    a keep-alive connection to a running server
+    '''
+
+    def __init__(self, host, port, token):
+        self.host, self.port, self.token = host, port, token
+        self.connection = None
+
+    def __call__(self):
+        return HTTPClient(self.host, self.port, self.token)
+
+    def get(self, url):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30)
+        try:
+            self.connection.request(
+                'GET', url, headers={'Authorization': f'Token {self.token}'})
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise OSError('connection error')
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+        return response.status, None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.search import SQLiteFTSBackend
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the sqlite fts5 search tables/triggers if they are missing '
+        '(a table rebuild in a migration drops the triggers) and rebuild '
+        'the search index from the patient and study tables.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                f'the fts index is only used on sqlite, not {connection.vendor}')
+        with connection.schema_editor() as schema_editor:
+            SQLiteFTSBackend.install(schema_editor)
+        self.stdout.write(self.style.SUCCESS('search index rebuilt'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Verify the study counters (api.stats) against the study table, '
+        'and rebuild them from scratch (unless --verify-only).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='only report the differences (exit 1 if there are any)')
+
+    def handle(self, *args, **options):
+        differences = stats.verify()
+        for table, cell, stored, computed in differences:
+            self.stderr.write(
+                f'{table} {cell}: stored {stored}, computed {computed}')
+        if options['verify_only']:
+            if differences:
+                raise CommandError(f'{len(differences)} wrong counters')
+            self.stdout.write(self.style.SUCCESS('counters ok'))
+            return
+        stats.rebuild()
+        differences = stats.verify()
+        if differences:
+            raise CommandError(
+                f'{len(differences)} wrong counters after the rebuild '
+                '(concurrent writes?)')
+        self.stdout.write(self.style.SUCCESS('counters rebuilt'))
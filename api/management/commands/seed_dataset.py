@@ -0,0 +1,179 @@
+import datetime
+import random
+import time
+from collections import Counter
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api import catalogs, stats
+from api.models import Patient, Study
+from api.search import SQLiteFTSBackend, get_search_backend
+
+FIRST_NAMES = (
+    'john', 'maria', 'jose', 'ana', 'luis', 'carmen', 'juan', 'laura',
+    'pedro', 'sofia', 'miguel', 'lucia', 'jorge', 'elena', 'pablo',
+    'james', 'mary', 'robert', 'linda', 'david', 'susan', 'daniel', 'sarah')
+LAST_NAMES = (
+    'smith', 'garcia', 'martinez', 'lopez', 'gonzalez', 'perez',
+    'sanchez', 'ramirez', 'torres', 'flores', 'rivera', 'gomez',
+    'johnson', 'williams', 'brown', 'jones', 'miller', 'davis', 'wilson')
+FINDINGS = (
+    'no findings', 'normal thyroid', 'small nodule', 'mild inflammation',
+    'follow up in 6 months', 'compare with previous study', 'calcification',
+    'fracture', 'no changes', 'suspicious mass', 'cyst', 'artifact')
+# LOW, MID, HIGH
+URGENCY_WEIGHTS = (6, 3, 1)
+# updated_at of every row (the dataset is the same for a seed)
+UPDATED_AT = datetime.datetime(2021, 6, 1, tzinfo=datetime.timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        'Add a deterministic synthetic dataset (the same rows for a '
+        '--seed): --patients and --studies spread over them. The rows '
+        'are inserted with executemany in batches, the study counters '
+        '(api.stats) are updated and the sqlite search index rebuilt.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=100000)
+        parser.add_argument('--studies', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if not catalogs.types.names() or not catalogs.body_parts.names():
+            raise CommandError('the catalogs are empty, run migrate')
+        self.rnd = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.updated_at = connection.ops.adapt_datetimefield_value(
+            UPDATED_AT if settings.USE_TZ
+            else timezone.make_naive(UPDATED_AT))
+        # the search triggers cost more than the insert, the index is
+        # rebuilt once at the end (not in a transaction, the sqlite
+        # schema editor can't run there), also when the seed fails
+        fts = (
+            isinstance(get_search_backend(), SQLiteFTSBackend)
+            and connection.vendor == 'sqlite'
+            and not connection.in_atomic_block)
+        if fts:
+            with connection.schema_editor() as schema_editor:
+                SQLiteFTSBackend.uninstall(schema_editor)
+
+        started = time.perf_counter()
+        try:
+            first_patient = self.seed_patients(options['patients'])
+            self.seed_studies(
+                first_patient, options['patients'], options['studies'])
+            self.reset_sequences()
+        finally:
+            if fts:
+                self.step('search index', self.install_fts)
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["patients"]:,} patients and {options["studies"]:,} '
+            f'studies in {time.perf_counter() - started:.1f} s'))
+
+    def step(self, name, function):
+        started = time.perf_counter()
+        function()
+        self.stdout.write(f'{name}: {time.perf_counter() - started:.1f} s')
+
+    def install_fts(self):
+        with connection.schema_editor() as schema_editor:
+            SQLiteFTSBackend.install(schema_editor)
+
+    def insert(self, model, fields, rows):
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field) for field in fields)
+        values = ', '.join(['%s'] * len(fields))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+                f'VALUES ({values})', rows)
+
+    def progress(self, name, done, total, started):
+        if done < total and done // self.batch_size % 10:
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name}: {done:,}/{total:,} '
+            f'({done / elapsed:,.0f} rows/s)')
+
+    def seed_patients(self, patients) -> int:
+        '''
+        insert the patients with explicit ids, return the first one
+        '''
+        rnd = self.rnd
+        first = (Patient.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        fields = (
+            'id', 'first_name', 'last_name', 'birth_date', 'email',
+            'updated_at')
+        adapt_date = connection.ops.adapt_datefield_value
+        started = time.perf_counter()
+        for offset in range(0, patients, self.batch_size):
+            rows = []
+            for index in range(offset, min(offset + self.batch_size,
+                                           patients)):
+                first_name = rnd.choice(FIRST_NAMES)
+                last_name = rnd.choice(LAST_NAMES)
+                birth_date = datetime.date(1930, 1, 1) + datetime.timedelta(
+                    days=rnd.randrange(32000))
+                rows.append((
+                    first + index, first_name, last_name,
+                    adapt_date(birth_date),
+                    f'{first_name}.{last_name}{first + index}@example.com',
+                    self.updated_at))
+            with transaction.atomic():
+                self.insert(Patient, fields, rows)
+            self.progress(
+                'patients', offset + len(rows), patients, started)
+        return first
+
+    def seed_studies(self, first_patient, patients, studies):
+        '''
+        the studies spread over the patients, in patient order
+        '''
+        if not patients:
+            return
+        rnd = self.rnd
+        first = (Study.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        fields = (
+            'id', 'patient_id', 'type_id', 'body_part_id', 'urgency_level',
+            'description', 'updated_at')
+        type_ids = sorted(catalogs.types.id_names())
+        body_part_ids = sorted(catalogs.body_parts.id_names())
+        urgencies = [key for key, _ in Study.URGENCIES]
+        weights = list(accumulate(URGENCY_WEIGHTS))
+        started = time.perf_counter()
+        for offset in range(0, studies, self.batch_size):
+            rows = []
+            deltas = Counter()
+            for index in range(offset, min(offset + self.batch_size,
+                                           studies)):
+                row = (
+                    first + index,
+                    first_patient + index * patients // studies,
+                    rnd.choice(type_ids),
+                    rnd.choice(body_part_ids),
+                    rnd.choices(urgencies, cum_weights=weights)[0],
+                    f'{rnd.choice(FINDINGS)}, {rnd.choice(FINDINGS)}',
+                    self.updated_at)
+                rows.append(row)
+                deltas[row[1:5]] += 1
+            with transaction.atomic():
+                self.insert(Study, fields, rows)
+                stats.count_studies(deltas)
+            self.progress('studies', offset + len(rows), studies, started)
+
+    def reset_sequences(self):
+        # the ids were explicit (postgres sequences)
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Patient, Study])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
@@ -0,0 +1,136 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from gunicorn.app.base import BaseApplication
+
+from api.warmup import FirstRequestTimer, connect_databases, warm_up
+
+# cache alias settings that must be shared by the workers (also
+# REPLICA_PIN_CACHE with replicas)
+SHARED_CACHES = ('RESPONSE_CACHE', 'TOKEN_CACHE', 'CATALOG_CACHE')
+
+
+class Server(BaseApplication):
+    '''
+    gunicorn with the application already loaded (preload_app)
+    '''
+
+    def __init__(self, application, config):
+        self.application = application
+        self.config = config
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.config.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+class Command(BaseCommand):
+    help = (
+        'Production server: load and warm up the app once (api.warmup), '
+        'then fork the gunicorn workers (they share the warm memory '
+        'copy-on-write). --asgi for uvicorn workers and the async views '
+        '(api.aio).')
+    # the checks import the urlconf, after --asgi
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000')
+        parser.add_argument(
+            '--workers', type=int, default=settings.SERVE_WORKERS,
+            help='0: 2 x cpus + 1')
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help='threads per wsgi worker (gthread when > 1)')
+        parser.add_argument('--asgi', action='store_true')
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument('--no-warmup', action='store_true')
+        parser.add_argument(
+            '--warmup-only', action='store_true',
+            help='report the warm-up and exit')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['asgi']:
+            # the same than app.asgi, before the urlconf is imported
+            settings.API_ASYNC_VIEWS = True
+        self.check()
+        workers = options['workers'] or multiprocessing.cpu_count() * 2 + 1
+        if workers > 1 and not options['warmup_only']:
+            self.check_shared_caches()
+        if options['asgi']:
+            from django.core.handlers.asgi import ASGIHandler
+            application = ASGIHandler()
+        else:
+            from django.core.handlers.wsgi import WSGIHandler
+            application = WSGIHandler()
+
+        timings = {} if options['no_warmup'] else warm_up()
+        # the workers open their own connections
+        connections.close_all()
+        self.stdout.write(
+            f'startup {(time.perf_counter() - started) * 1000:.0f} ms'
+            + ''.join(
+                f', {name} {seconds * 1000:.1f} ms'
+                for name, seconds in timings.items()))
+        if options['warmup_only']:
+            return
+
+        if options['asgi']:
+            worker_class = 'uvicorn.workers.UvicornWorker'
+        elif options['threads'] > 1:
+            worker_class = 'gthread'
+        else:
+            worker_class = 'sync'
+        Server(application, {
+            'bind': options['bind'],
+            'workers': workers,
+            'threads': options['threads'],
+            'worker_class': worker_class,
+            'timeout': options['timeout'],
+            'preload_app': True,
+            'post_worker_init': self.post_worker_init,
+        }).run()
+
+    @staticmethod
+    def check_shared_caches():
+        '''
+        refuse a per process (locmem) cache that must be shared
+        '''
+        names = list(SHARED_CACHES)
+        if settings.DATABASE_REPLICAS:
+            names.append('REPLICA_PIN_CACHE')
+        for name in names:
+            alias = getattr(settings, name)
+            if alias and isinstance(caches[alias], LocMemCache):
+                raise CommandError(
+                    f'{name} is the locmem cache "{alias}" (per process), '
+                    'the workers would not see the invalidations of the '
+                    'others: set a shared cache (CACHE_BACKEND), disable '
+                    f'it ({name}=) or run --workers 1')
+        if settings.TOKEN_CACHE_LOCAL and not settings.TOKEN_CACHE:
+            raise CommandError(
+                'TOKEN_CACHE_LOCAL is a map per process, a revoked token '
+                'would stay valid in the other workers: set a shared '
+                'TOKEN_CACHE or run --workers 1')
+
+    @staticmethod
+    def post_worker_init(worker):
+        started = time.perf_counter()
+        connect_databases()
+        worker.log.info(
+            'worker %s: db %.1f ms', worker.pid,
+            (time.perf_counter() - started) * 1000)
+        worker.first_request = FirstRequestTimer(
+            lambda seconds: worker.log.info(
+                'worker %s: first request %.1f ms',
+                worker.pid, seconds * 1000))
+        worker.first_request.install()
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the sqlite primary to the local replicas '
+        '(settings.SQLITE_REPLICAS) with the sqlite backup api, once or '
+        'every --interval seconds (the replication lag).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='seconds between copies (0: copy once)')
+
+    def handle(self, *args, **options):
+        # any sqlite engine (api.backends.sqlite3)
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('the primary is not sqlite')
+        if not settings.SQLITE_REPLICAS:
+            raise CommandError('SQLITE_REPLICAS is not set')
+        while True:
+            self.sync(primary)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self, primary):
+        '''
+        copy the primary (its django connection) to every replica
+        '''
+        started = time.perf_counter()
+        primary.ensure_connection()
+        for name in settings.SQLITE_REPLICAS:
+            target = sqlite3.connect(name)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+        self.stdout.write(
+            f'{len(settings.SQLITE_REPLICAS)} replicas synced in '
+            f'{(time.perf_counter() - started) * 1000:.0f} ms')
@@ -0,0 +1,155 @@
+'''
+Request metrics in the prometheus text format
+
+Notes:
+    the histograms are per process (like the response cache metrics),
+    every worker of manage.py serve answers /metrics with its own
+    requests: scrape the workers one by one, or run one worker per
+    container. An observation is a bisect and a dict update under a
+    lock, the buckets are fixed (no quantiles are computed here).
+'''
+import threading
+from bisect import bisect_left
+
+from .response_cache import response_cache
+
+# seconds
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+    10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def format_labels(names, values) -> str:
+    return ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self.series = {}
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.series = {}
+
+    def export(self) -> list:
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} counter']
+        with self._lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            lines.append(
+                f'{self.name}{{{format_labels(self.labels, labels)}}} '
+                f'{value}')
+        return lines
+
+
+class Histogram(Counter):
+    '''
+    cumulative buckets (le), sum and count of every label set
+    '''
+
+    def __init__(self, name, help, labels, buckets=SECONDS_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                # a count per bucket, +Inf and the sum
+                series = self.series[labels] = [0] * (
+                    len(self.buckets) + 1) + [0]
+            series[index] += 1
+            series[-1] += value
+
+    def export(self) -> list:
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(
+                (labels, list(values))
+                for labels, values in self.series.items())
+        for labels, values in series:
+            label_text = format_labels(self.labels, labels)
+            count = 0
+            for bound, value in zip(self.buckets + ('+Inf',), values):
+                count += value
+                lines.append(
+                    f'{self.name}_bucket{{{label_text},le="{bound}"}} '
+                    f'{count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {values[-1]}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+REQUESTS = Counter(
+    'api_requests_total', 'Requests by route, method and status',
+    ('route', 'method', 'status'))
+REQUEST_SECONDS = Histogram(
+    'api_request_duration_seconds', 'Total time of the requests',
+    ('route', 'method'))
+SQL_SECONDS = Histogram(
+    'api_request_sql_seconds', 'SQL time of the requests',
+    ('route', 'method'))
+SQL_QUERIES = Histogram(
+    'api_request_sql_queries', 'SQL queries of the requests',
+    ('route', 'method'), buckets=QUERY_BUCKETS)
+SERIALIZER_SECONDS = Histogram(
+    'api_request_serializer_seconds',
+    'Python time of the views without the SQL (serializers mostly)',
+    ('route', 'method'))
+RENDER_SECONDS = Histogram(
+    'api_request_render_seconds', 'Render time of the responses',
+    ('route', 'method'))
+
+METRICS = (
+    REQUESTS, REQUEST_SECONDS, SQL_SECONDS, SQL_QUERIES,
+    SERIALIZER_SECONDS, RENDER_SECONDS)
+
+
+def observe(route, method, status, timings, queries):
+    '''
+    add a request, timings is name -> seconds (total, sql, serializer,
+    render)
+    '''
+    labels = (route, method)
+    REQUESTS.inc((route, method, str(status)))
+    REQUEST_SECONDS.observe(labels, timings['total'])
+    SQL_SECONDS.observe(labels, timings['sql'])
+    SQL_QUERIES.observe(labels, queries)
+    if 'serializer' in timings:
+        SERIALIZER_SECONDS.observe(labels, timings['serializer'])
+    if 'render' in timings:
+        RENDER_SECONDS.observe(labels, timings['render'])
+
+
+def export() -> str:
+    lines = []
+    for metric in METRICS:
+        lines += metric.export()
+    cache = response_cache.metrics()
+    for name in ('hits', 'misses', 'invalidations'):
+        lines += [
+            f'# HELP api_response_cache_{name}_total Response cache '
+            f'{name} (api.response_cache)',
+            f'# TYPE api_response_cache_{name}_total counter',
+            f'api_response_cache_{name}_total {cache[name]}']
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    for metric in METRICS:
+        metric.reset()
@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+from . import metrics, profiling
+from .querylog import QueryInspector
+from .routers import pins, read_from_replicas
+
+logger = logging.getLogger('debug')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def count_queries(request):
+    '''
+    add the sql queries of this thread to request.query_count, and their
+    seconds to request.query_time (and check them with the
+    request.query_inspector, api.querylog)
+    (the connections are per thread, the async views run the queries
+    in a thread pool, see api.aio)
+    '''
+    inspector = getattr(request, 'query_inspector', None)
+
+    def counter(execute, sql, params, many, context):
+        request.query_count = getattr(request, 'query_count', 0) + 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            request.query_time = getattr(request, 'query_time', 0.0) + seconds
+            if inspector is not None:
+                inspector.query(sql, seconds)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield
+
+
+class QueryBudgetMiddleware:
+    '''
+    Count the sql queries of every request and compare them with the
+    query_budget attribute of the view.
+
+    Notes:
+        views without query_budget (admin, api-docs) are only counted.
+        When a view runs more queries than its budget the middleware logs a
+        warning in the debug logger, and raise QueryBudgetExceeded if
+        settings.QUERY_BUDGET_RAISE is True (for the tests), so an N+1
+        breaks the CI instead of production.
+        Under ASGI (async views) the middleware does not block the event
+        loop, the views count their queries with count_queries.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark the middleware as a coroutine function for django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request.query_count, request.query_time = 0, 0.0
+        with count_queries(request):
+            response = self.get_response(request)
+        return self.check_budget(request, response)
+
+    async def __acall__(self, request):
+        request.query_count, request.query_time = 0, 0.0
+        response = await self.get_response(request)
+        return self.check_budget(request, response)
+
+    def check_budget(self, request, response):
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and request.query_count > budget:
+            message = (
+                f'{request.method} {request.path} ran {request.query_count} '
+                f'queries (budget {budget})')
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        request.query_budget = getattr(view_class, 'query_budget', None)
+
+
+class QueryInspectionMiddleware:
+    '''
+    Slow query log and N+1 detection of every request (api.querylog)
+
+    Notes:
+        must be before the QueryBudgetMiddleware, its execute wrapper
+        pass the queries to the request.query_inspector.
+        Not used without settings.SQL_SLOW_QUERY_MS and
+        settings.SQL_N_PLUS_ONE_THRESHOLD.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not (settings.SQL_SLOW_QUERY_MS
+                or settings.SQL_N_PLUS_ONE_THRESHOLD):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark the middleware as a coroutine function for django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        inspector = self.start(request)
+        response = self.get_response(request)
+        inspector.report(request)
+        return response
+
+    async def __acall__(self, request):
+        inspector = self.start(request)
+        response = await self.get_response(request)
+        inspector.report(request)
+        return response
+
+    def start(self, request) -> QueryInspector:
+        request.query_inspector = QueryInspector(
+            settings.SQL_SLOW_QUERY_MS, settings.SQL_N_PLUS_ONE_THRESHOLD)
+        return request.query_inspector
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        request.query_inspector.view = (
+            f'{view.__module__}.{view.__qualname__}')
+
+
+class ReplicaRoutingMiddleware:
+    '''
+    Route the reads of the safe requests to the replicas (api.routers)
+
+    Notes:
+        a write request pins the client to the primary for
+        settings.REPLICA_PIN_SECONDS, so it reads its own writes.
+        Not used without settings.DATABASE_REPLICAS.
+    '''
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark the middleware as a coroutine function for django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with read_from_replicas(self.use_replicas(request)):
+            response = self.get_response(request)
+        self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        with read_from_replicas(self.use_replicas(request)):
+            response = await self.get_response(request)
+        self.pin(request)
+        return response
+
+    def use_replicas(self, request) -> bool:
+        return (
+            request.method in self.safe_methods
+            and not pins.is_pinned(request))
+
+    def pin(self, request):
+        if request.method not in self.safe_methods:
+            pins.pin(request)
+
+
+class RequestMetricsMiddleware:
+    '''
+    Time every request: Server-Timing header and per route histograms
+    (api.metrics, GET /metrics)
+
+    Notes:
+        total is the whole request after this middleware (the first one),
+        sql the queries counted by the QueryBudgetMiddleware, serializer
+        the python time of the view without its sql (the serializers
+        mostly, also the authentication, permissions and filters) and
+        render the render of the DRF response. A response of the
+        response cache has no serializer and render.
+        The route label is the url pattern (bounded, not the path).
+        Not used without settings.REQUEST_METRICS, the header is only
+        added with settings.SERVER_TIMING.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark the middleware as a coroutine function for django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        return self.finish(request, response, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        return self.finish(request, response, started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timings = {}
+        request.view_started = (
+            time.perf_counter(), getattr(request, 'query_time', 0.0))
+
+    def process_template_response(self, request, response):
+        now = time.perf_counter()
+        started, query_time = request.view_started
+        request.timings['serializer'] = max(
+            0.0, now - started
+            - (getattr(request, 'query_time', 0.0) - query_time))
+
+        def rendered(response):
+            # return None: the response is not replaced
+            request.timings['render'] = time.perf_counter() - now
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, started):
+        timings = {
+            'sql': getattr(request, 'query_time', 0.0),
+            **getattr(request, 'timings', {}),
+            'total': time.perf_counter() - started,
+        }
+        queries = getattr(request, 'query_count', 0)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={seconds * 1000:.2f}'
+                + (f';desc="{queries} queries"' if name == 'sql' else '')
+                for name, seconds in timings.items())
+        match = request.resolver_match
+        metrics.observe(
+            match.route if match else 'unmatched', request.method,
+            response.status_code, timings, queries)
+        return response
+
+
+class ProfilerMiddleware:
+    '''
+    Profile a request of a staff user with ?_profile=cpu|sample or the
+    X-Profile header (api.profiling)
+
+    Notes:
+        must be the last middleware: process_view runs and renders the
+        view under the profiler (the other middlewares are not in the
+        profile). Under ASGI process_view runs in a thread, the DRF view
+        of an async view (api.aio) is run there.
+        Not used without settings.PROFILE_REQUESTS.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_REQUESTS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # mark the middleware as a coroutine function for django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode, as_response = profiling.requested(request)
+        if mode is None or not profiling.is_staff(request):
+            return None
+        if asyncio.iscoroutinefunction(view_func):
+            view_func = view_func.view_class.as_view(**view_func.initkwargs)
+        response, stored = profiling.run_view(
+            mode, view_func, request, view_args, view_kwargs)
+        if not as_response:
+            response['X-Profile-Id'] = stored['id']
+            return response
+        content, content_type = profiling.output(
+            stored, request.GET.get('_profile_output'))
+        if content is None:
+            return HttpResponse(
+                f'unknown _profile_output for {mode}', status=400,
+                content_type='text/plain; charset=utf-8')
+        profile = HttpResponse(content, content_type=content_type)
+        profile['X-Profile-Id'] = stored['id']
+        profile['X-Profile-Status'] = response.status_code
+        return profile
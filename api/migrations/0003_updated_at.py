@@ -0,0 +1,23 @@
+# Generated by Django 3.2.3 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_populate_catalogs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='study',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.3 on 2026-10-18 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='study',
+            index=models.Index(fields=['patient', 'urgency_level', 'id'], name='study_patient_urgency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='study',
+            index=models.Index(fields=['type', 'urgency_level'], name='study_type_urgency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='study',
+            index=models.Index(fields=['body_part', 'urgency_level'], name='study_body_part_urgency_idx'),
+        ),
+    ]
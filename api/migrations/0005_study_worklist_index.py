@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_study_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='study',
+            index=models.Index(fields=['urgency_level', 'id'], name='study_worklist_idx'),
+        ),
+    ]
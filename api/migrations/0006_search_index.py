@@ -0,0 +1,91 @@
+from django.db import migrations
+
+# the sql of api.search.SQLiteFTSBackend when this migration was written,
+# frozen: a later change of the backend does not change this migration
+# (run "manage.py rebuild_search_index" to apply it)
+FTS_TABLES = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_fts USING fts5("
+    "first_name, last_name, email, content='patient', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS patient_fts_insert "
+    "AFTER INSERT ON patient BEGIN "
+    "INSERT INTO patient_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS patient_fts_delete "
+    "AFTER DELETE ON patient BEGIN "
+    "INSERT INTO patient_fts(patient_fts, rowid, first_name, last_name, "
+    "email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS patient_fts_update "
+    "AFTER UPDATE OF first_name, last_name, email ON patient BEGIN "
+    "INSERT INTO patient_fts(patient_fts, rowid, first_name, last_name, "
+    "email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "INSERT INTO patient_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); "
+    "END",
+    "INSERT INTO patient_fts(patient_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS study_fts USING fts5("
+    "description, content='study', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS study_fts_insert "
+    "AFTER INSERT ON study BEGIN "
+    "INSERT INTO study_fts(rowid, description) "
+    "VALUES (new.id, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS study_fts_delete "
+    "AFTER DELETE ON study BEGIN "
+    "INSERT INTO study_fts(study_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS study_fts_update "
+    "AFTER UPDATE OF description ON study BEGIN "
+    "INSERT INTO study_fts(study_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO study_fts(rowid, description) "
+    "VALUES (new.id, new.description); "
+    "END",
+    "INSERT INTO study_fts(study_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS_TABLES = [
+    'DROP TRIGGER IF EXISTS patient_fts_insert',
+    'DROP TRIGGER IF EXISTS patient_fts_delete',
+    'DROP TRIGGER IF EXISTS patient_fts_update',
+    'DROP TABLE IF EXISTS patient_fts',
+    'DROP TRIGGER IF EXISTS study_fts_insert',
+    'DROP TRIGGER IF EXISTS study_fts_delete',
+    'DROP TRIGGER IF EXISTS study_fts_update',
+    'DROP TABLE IF EXISTS study_fts',
+]
+
+
+class SQLiteRunSQL(migrations.RunSQL):
+    '''
+    RunSQL only on sqlite (fts5), a no-op on the other databases
+    '''
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_study_worklist_index'),
+    ]
+
+    operations = [
+        SQLiteRunSQL(FTS_TABLES, DROP_FTS_TABLES),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.3 on 2026-10-18 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_studies(apps, schema_editor):
+    '''
+    counters of the existing studies (api.stats)
+    '''
+    Study = apps.get_model('api', 'Study')
+    StudyCount = apps.get_model('api', 'StudyCount')
+    PatientStudyCount = apps.get_model('api', 'PatientStudyCount')
+    cells = Study.objects.values(
+        'patient_id', 'type_id', 'body_part_id', 'urgency_level').annotate(
+            total=models.Count('id')).order_by()
+    overall = {}
+    patient_counts = []
+    for cell in cells:
+        total = cell.pop('total')
+        patient_counts.append(PatientStudyCount(count=total, **cell))
+        cell.pop('patient_id')
+        key = tuple(cell.items())
+        overall[key] = overall.get(key, 0) + total
+    PatientStudyCount.objects.bulk_create(patient_counts, batch_size=500)
+    StudyCount.objects.bulk_create(
+        [StudyCount(count=total, **dict(key))
+         for key, total in overall.items()], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('urgency_level', models.CharField(choices=[('LOW', 'Low'), ('MID', 'Mid'), ('HIGH', 'High')], max_length=5)),
+                ('count', models.IntegerField(default=0)),
+                ('body_part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.bodypart')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.type')),
+            ],
+            options={
+                'db_table': 'study_count',
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientStudyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('urgency_level', models.CharField(choices=[('LOW', 'Low'), ('MID', 'Mid'), ('HIGH', 'High')], max_length=5)),
+                ('count', models.IntegerField(default=0)),
+                ('body_part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.bodypart')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='study_counts', to='api.patient')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.type')),
+            ],
+            options={
+                'db_table': 'patient_study_count',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='studycount',
+            constraint=models.UniqueConstraint(fields=('type', 'body_part', 'urgency_level'), name='study_count_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='patientstudycount',
+            constraint=models.UniqueConstraint(fields=('patient', 'type', 'body_part', 'urgency_level'), name='patient_study_count_unique'),
+        ),
+        migrations.RunPython(count_studies, migrations.RunPython.noop),
+    ]
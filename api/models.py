@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class Patient(models.Model):
@@ -6,6 +6,7 @@ class Patient(models.Model):
     last_name = models.CharField(max_length=50)
     birth_date = models.DateField()
     email = models.EmailField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "patient"
@@ -61,6 +62,88 @@ class Study(models.Model):
         Patient,
         related_name='studies',
         on_delete=models.RESTRICT)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "study"
+        # access paths of api.filters.StudyFilterBackend
+        indexes = [
+            models.Index(
+                fields=['patient', 'urgency_level', 'id'],
+                name='study_patient_urgency_idx'),
+            models.Index(
+                fields=['type', 'urgency_level'],
+                name='study_type_urgency_idx'),
+            models.Index(
+                fields=['body_part', 'urgency_level'],
+                name='study_body_part_urgency_idx'),
+            # api.pagination.WorklistPagination
+            models.Index(
+                fields=['urgency_level', 'id'],
+                name='study_worklist_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # the pre_save/post_save signals update the stats counters
+        # (api.stats) in the same transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class StudyCount(models.Model):
+    '''
+    Number of studies per (type, body_part, urgency_level)
+
+    Notes: maintained by api.stats, see PatientStudyCount for the
+        counters of each patient.
+    '''
+    type = models.ForeignKey(
+        Type,
+        related_name='+',
+        on_delete=models.CASCADE)
+    body_part = models.ForeignKey(
+        BodyPart,
+        related_name='+',
+        on_delete=models.CASCADE)
+    urgency_level = models.CharField(
+        max_length=5,
+        choices=Study.URGENCIES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "study_count"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['type', 'body_part', 'urgency_level'],
+                name='study_count_unique'),
+        ]
+
+
+class PatientStudyCount(models.Model):
+    '''
+    Number of studies of a patient per (type, body_part, urgency_level)
+    '''
+    patient = models.ForeignKey(
+        Patient,
+        related_name='study_counts',
+        on_delete=models.CASCADE)
+    type = models.ForeignKey(
+        Type,
+        related_name='+',
+        on_delete=models.CASCADE)
+    body_part = models.ForeignKey(
+        BodyPart,
+        related_name='+',
+        on_delete=models.CASCADE)
+    urgency_level = models.CharField(
+        max_length=5,
+        choices=Study.URGENCIES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "patient_study_count"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['patient', 'type', 'body_part', 'urgency_level'],
+                name='patient_study_count_unique'),
+        ]
@@ -0,0 +1,192 @@
+'''
+MessagePack (https://msgpack.org/) packb/unpackb
+
+Notes:
+    the msgpack library (C extension) is used when it is installed,
+    otherwise a pure python implementation of the same subset of the
+    format (nil, bool, int, float, str, bin, array, map) is used.
+    default(obj) is called for any other type, like json.dumps(default=).
+'''
+import struct
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class UnpackError(ValueError):
+    pass
+
+
+def packb(data, default=None) -> bytes:
+    if msgpack is not None:
+        return msgpack.packb(data, default=default, use_bin_type=True)
+    chunks = []
+    _pack(data, chunks.append, default)
+    return b''.join(chunks)
+
+
+def unpackb(data: bytes):
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except (ValueError, msgpack.ExtraData) as error:
+            raise UnpackError(str(error))
+    try:
+        value, offset = _unpack(memoryview(data), 0)
+    except (IndexError, TypeError, struct.error, UnicodeDecodeError) as error:
+        raise UnpackError(f'invalid msgpack data: {error}')
+    if offset != len(data):
+        raise UnpackError('extra data after the msgpack object')
+    return value
+
+
+def _pack(obj, write, default):
+    if obj is None:
+        write(b'\xc0')
+    elif obj is True:
+        write(b'\xc3')
+    elif obj is False:
+        write(b'\xc2')
+    elif isinstance(obj, int):
+        _pack_int(obj, write)
+    elif isinstance(obj, float):
+        write(b'\xcb' + struct.pack('>d', obj))
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        size = len(data)
+        if size < 32:
+            write(bytes((0xa0 | size,)))
+        elif size < 0x100:
+            write(struct.pack('>BB', 0xd9, size))
+        elif size < 0x10000:
+            write(struct.pack('>BH', 0xda, size))
+        else:
+            write(struct.pack('>BI', 0xdb, size))
+        write(data)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        size = len(data)
+        if size < 0x100:
+            write(struct.pack('>BB', 0xc4, size))
+        elif size < 0x10000:
+            write(struct.pack('>BH', 0xc5, size))
+        else:
+            write(struct.pack('>BI', 0xc6, size))
+        write(data)
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(len(obj), 0x90, 0xdc, 0xdd, write)
+        for item in obj:
+            _pack(item, write, default)
+    elif isinstance(obj, dict):
+        _pack_header(len(obj), 0x80, 0xde, 0xdf, write)
+        for key, value in obj.items():
+            _pack(key, write, default)
+            _pack(value, write, default)
+    elif default is not None:
+        _pack(default(obj), write, None)
+    else:
+        raise TypeError(f'can not serialize {type(obj).__name__!r} object')
+
+
+def _pack_int(obj, write):
+    if 0 <= obj < 0x80:
+        write(bytes((obj,)))
+    elif -32 <= obj < 0:
+        write(struct.pack('>b', obj))
+    elif 0 <= obj < 0x100:
+        write(struct.pack('>BB', 0xcc, obj))
+    elif 0 <= obj < 0x10000:
+        write(struct.pack('>BH', 0xcd, obj))
+    elif 0 <= obj < 0x100000000:
+        write(struct.pack('>BI', 0xce, obj))
+    elif 0 <= obj < 0x10000000000000000:
+        write(struct.pack('>BQ', 0xcf, obj))
+    elif -0x80 <= obj < 0:
+        write(struct.pack('>Bb', 0xd0, obj))
+    elif -0x8000 <= obj < 0:
+        write(struct.pack('>Bh', 0xd1, obj))
+    elif -0x80000000 <= obj < 0:
+        write(struct.pack('>Bi', 0xd2, obj))
+    elif -0x8000000000000000 <= obj < 0:
+        write(struct.pack('>Bq', 0xd3, obj))
+    else:
+        raise OverflowError('integer out of the msgpack range')
+
+
+def _pack_header(size, fix, code16, code32, write):
+    if size < 16:
+        write(bytes((fix | size,)))
+    elif size < 0x10000:
+        write(struct.pack('>BH', code16, size))
+    else:
+        write(struct.pack('>BI', code32, size))
+
+
+# code -> (struct format, size) of the fixed size values
+_FIXED = {
+    0xca: ('>f', 4), 0xcb: ('>d', 8),
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+}
+# code -> size of the length of str, bin, array and map
+_LENGTH = {
+    0xd9: 1, 0xda: 2, 0xdb: 4,
+    0xc4: 1, 0xc5: 2, 0xc6: 4,
+    0xdc: 2, 0xdd: 4,
+    0xde: 2, 0xdf: 4,
+}
+_LENGTH_FORMAT = {1: '>B', 2: '>H', 4: '>I'}
+
+
+def _unpack(data, offset):
+    code = data[offset]
+    offset += 1
+    if code < 0x80:
+        return code, offset
+    if code >= 0xe0:
+        return code - 0x100, offset
+    if code == 0xc0:
+        return None, offset
+    if code == 0xc2:
+        return False, offset
+    if code == 0xc3:
+        return True, offset
+    if code in _FIXED:
+        fmt, size = _FIXED[code]
+        return struct.unpack_from(fmt, data, offset)[0], offset + size
+    if 0xa0 <= code <= 0xbf:
+        kind, size = 'str', code & 0x1f
+    elif 0x90 <= code <= 0x9f:
+        kind, size = 'array', code & 0x0f
+    elif 0x80 <= code <= 0x8f:
+        kind, size = 'map', code & 0x0f
+    elif code in _LENGTH:
+        length = _LENGTH[code]
+        size = struct.unpack_from(_LENGTH_FORMAT[length], data, offset)[0]
+        offset += length
+        kind = (
+            'str' if code in (0xd9, 0xda, 0xdb) else
+            'bin' if code in (0xc4, 0xc5, 0xc6) else
+            'array' if code in (0xdc, 0xdd) else 'map')
+    else:
+        raise UnpackError(f'unsupported msgpack type 0x{code:02x}')
+
+    if kind in ('str', 'bin'):
+        end = offset + size
+        if end > len(data):
+            raise UnpackError('truncated msgpack data')
+        value = bytes(data[offset:end])
+        return (value.decode('utf-8') if kind == 'str' else value), end
+    if kind == 'array':
+        items = []
+        for _ in range(size):
+            item, offset = _unpack(data, offset)
+            items.append(item)
+        return items, offset
+    items = {}
+    for _ in range(size):
+        key, offset = _unpack(data, offset)
+        items[key], offset = _unpack(data, offset)
+    return items, offset
@@ -0,0 +1,98 @@
+from base64 import b64decode, b64encode
+
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+from .search import SearchFilterBackend, get_search_query
+
+
+class IdCursorPagination(CursorPagination):
+    '''
+    Keyset pagination over the primary key
+
+    Notes:
+        the cursor is opaque (base64) and keep the last id of the page,
+        so the next page is a "WHERE id > last_id ORDER BY id LIMIT n"
+        over the pk index. The cost is the same for the page 1 and
+        the page 100000 (an OFFSET has to walk all the previous rows).
+
+        a search (?q=, api.search) is ordered by relevance, not by id:
+        the response is the best page_size matches, without links.
+    '''
+    ordering = 'id'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not (get_search_query(request) and SearchFilterBackend in getattr(
+                view, 'filter_backends', ())):
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.has_next = self.has_previous = False
+        return list(queryset[:self.page_size])
+
+
+class WorklistPagination(IdCursorPagination):
+    '''
+    Keyset pagination of the worklist (HIGH, then MID, then LOW studies)
+
+    Notes:
+        the cursor keep (urgency_level, last id). A page reads the
+        urgency levels in priority order, each one is a
+        "WHERE urgency_level = ? AND id > ? ORDER BY id LIMIT n" over the
+        (urgency_level, id) index, so a page is at most 3 index seeks
+        for any table size. The worklist is read from the top, so there
+        is no previous link.
+    '''
+    priority = ['HIGH', 'MID', 'LOW']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        urgency, last_id = self.decode_cursor(request)
+        results = []
+        for level in self.priority[self.priority.index(urgency):]:
+            rows = queryset.filter(urgency_level=level)
+            if level == urgency and last_id is not None:
+                rows = rows.filter(id__gt=last_id)
+            limit = self.page_size + 1 - len(results)
+            results += list(rows.order_by('id')[:limit])
+            if len(results) > self.page_size:
+                break
+        page = results[:self.page_size]
+        self.has_next = len(results) > self.page_size
+        self.has_previous = False
+        self.next_position = (
+            (page[-1].urgency_level, page[-1].id) if self.has_next else None)
+        return page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return self.priority[0], None
+        try:
+            urgency, last_id = b64decode(
+                encoded.encode('ascii')).decode('ascii').split(':')
+            last_id = int(last_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if urgency not in self.priority:
+            raise NotFound(self.invalid_cursor_message)
+        return urgency, last_id
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = '{}:{}'.format(*self.next_position)
+        encoded = b64encode(position.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def get_previous_link(self):
+        return None
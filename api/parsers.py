@@ -0,0 +1,40 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from . import renderers
+from .msgpack_codec import UnpackError, unpackb
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    '''
+    JSONParser with orjson (when it is installed and the body is utf-8)
+    '''
+    renderer_class = renderers.FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(BaseParser):
+    '''
+    application/msgpack parser (api.msgpack_codec)
+    '''
+    media_type = 'application/msgpack'
+    renderer_class = renderers.MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpackb(stream.read())
+        except UnpackError as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
@@ -0,0 +1,239 @@
+'''
+Profiling of single requests for the staff users
+
+Notes:
+    ?_profile=cpu (or the header X-Profile: cpu) runs the view and the
+    render of the request under cProfile (deterministic, every call is
+    counted, the python code runs ~2x slower), ?_profile=sample under a
+    sampling thread that reads the stack of the request thread every
+    settings.PROFILE_SAMPLE_INTERVAL seconds (the real timing, the
+    samples are collapsed stacks for flamegraph.pl/speedscope).
+    With the query param the response is the profile (?_profile_output=
+    text, pstats or collapsed), with the header it is the normal
+    response with an X-Profile-Id header. Every profile is kept in the
+    settings.PROFILE_CACHE cache, the last settings.PROFILE_STORE_SIZE
+    of them (GET api/profiles/).
+    Only the users of IsAdminUser can profile: the request is
+    authenticated with the DRF authentication classes before the view,
+    the other users get the normal response.
+'''
+import cProfile
+import datetime
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+MODES = ('cpu', 'sample')
+# output of a profile: content type, modes
+OUTPUTS = {
+    'text': ('text/plain; charset=utf-8', ('cpu',)),
+    'pstats': ('application/octet-stream', ('cpu',)),
+    'collapsed': ('text/plain; charset=utf-8', ('sample',)),
+}
+# functions in the text output
+TEXT_LIMIT = 50
+
+
+def requested(request):
+    '''
+    (mode, from the query param) of a request, (None, False) without one
+    '''
+    mode = request.GET.get('_profile')
+    if mode in MODES:
+        return mode, True
+    mode = request.headers.get('X-Profile')
+    if mode in MODES:
+        return mode, False
+    return None, False
+
+
+def is_staff(request) -> bool:
+    '''
+    IsAdminUser with the DRF authentication (the views authenticate the
+    request again, the tokens are cached). A failed authentication (an
+    invalid token, csrf) is not staff, the view answers it (401/403)
+    '''
+    drf_request = Request(request, authenticators=[
+        authentication()
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return IsAdminUser().has_permission(drf_request, None)
+    except APIException:
+        return False
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    for root in ('site-packages', str(settings.BASE_DIR)):
+        if root in filename:
+            filename = filename.split(root, 1)[1].lstrip(os.sep)
+            break
+    return f'{filename}:{code.co_name}'
+
+
+class Sampler:
+    '''
+    collapsed stacks of a thread, sampled from another thread
+    '''
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return ''.join(
+            f'{stack} {count}\n'
+            for stack, count in sorted(self.samples.items()))
+
+
+class _Stats:
+    # pstats.Stats reads an object with create_stats() and stats
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def text_report(data) -> str:
+    '''
+    pstats report of a cpu profile, by cumulative time
+    '''
+    stream = io.StringIO()
+    stats = pstats.Stats(_Stats(marshal.loads(data)), stream=stream)
+    stats.sort_stats('cumulative').print_stats(TEXT_LIMIT)
+    return stream.getvalue()
+
+
+def profile(mode, function):
+    '''
+    run the function under the profiler of the mode,
+    return (its result, the profile data)
+    '''
+    if mode == 'cpu':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function)
+        profiler.create_stats()
+        return result, marshal.dumps(profiler.stats)
+    with Sampler(settings.PROFILE_SAMPLE_INTERVAL) as sampler:
+        result = function()
+    return result, sampler.collapsed()
+
+
+def output(profile, name):
+    '''
+    (content, content type) of a stored profile in the output name
+    '''
+    if name is None:
+        name = 'text' if profile['mode'] == 'cpu' else 'collapsed'
+    content_type, modes = OUTPUTS.get(name, (None, ()))
+    if profile['mode'] not in modes:
+        return None, None
+    if name == 'text':
+        return text_report(profile['data']), content_type
+    return profile['data'], content_type
+
+
+class ProfileStore:
+    '''
+    the last settings.PROFILE_STORE_SIZE profiles in settings.PROFILE_CACHE
+
+    Notes:
+        an index key keeps the metadata of the profiles (newest first),
+        every profile data is in its own key. Use a shared cache with
+        many workers (locmem is per process).
+    '''
+    index_key = 'profiles:index'
+
+    @property
+    def cache(self):
+        return caches[settings.PROFILE_CACHE]
+
+    @staticmethod
+    def key(profile_id) -> str:
+        return f'profiles:{profile_id}'
+
+    def add(self, request, mode, status, seconds, data) -> dict:
+        '''
+        store a profile, return it (the metadata and the data)
+        '''
+        metadata = {
+            'id': uuid.uuid4().hex[:16],
+            'mode': mode,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': request.user.get_username(),
+            'status': status,
+            'duration_ms': round(seconds * 1000, 2),
+            'created': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(),
+        }
+        profile = dict(metadata, data=data)
+        cache = self.cache
+        cache.set(self.key(metadata['id']), profile, None)
+        index = [metadata] + cache.get(self.index_key, [])
+        for evicted in index[settings.PROFILE_STORE_SIZE:]:
+            cache.delete(self.key(evicted['id']))
+        cache.set(self.index_key, index[:settings.PROFILE_STORE_SIZE], None)
+        return profile
+
+    def list(self) -> list:
+        return self.cache.get(self.index_key, [])
+
+    def get(self, profile_id):
+        return self.cache.get(self.key(profile_id))
+
+
+profiles = ProfileStore()
+
+
+def run_view(mode, view, request, args, kwargs):
+    '''
+    run and render the view under the profiler, store the profile,
+    return (the response, the stored profile)
+    '''
+    def call():
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        return response
+
+    started = time.perf_counter()
+    response, data = profile(mode, call)
+    seconds = time.perf_counter() - started
+    return response, profiles.add(
+        request, mode, response.status_code, seconds, data)
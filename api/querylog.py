@@ -0,0 +1,114 @@
+'''
+Slow query log and N+1 detection (opt-in)
+
+Notes:
+    the queries of a request go through the execute wrapper of
+    api.middleware.count_queries, with a QueryInspector in the request
+    (QueryInspectionMiddleware) every query is also checked:
+    a query slower than settings.SQL_SLOW_QUERY_MS is logged with the
+    view and the line of the project that ran it, and the same
+    normalized sql (the literals and the IN lists replaced) run
+    settings.SQL_N_PLUS_ONE_THRESHOLD times in one request is an N+1,
+    logged once with a stack excerpt. With settings.SQL_N_PLUS_ONE_RAISE
+    (the tests) the request raises NPlusOneDetected at the end.
+    The stack is only read for a logged query.
+'''
+import logging
+import os
+import re
+import traceback
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('debug')
+
+# frames of the project shown in a report
+STACK_EXCERPT_FRAMES = 5
+# the execute wrapper and this module are not the caller
+SKIPPED_FILES = (
+    __file__, os.path.join(os.path.dirname(__file__), 'middleware.py'))
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+class NPlusOneDetected(Exception):
+    pass
+
+
+def normalize(sql) -> str:
+    '''
+    the sql without its literals: the same statement with other values
+    (or another IN list size) is the same string
+    '''
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def project_frames() -> list:
+    '''
+    the frames of the project code (not django, drf or this module),
+    the innermost last
+    '''
+    base_dir = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename not in SKIPPED_FILES]
+
+
+def format_frame(frame) -> str:
+    filename = frame.filename[len(str(settings.BASE_DIR)) + 1:]
+    return f'{filename}:{frame.lineno} in {frame.name}'
+
+
+class QueryInspector:
+    '''
+    the slow queries and the repeated sql of a request
+    '''
+
+    def __init__(self, slow_ms, repeat_threshold):
+        self.slow_seconds = slow_ms / 1000 if slow_ms else None
+        self.repeat_threshold = repeat_threshold
+        self.view = None
+        self.repeated = Counter()
+        # normalized sql -> report of the N+1
+        self.n_plus_one = {}
+
+    def query(self, sql, seconds):
+        if self.slow_seconds is not None and seconds >= self.slow_seconds:
+            frames = project_frames()
+            logger.warning(
+                'slow query (%.1f ms) in %s at %s: %s', seconds * 1000,
+                self.view, format_frame(frames[-1]) if frames else '?',
+                sql)
+        if not self.repeat_threshold:
+            return
+        key = normalize(sql)
+        self.repeated[key] += 1
+        if self.repeated[key] == self.repeat_threshold:
+            frames = project_frames()[-STACK_EXCERPT_FRAMES:]
+            self.n_plus_one[key] = '\n'.join(
+                f'  {format_frame(frame)}: {frame.line}'
+                for frame in frames)
+
+    def report(self, request):
+        '''
+        log the N+1 of the request (raise with SQL_N_PLUS_ONE_RAISE)
+        '''
+        if not self.n_plus_one:
+            return
+        messages = [
+            f'N+1 in {self.view} ({request.method} {request.path}): '
+            f'{self.repeated[key]} times {key}\n{stack}'
+            for key, stack in self.n_plus_one.items()]
+        if settings.SQL_N_PLUS_ONE_RAISE:
+            raise NPlusOneDetected('\n'.join(messages))
+        for message in messages:
+            logger.warning(message)
@@ -0,0 +1,82 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+from .msgpack_codec import packb
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''
+    JSONRenderer with orjson (when it is installed)
+
+    Notes:
+        the output is the same than the JSONRenderer (compact, utf-8,
+        \\u2028/\\u2029 escaped). The types that orjson does not know (or
+        that the drf encoder represent in other way: datetime, decimal,
+        lazy strings, etc.) go to the drf JSONEncoder.default.
+        Indented output (browsable api, ?indent) or an orjson error (like
+        an int of more than 64 bits) use the stdlib JSONRenderer.
+        orjson does not fail with NaN/Infinity, it render null.
+    '''
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if orjson else 0)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        fast = (
+            orjson is not None and indent is None
+            and self.compact and not self.ensure_ascii)
+        if not fast:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=encoders.JSONEncoder().default,
+                option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    '''
+    application/msgpack renderer (api.msgpack_codec)
+
+    the values are the same of the json output, dates, decimals and lazy
+    strings are converted by the drf JSONEncoder.default.
+    '''
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return packb(data, default=encoders.JSONEncoder().default)
+
+
+class PrometheusRenderer(BaseRenderer):
+    '''
+    Prometheus text exposition format (api.metrics)
+
+    Notes:
+        the data is the exported text, the errors (401/403) are rendered
+        as "name: value" lines.
+    '''
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, str):
+            data = ''.join(
+                f'{name}: {value}\n' for name, value in data.items())
+        return data.encode(self.charset)
@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .routers import current_replica
+
+# response headers stored with the content
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Vary')
+
+
+class ResponseCache:
+    '''
+    Cache of rendered GET responses, per patient generation
+
+    Notes:
+        every patient has a generation token in the cache. The key of a
+        response includes the token, so the invalidation of all the
+        responses of a patient (the patient, its studies) is one delete
+        of the token (api.signals on every patient/study write), and the
+        next read starts a new generation. A token is random, an evicted
+        token never brings back old responses.
+        settings.RESPONSE_CACHE is the cache alias, None disables it. The
+        cache must be shared by all the workers: a write in a worker
+        deletes the token of its cache, a locmem cache of another worker
+        keeps serving the old responses (manage.py serve refuses many
+        workers with a locmem response cache).
+        hits/misses are counted per process (metrics()).
+    '''
+
+    def __init__(self, alias=None):
+        # the cache alias, settings.RESPONSE_CACHE by default
+        self.alias = alias
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def cache(self):
+        alias = self.alias or settings.RESPONSE_CACHE
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def generation_key(patient_pk) -> str:
+        return f'response:patient:{patient_pk}:generation'
+
+    def generation(self, patient_pk) -> str:
+        key = self.generation_key(patient_pk)
+        generation = self.cache.get(key)
+        if generation is None:
+            self.cache.add(key, uuid.uuid4().hex, timeout=None)
+            generation = self.cache.get(key)
+        return generation
+
+    def invalidate(self, patient_pks):
+        '''
+        new generation for the patients, now and after the commit
+        (a read between the write and the commit can start a generation
+        with the old rows)
+        '''
+        cache = self.cache
+        if cache is None or not patient_pks:
+            return
+        keys = [self.generation_key(pk) for pk in patient_pks]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+        self._count('invalidations', len(keys))
+
+    def get(self, key):
+        cached = self.cache.get(key)
+        self._count('misses' if cached is None else 'hits')
+        return cached
+
+    def set(self, key, response, timeout=None):
+        headers = {
+            name: response[name] for name in CACHED_HEADERS
+            if response.has_header(name)}
+        self.cache.set(
+            key, (response.content, response['Content-Type'], headers),
+            timeout or settings.RESPONSE_CACHE_TIMEOUT)
+
+    def _count(self, name, value=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': (
+                    round(self.hits / lookups, 4) if lookups else None),
+            }
+
+    def reset_metrics(self):
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+
+
+response_cache = ResponseCache()
+
+
+class ResponseCacheMixin:
+    '''
+    Serve the GETs of a patient (or of its studies) from the ResponseCache
+
+    Notes:
+        must be the first mixin: a hit skips the queries (also the version
+        query of ConditionalGetMixin, the stored ETag is replayed and
+        If-None-Match is still answered with a 304).
+        The key is the view, the full path (url and query string), the
+        negotiated format and the patient generation. The browsable api
+        (html with the user and a csrf token) and the streams are not
+        cached. X-Cache: HIT/MISS in the response.
+        A response read from a replica (api.routers) can be older than
+        the last invalidation, it is kept settings.REPLICA_PIN_SECONDS.
+    '''
+    # url kwarg with the patient pk
+    cache_patient_kwarg = 'patient_pk'
+
+    def get(self, request, *args, **kwargs):
+        if (response_cache.cache is None
+                or request.accepted_renderer.format == 'api'):
+            return super().get(request, *args, **kwargs)
+        generation = response_cache.generation(
+            self.kwargs[self.cache_patient_kwarg])
+        key = 'response:' + hashlib.md5('|'.join((
+            type(self).__name__,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            generation)).encode()).hexdigest()
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            content, content_type, headers = cached
+            response = HttpResponse(content, content_type=content_type)
+            for name, value in headers.items():
+                response[name] = value
+            response['X-Cache'] = 'HIT'
+            return get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    headers.get('Last-Modified', '')),
+                response=response)
+
+        response = super().get(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        timeout = (
+            settings.REPLICA_PIN_SECONDS if current_replica() else None)
+        if isinstance(response, Response) and response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: response_cache.set(key, rendered, timeout))
+        return response
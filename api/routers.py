@@ -0,0 +1,189 @@
+import contextvars
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('debug')
+
+# apps whose reads can go to a replica (patients, studies, catalogs, stats)
+REPLICA_APPS = ('api',)
+
+# the replica of the current request, set during the safe requests of
+# a client without a recent write (api.middleware.ReplicaRoutingMiddleware)
+_replica = contextvars.ContextVar('replica', default=None)
+
+
+class ReplicaChoice:
+    '''
+    one replica for all the reads of a request (chosen on the first one)
+    '''
+    _unset = object()
+
+    def __init__(self):
+        self._alias = self._unset
+
+    @property
+    def alias(self):
+        if self._alias is self._unset:
+            self._alias = replicas.choose()
+        return self._alias
+
+    @property
+    def chosen(self):
+        return None if self._alias is self._unset else self._alias
+
+
+@contextmanager
+def read_from_replicas(enabled=True):
+    token = _replica.set(ReplicaChoice() if enabled else None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def current_replica():
+    '''
+    the replica read by the current request (or None)
+    '''
+    choice = _replica.get()
+    return None if choice is None else choice.chosen
+
+
+class ReplicaSet:
+    '''
+    Round robin over the healthy replicas of settings.DATABASE_REPLICAS
+
+    Notes:
+        a replica is checked when its connection is opened (once per
+        request and thread, the connections are closed at the end of the
+        request). A replica that can not connect is skipped for
+        settings.REPLICA_RETRY_SECONDS (per process); without healthy
+        replicas the reads go to the primary.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._down = {}
+
+    def choose(self):
+        '''
+        alias of a healthy replica (or None)
+        '''
+        aliases = settings.DATABASE_REPLICAS
+        now = time.monotonic()
+        for _ in range(len(aliases)):
+            alias = aliases[next(self._counter) % len(aliases)]
+            if self._down.get(alias, 0) > now:
+                continue
+            if connections[alias].connection is not None or self.probe(
+                    alias):
+                return alias
+        return None
+
+    def probe(self, alias) -> bool:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError as error:
+            self.mark_down(alias, error)
+            return False
+        return True
+
+    def mark_down(self, alias, error=None):
+        logger.warning(
+            'replica %s is down for %ss: %s',
+            alias, settings.REPLICA_RETRY_SECONDS, error)
+        with self._lock:
+            self._down[alias] = (
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS)
+
+    def down(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                alias for alias, until in self._down.items() if until > now]
+
+    def reset(self):
+        with self._lock:
+            self._down.clear()
+
+
+replicas = ReplicaSet()
+
+
+class ReplicaPins:
+    '''
+    Read-your-writes: a client that wrote reads from the primary during
+    settings.REPLICA_PIN_SECONDS (the replication lag must be lower)
+
+    Notes:
+        the client is the Authorization header, or the session cookie,
+        or the ip. The pins are kept in the settings.REPLICA_PIN_CACHE
+        cache (use a shared cache with many workers).
+    '''
+
+    @property
+    def cache(self):
+        return caches[settings.REPLICA_PIN_CACHE]
+
+    @staticmethod
+    def key(request) -> str:
+        client = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get('REMOTE_ADDR', ''))
+        return 'replica:pin:' + hashlib.md5(client.encode()).hexdigest()
+
+    def pin(self, request):
+        self.cache.set(
+            self.key(request), True, settings.REPLICA_PIN_SECONDS)
+
+    def is_pinned(self, request) -> bool:
+        return self.cache.get(self.key(request), False)
+
+
+pins = ReplicaPins()
+
+
+class ReplicaRouter:
+    '''
+    Reads of the api models to a replica, everything else to the primary
+
+    Notes:
+        only the reads of a safe request (GET, HEAD, OPTIONS) of a client
+        without a recent write go to the replicas, the management
+        commands, the writes and the reads of a write request use the
+        primary. Without settings.DATABASE_REPLICAS the router does nothing.
+    '''
+
+    def db_for_read(self, model, **hints):
+        choice = _replica.get()
+        if (choice is None
+                or not settings.DATABASE_REPLICAS
+                or model._meta.app_label not in REPLICA_APPS):
+            return None
+        return choice.alias
+
+    def db_for_write(self, model, **hints):
+        if settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if settings.DATABASE_REPLICAS:
+            # the replicas have the same rows than the primary
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,184 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Patient, Study
+
+# model -> searchable columns (the order of the fts columns)
+SEARCH_FIELDS = {
+    Patient: ('first_name', 'last_name', 'email'),
+    Study: ('description',),
+}
+
+
+def search_terms(query: str) -> list:
+    '''
+    words of the user query (the fts syntax is never passed through)
+    '''
+    return re.findall(r'\w+', query)
+
+
+class SearchBackend:
+    '''
+    Full text search of a queryset, see SEARCH_FIELDS
+    '''
+
+    def search(self, queryset, query: str):
+        '''
+        queryset filtered by the query and ordered by relevance
+        '''
+        raise NotImplementedError
+
+
+class ContainsSearchBackend(SearchBackend):
+    '''
+    Portable fallback: every word is a prefix (icontains) of some field.
+    there is no index and no relevance, the results are ordered by id.
+    '''
+
+    def search(self, queryset, query):
+        fields = SEARCH_FIELDS[queryset.model]
+        for term in search_terms(query):
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset.order_by('id')
+
+
+class SQLiteFTSBackend(SearchBackend):
+    '''
+    SQLite FTS5 search
+
+    Notes:
+        every model has a "<table>_fts" external content fts5 table (only
+        the index, the text stays in the model table) with a prefix index,
+        kept in sync by triggers, so bulk_create and raw sql writes are
+        indexed too. The query is joined with the fts table (rowid = id)
+        and ordered by the bm25 rank.
+
+        sqlite drops the triggers when django rebuilds a table in a
+        migration (AlterField, etc.), run "manage.py rebuild_search_index"
+        after those migrations.
+    '''
+
+    @staticmethod
+    def fts_table(model) -> str:
+        return f'{model._meta.db_table}_fts'
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        table = queryset.model._meta.db_table
+        fts = self.fts_table(queryset.model)
+        return queryset.extra(
+            tables=[fts],
+            where=[f'"{fts}".rowid = "{table}"."id"', f'"{fts}" MATCH %s'],
+            params=[match],
+            select={'search_rank': f'"{fts}".rank'},
+        ).order_by('search_rank', 'id')
+
+    @classmethod
+    def install(cls, schema_editor, rebuild=True):
+        '''
+        create (if not exists) the fts tables and triggers,
+        and rebuild the indexes from the model tables.
+        '''
+        for model, fields in SEARCH_FIELDS.items():
+            table = model._meta.db_table
+            fts = cls.fts_table(model)
+            columns = ', '.join(fields)
+            new = ', '.join(f'new.{field}' for field in fields)
+            old = ', '.join(f'old.{field}' for field in fields)
+            statements = [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{columns}, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', "
+                f"prefix='2 3 4')",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert "
+                f"AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); "
+                f"END",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete "
+                f"AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old}); "
+                f"END",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update "
+                f"AFTER UPDATE OF {columns} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old}); "
+                f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); "
+                f"END",
+            ]
+            if rebuild:
+                statements.append(
+                    f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    @classmethod
+    def uninstall(cls, schema_editor):
+        for model in SEARCH_FIELDS:
+            fts = cls.fts_table(model)
+            for suffix in ('insert', 'delete', 'update'):
+                schema_editor.execute(
+                    f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+def get_search_backend() -> SearchBackend:
+    '''
+    settings.SEARCH_BACKEND, or the best backend for the database
+    '''
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return ContainsSearchBackend()
+
+
+def get_search_query(request) -> str:
+    '''
+    the ?q= of the request ('' when it is not a search)
+    '''
+    param = SearchFilterBackend.search_param
+    return request.query_params.get(param, '').strip()
+
+
+class SearchFilterBackend(BaseFilterBackend):
+    '''
+    ?q=john smi  full text search (every word or word prefix, ordered by
+    relevance)
+
+    Notes:
+        must be the last filter backend (it sets the ordering). The
+        cursor pagination returns the best page_size results of a search
+        (api.pagination.IdCursorPagination).
+    '''
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = get_search_query(request)
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
+
+    def get_schema_fields(self, view):
+        assert coreapi is not None, 'coreapi must be installed'
+        assert coreschema is not None, 'coreschema must be installed'
+        return [
+            coreapi.Field(
+                name=self.search_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(
+                    title='search',
+                    description='words (or word prefixes) to search'))]
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from . import catalogs
+from .bulk import bulk_create
 from .models import BodyPart, Patient, Study, Type
 
 
@@ -13,6 +15,29 @@ class PatientSerializer(serializers.ModelSerializer):
         }
 
 
+class CatalogChoiceField(serializers.ChoiceField):
+    '''
+    Choice field for a catalog foreign key (body_part, type)
+
+    notes:
+        the representation read the <field>_id attribute and translate it
+        with the in-memory catalog (api.catalogs), so the related object
+        is never fetched from the db.
+    '''
+
+    def __init__(self, catalog, **kwargs):
+        self.catalog = catalog
+        super().__init__(choices=[], **kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, value):
+        if value is None:
+            return None
+        return self.catalog.name_of(value)
+
+
 class StudySerializer(serializers.ModelSerializer):
     '''
     Study serializer (for list and create)
@@ -31,8 +56,8 @@ class StudySerializer(serializers.ModelSerializer):
         for saving works properly  the trick is override the validation_**
         and return the object for the user input value
     '''
-    body_part = serializers.ChoiceField(choices=[])
-    type = serializers.ChoiceField(choices=[])
+    body_part = CatalogChoiceField(catalogs.body_parts)
+    type = CatalogChoiceField(catalogs.types)
 
     class Meta:
         model = Study
@@ -42,8 +67,7 @@ class StudySerializer(serializers.ModelSerializer):
         """
         Check that value is in body_part catalog.
         """
-        print('validate', value)
-        if obj := BodyPart.objects.filter(name=value).first():
+        if obj := catalogs.body_parts.get(value):
             return obj
         raise serializers.ValidationError(
             f"{value} is not in body parts catalog")
@@ -52,7 +76,7 @@ class StudySerializer(serializers.ModelSerializer):
         """
         Check that value is in type catalog
         """
-        if obj := Type.objects.filter(name=value).first():
+        if obj := catalogs.types.get(value):
             return obj
         raise serializers.ValidationError(
             f"{value} is not in types catalog")
@@ -62,10 +86,13 @@ class StudySerializer(serializers.ModelSerializer):
         Notes:
             lazy load of body_parts and types catalogs
             this is for show the catalog in the /api-docs/ page
+
+            the catalogs come from the in-memory registry (api.catalogs),
+            so building the serializer does not touch the db.
         '''
         super().__init__(*args, **kwargs)
-        body_parts = BodyPart.objects.all().values_list('name', flat=True)
-        types = Type.objects.all().values_list('name', flat=True)
+        body_parts = catalogs.body_parts.names()
+        types = catalogs.types.names()
         self.fields['body_part'].choices = body_parts
         self.fields['type'].choices = types
         self.fields['body_part'].help_text = str([item for item in body_parts])
@@ -81,3 +108,48 @@ class StudyUpdateSerializer(StudySerializer):
     class Meta:
         model = Study
         exclude = ['patient']
+
+
+class StudyBulkListSerializer(serializers.ListSerializer):
+    '''
+    Insert all the studies of a bulk post in one transaction
+    '''
+
+    def create(self, validated_data):
+        return bulk_create(Study, [Study(**item) for item in validated_data])
+
+
+class StudyBulkSerializer(StudySerializer):
+    '''
+    Study serializer (for bulk create)
+
+    notes:
+        the patient comes from the url, so it is read only and it is
+        validated once for the whole array, not once per study.
+    '''
+    class Meta:
+        model = Study
+        fields = '__all__'
+        read_only_fields = ['patient']
+        list_serializer_class = StudyBulkListSerializer
+
+
+class StudyWorklistSerializer(StudySerializer):
+    '''
+    Study serializer (for the worklist)
+
+    notes:
+        the patient name is embedded, the view select_related the patient.
+    '''
+    patient_first_name = serializers.CharField(
+        source='patient.first_name', read_only=True)
+    patient_last_name = serializers.CharField(
+        source='patient.last_name', read_only=True)
+
+    class Meta:
+        model = Study
+        fields = [
+            'id', 'urgency_level', 'body_part', 'type', 'description',
+            'patient', 'patient_first_name', 'patient_last_name',
+            'updated_at']
+        read_only_fields = fields
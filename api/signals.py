@@ -1,10 +1,19 @@
 import logging
+from collections import Counter
 
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
 
+from . import stats
+from .authentication import token_cache
+from .bulk import post_bulk_create
+from .catalogs import CATALOGS
+from .models import BodyPart, Patient, Study, Type
+from .response_cache import response_cache
+
 logger = logging.getLogger('debug')
 
 User = get_user_model()
@@ -18,3 +27,112 @@ def signal_create_token(sender, instance, created, raw, **kwargs):
     if created and not raw:
         token = Token.objects.create(user=instance)
         logger.info(f'Token {token.key} for {instance.username}')
+
+
+@receiver([post_save, post_delete], sender=Token)
+def signal_invalidate_token(sender, instance, **kwargs):
+    '''
+    Remove the token from the auth cache (api.authentication).
+    '''
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def signal_invalidate_user_tokens(sender, instance, created, raw, **kwargs):
+    '''
+    Remove the tokens of the user from the auth cache, the cached
+    user (is_active, is_staff, etc.) is not valid anymore.
+    (the delete of a user cascade to the token, see signal_invalidate_token)
+    '''
+    if created or raw:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list(
+            'key', flat=True):
+        token_cache.delete(key)
+
+
+@receiver([post_save, post_delete], sender=BodyPart)
+@receiver([post_save, post_delete], sender=Type)
+def signal_invalidate_catalog(sender, **kwargs):
+    '''
+    Reload the in-memory catalog (api.catalogs) when one of its rows change.
+    '''
+    CATALOGS[sender].invalidate()
+
+
+def _stored_cell(study):
+    return Study.objects.filter(pk=study.pk).values_list(
+        *stats.CELL_FIELDS).first()
+
+
+@receiver(pre_save, sender=Study)
+def signal_study_old_cell(sender, instance, raw, **kwargs):
+    '''
+    Read the counter cell (api.stats) of the study before an update,
+    from the db (the instance can be stale), in the save transaction.
+    '''
+    instance._stats_cell = None
+    if not raw and not instance._state.adding:
+        instance._stats_cell = _stored_cell(instance)
+
+
+@receiver(post_save, sender=Study)
+def signal_count_saved_study(sender, instance, raw, **kwargs):
+    '''
+    Update the study counters (api.stats), in the transaction of the save
+    (api.models.Study.save). A raw save (loaddata) is not counted, see
+    "manage.py rebuild_study_stats".
+    '''
+    if raw:
+        return
+    deltas = Counter({stats.study_cell(instance): 1})
+    old_cell = getattr(instance, '_stats_cell', None)
+    if old_cell is not None:
+        deltas[old_cell] -= 1
+    stats.count_studies(deltas)
+
+
+@receiver(pre_delete, sender=Study)
+def signal_count_deleted_study(sender, instance, **kwargs):
+    '''
+    Update the study counters with the stored cell of the study
+    (the collector sends it inside the delete transaction).
+    '''
+    cell = _stored_cell(instance)
+    if cell is not None:
+        stats.count_studies(Counter({cell: -1}))
+
+
+@receiver(post_bulk_create, sender=Study)
+def signal_count_bulk_studies(sender, objects, **kwargs):
+    '''
+    Update the study counters for a bulk insert (api.bulk.bulk_create).
+    '''
+    stats.count_studies(Counter(map(stats.study_cell, objects)))
+
+
+@receiver([post_save, post_delete], sender=Patient)
+def signal_invalidate_patient_responses(sender, instance, **kwargs):
+    '''
+    New generation for the cached responses of the patient
+    (api.response_cache).
+    '''
+    response_cache.invalidate([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Study)
+def signal_invalidate_study_responses(sender, instance, **kwargs):
+    '''
+    New generation for the cached responses of the patient of the study.
+    '''
+    patient_pks = {instance.patient_id}
+    old_cell = getattr(instance, '_stats_cell', None)
+    if old_cell is not None:
+        # the study moved to another patient
+        patient_pks.add(old_cell[0])
+    response_cache.invalidate(patient_pks)
+
+
+@receiver(post_bulk_create, sender=Study)
+def signal_invalidate_bulk_study_responses(sender, objects, **kwargs):
+    response_cache.invalidate({study.patient_id for study in objects})
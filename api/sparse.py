@@ -0,0 +1,81 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    '''
+    Sparse fieldsets for the GETs: ?fields=id,type and/or ?exclude=description
+
+    Notes:
+        the fields are removed from the serializer, and the queryset is
+        narrowed to the columns of the remaining fields with .only()
+        (the FastListMixin use the same columns in values()), so a
+        smaller response also read less from the db.
+        The representation of body_part/type come from the catalogs
+        (api.catalogs), so the select_related joins are dropped.
+        The writes (POST/PUT/PATCH) always use all the fields.
+    '''
+    fields_param = 'fields'
+    exclude_param = 'exclude'
+
+    def get_sparse_fields(self):
+        '''
+        list of the field names to keep, None for all
+        '''
+        if self.request is None or self.request.method not in (
+                'GET', 'HEAD'):
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        params = self.request.query_params
+        if not {self.fields_param, self.exclude_param} & set(params):
+            return None
+        names = list(super().get_serializer().fields)
+        keep = names
+        errors = {}
+        for param in (self.fields_param, self.exclude_param):
+            if param not in params:
+                continue
+            values = [
+                value.strip() for value in params[param].split(',')
+                if value.strip()]
+            unknown = [value for value in values if value not in names]
+            if unknown:
+                errors[param] = [f'Unknown fields: {", ".join(unknown)}.']
+            elif param == self.fields_param:
+                keep = [name for name in keep if name in values]
+            else:
+                keep = [name for name in keep if name not in values]
+        if errors:
+            raise ValidationError(errors)
+        return keep
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in list(fields):
+                if name not in names:
+                    del fields[name]
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        names = self.get_sparse_fields()
+        if names is None:
+            return queryset
+        model = queryset.model
+        fields = super().get_serializer().fields
+        columns = {model._meta.pk.name}
+        for name in names:
+            try:
+                model._meta.get_field(fields[name].source)
+            except FieldDoesNotExist:
+                # not a column (method field, etc.), load the whole row
+                return queryset
+            columns.add(fields[name].source)
+        return queryset.select_related(None).only(*columns)
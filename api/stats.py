@@ -0,0 +1,140 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from . import catalogs
+from .models import PatientStudyCount, Study, StudyCount
+
+# a counter cell of a study
+CELL_FIELDS = ('patient_id', 'type_id', 'body_part_id', 'urgency_level')
+
+
+def study_cell(study) -> tuple:
+    return tuple(getattr(study, field) for field in CELL_FIELDS)
+
+
+def count_studies(deltas: Counter):
+    '''
+    add the deltas ({cell: +n/-n}, see study_cell) to the counters
+
+    Notes:
+        one upsert (INSERT ... ON CONFLICT DO UPDATE SET count = count + n)
+        per counters table with all the cells, so a bulk of 1000 studies
+        cost the same 2 queries than one study. Must run in the
+        transaction of the study write (api.signals).
+    '''
+    per_patient = Counter()
+    overall = Counter()
+    for cell, delta in deltas.items():
+        per_patient[cell] += delta
+        overall[cell[1:]] += delta
+    _upsert(PatientStudyCount, CELL_FIELDS, per_patient)
+    _upsert(StudyCount, CELL_FIELDS[1:], overall)
+
+
+def _upsert(model, columns, deltas: Counter):
+    rows = [(*cell, delta) for cell, delta in deltas.items() if delta]
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    count = quote('count')
+    names = ', '.join(quote(column) for column in columns)
+    values = ', '.join(['%s'] * (len(columns) + 1))
+    if connection.vendor == 'mysql':
+        conflict = (
+            f'ON DUPLICATE KEY UPDATE {count} = {count} + VALUES({count})')
+    else:
+        conflict = (
+            f'ON CONFLICT ({names}) '
+            f'DO UPDATE SET {count} = {table}.{count} + excluded.{count}')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} ({names}, {count}) VALUES ({values}) '
+            f'{conflict}', rows)
+
+
+def study_stats(patient_id: int = None) -> dict:
+    '''
+    number of studies (all or of a patient) by type, body_part and
+    urgency_level, from the counters (at most types x body_parts x 3 rows)
+    '''
+    if patient_id is None:
+        counts = StudyCount.objects.all()
+    else:
+        counts = PatientStudyCount.objects.filter(patient_id=patient_id)
+    stats = {
+        'total': 0,
+        'type': dict.fromkeys(catalogs.types.names(), 0),
+        'body_part': dict.fromkeys(catalogs.body_parts.names(), 0),
+        'urgency_level': dict.fromkeys(
+            (key for key, _ in Study.URGENCIES), 0),
+    }
+    type_names = catalogs.types.id_names()
+    body_part_names = catalogs.body_parts.id_names()
+    for type_id, body_part_id, urgency_level, count in counts.values_list(
+            'type_id', 'body_part_id', 'urgency_level', 'count'):
+        stats['total'] += count
+        stats['type'][type_names[type_id]] += count
+        stats['body_part'][body_part_names[body_part_id]] += count
+        stats['urgency_level'][urgency_level] += count
+    return stats
+
+
+def computed_counts() -> Counter:
+    '''
+    {cell: studies} computed from the study table (GROUP BY)
+    '''
+    cells = Study.objects.values(*CELL_FIELDS).annotate(
+        total=Count('id')).order_by()
+    return Counter({
+        tuple(cell[field] for field in CELL_FIELDS): cell['total']
+        for cell in cells})
+
+
+def stored_counts() -> tuple:
+    '''
+    ({cell: count}, {cell without patient: count}) of the counters,
+    without the zeros
+    '''
+    per_patient = Counter({
+        row[:-1]: row[-1] for row in
+        PatientStudyCount.objects.exclude(count=0).values_list(
+            *CELL_FIELDS, 'count')})
+    overall = Counter({
+        row[:-1]: row[-1] for row in
+        StudyCount.objects.exclude(count=0).values_list(
+            *CELL_FIELDS[1:], 'count')})
+    return per_patient, overall
+
+
+def verify() -> list:
+    '''
+    differences between the counters and the study table
+    [(table, cell, stored, computed)], empty if they are right
+    '''
+    computed = computed_counts()
+    computed_overall = Counter()
+    for cell, total in computed.items():
+        computed_overall[cell[1:]] += total
+    per_patient, overall = stored_counts()
+    differences = []
+    for model, stored, expected in (
+            (PatientStudyCount, per_patient, computed),
+            (StudyCount, overall, computed_overall)):
+        for cell in sorted(set(stored) | set(expected), key=str):
+            if stored[cell] != expected[cell]:
+                differences.append((
+                    model._meta.db_table, cell, stored[cell], expected[cell]))
+    return differences
+
+
+def rebuild():
+    '''
+    recompute all the counters from the study table
+    '''
+    with transaction.atomic():
+        PatientStudyCount.objects.all().delete()
+        StudyCount.objects.all().delete()
+        count_studies(computed_counts())
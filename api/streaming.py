@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils import encoders
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class StreamingListMixin:
+    '''
+    Opt-in streaming mode for the list views (?stream=true)
+
+    Notes:
+        the paginated list build the whole page (serializer.data) and the
+        JSONRenderer build one big bytes object. In streaming mode the
+        whole (filtered) queryset is read with .iterator(chunk_size=...),
+        every row is serialized with the same serializer instance and the
+        json array is sent in pieces with a StreamingHttpResponse.
+        The memory and the time to first byte do not depend on the
+        number of rows.
+        With a FastListMixin in the view the rows are values() dicts
+        serialized by the RowSerializer (api.fast).
+        The async views (api.aio) answer ?stream=true with a 400: django
+        3.2 iterates a stream in the event loop, where the orm can not
+        run, and buffering it would lose the bounded memory.
+    '''
+    stream_param = 'stream'
+    # False in the async views (api.aio)
+    stream_allowed = True
+
+    def is_streaming(self, request) -> bool:
+        streaming = request.query_params.get(
+            self.stream_param, '').lower() in TRUE_VALUES
+        if streaming and not self.stream_allowed:
+            raise ValidationError({
+                self.stream_param: 'not available on the async views '
+                                   '(asgi), use the cursor pagination'})
+        return streaming
+
+    def list(self, request, *args, **kwargs):
+        if self.is_streaming(request):
+            return self.stream_list(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def stream_list(self, queryset):
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        to_representation = self.get_serializer().to_representation
+        row_serializer = getattr(self, 'get_row_serializer', lambda: None)()
+        if row_serializer is not None:
+            queryset = queryset.values(*row_serializer.columns)
+            to_representation = row_serializer.bind()
+        encoder = encoders.JSONEncoder(
+            ensure_ascii=False, separators=(',', ':'))
+
+        def content():
+            yield b'['
+            buffer = []
+            rows = queryset.iterator(chunk_size=chunk_size)
+            for index, obj in enumerate(rows):
+                data = encoder.encode(to_representation(obj))
+                buffer.append(',' + data if index else data)
+                if len(buffer) >= chunk_size:
+                    yield self.encode_chunk(buffer)
+                    buffer = []
+            buffer.append(']')
+            yield self.encode_chunk(buffer)
+
+        return StreamingHttpResponse(
+            content(), content_type='application/json')
+
+    def encode_chunk(self, buffer: list) -> bytes:
+        # same escapes than rest_framework.renderers.JSONRenderer
+        data = ''.join(buffer)
+        data = data.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return data.encode()
@@ -1,2 +1,26 @@
 from .tests_patients import *
 from .tests_studies import *
+from .tests_catalogs import *
+from .tests_query_budget import *
+from .tests_pagination import *
+from .tests_import import *
+from .tests_streaming import *
+from .tests_conditional import *
+from .tests_authentication import *
+from .tests_fast import *
+from .tests_renderers import *
+from .tests_sparse import *
+from .tests_filters import *
+from .tests_worklist import *
+from .tests_search import *
+from .tests_stats import *
+from .tests_response_cache import *
+from .tests_aio import *
+from .tests_warmup import *
+from .tests_routers import *
+from .tests_db import *
+from .tests_seed import *
+from .tests_benchmarks import *
+from .tests_metrics import *
+from .tests_querylog import *
+from .tests_profiling import *
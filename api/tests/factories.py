@@ -20,7 +20,7 @@ class StudyFactory(DjangoModelFactory):
         model = Study
 
     patient = factory.Iterator(Patient.objects.all())
-    urgency_level = factory.Iterator(Study.URGENCIES)
+    urgency_level = factory.Iterator([key for key, _ in Study.URGENCIES])
     body_part = factory.Iterator(BodyPart.objects.all())
     description = factory.Faker('text')
     type = factory.Iterator(Type.objects.all())
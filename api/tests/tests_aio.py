@@ -0,0 +1,87 @@
+from api.aio import AsyncReadView
+from api.views import PatientListCreateView, PatientRetrieveUpdateDestroyView
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory, APITransactionTestCase
+
+from .factories import PatientFactory
+
+User = get_user_model()
+
+
+# the pool threads have their own db connections, the rows must be
+# committed (TransactionTestCase)
+@override_settings(RESPONSE_CACHE=None)
+class AsyncReadViewTests(APITransactionTestCase):
+    serialized_rollback = True
+
+    def setUp(self):
+        admin = User.objects.create(
+            username='test', is_superuser=True, is_staff=True,
+            is_active=True)
+        user = User.objects.create(username='user', is_active=True)
+        self.admin_token = Token.objects.get(user=admin).key
+        self.user_token = Token.objects.get(user=user).key
+        self.patients = PatientFactory.create_batch(3)
+
+    def get(self, view_class, token=None, **kwargs):
+        url = '/api/patients/'
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        sync_response = view_class.as_view()(
+            APIRequestFactory().get(url, **headers), **kwargs)
+        sync_response.render()
+        # the AsyncRequestFactory extra are headers
+        headers = {'authorization': f'Token {token}'} if token else {}
+        request = AsyncRequestFactory().get(url, **headers)
+        response = async_to_sync(AsyncReadView.as_view(view_class))(
+            request, **kwargs)
+        response.render()
+        self.assertEqual(response.status_code, sync_response.status_code)
+        self.assertEqual(response.content, sync_response.content)
+        return request, response
+
+    def test_same_response(self):
+        """
+        Ensure the async views return the same than the sync views
+        """
+        request, response = self.get(PatientListCreateView, self.admin_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        # the queries of the pool thread are counted
+        self.assertGreaterEqual(request.query_count, 1)
+        _, response = self.get(
+            PatientRetrieveUpdateDestroyView, self.admin_token,
+            pk=self.patients[0].id)
+        self.assertEqual(response.data['id'], self.patients[0].id)
+
+    def test_same_auth(self):
+        """
+        Ensure the async views authenticate and check the permissions
+        """
+        _, response = self.get(PatientListCreateView)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        _, response = self.get(PatientListCreateView, 'wrong')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        _, response = self.get(PatientListCreateView, self.user_token)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stream_rejected(self):
+        """
+        Ensure the async views do not buffer a streamed list
+        """
+        request = AsyncRequestFactory().get(
+            '/api/patients/?stream=true',
+            authorization=f'Token {self.admin_token}')
+        response = async_to_sync(AsyncReadView.as_view(
+            PatientListCreateView))(request)
+        response.render()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('stream', response.data)
+        # the sync view still streams
+        response = PatientListCreateView.as_view()(APIRequestFactory().get(
+            '/api/patients/', {'stream': 'true'},
+            HTTP_AUTHORIZATION=f'Token {self.admin_token}'))
+        self.assertTrue(response.streaming)
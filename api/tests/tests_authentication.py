@@ -0,0 +1,138 @@
+from unittest import mock
+
+from api.authentication import TTLCache, token_cache
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+def _token_queries(queries) -> list:
+    return [
+        query['sql'] for query in queries
+        if 'FROM "authtoken_token"' in query['sql']]
+
+
+@override_settings(TOKEN_CACHE=None, TOKEN_CACHE_LOCAL=True)
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='test',
+                                        is_superuser=True,
+                                        is_staff=True,
+                                        is_active=True)
+        self.token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('patient_list_create')
+
+    def test_cached_token(self):
+        """
+        Ensure an authenticated request does not query the token twice
+        """
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(_token_queries(context.captured_queries), [])
+
+    def test_user_invalidation(self):
+        """
+        Ensure a change in the user is seen by the next request
+        """
+        self.client.get(self.url, format='json')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_invalidation(self):
+        """
+        Ensure a deleted token is not valid anymore
+        """
+        self.client.get(self.url, format='json')
+        self.token.delete()
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unknown_token(self):
+        """
+        Ensure an unknown token is not cached
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token unknown')
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(token_cache.get('unknown'))
+
+    @override_settings(TOKEN_CACHE_LOCAL=False)
+    def test_without_cache(self):
+        """
+        Ensure the token is read in every request without a cache
+        """
+        self.client.get(self.url, format='json')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(_token_queries(context.captured_queries)), 1)
+
+    def test_serve_refuses_per_process_cache(self):
+        """
+        Ensure serve does not start many workers with a token cache per
+        process
+        """
+        with self.assertRaisesMessage(CommandError, 'TOKEN_CACHE_LOCAL'):
+            call_command('serve', '--workers', '2', '--no-warmup')
+        with override_settings(TOKEN_CACHE='default'):
+            with self.assertRaisesMessage(CommandError, 'TOKEN_CACHE'):
+                call_command('serve', '--workers', '2', '--no-warmup')
+
+    @override_settings(TOKEN_CACHE='default')
+    def test_shared_cache(self):
+        """
+        Ensure the shared cache is used and invalidated
+        """
+        cache.clear()
+        self.client.get(self.url, format='json')
+        self.assertIsNotNone(cache.get(token_cache.prefix + self.token.key))
+        self.user.is_staff = False
+        self.user.save()
+        self.assertIsNone(cache.get(token_cache.prefix + self.token.key))
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TTLCacheTests(SimpleTestCase):
+
+    def test_max_size(self):
+        """
+        Ensure the least recently used keys are evicted
+        """
+        ttl_cache = TTLCache(max_size=2, ttl=60)
+        ttl_cache.set('a', 1)
+        ttl_cache.set('b', 2)
+        ttl_cache.get('a')
+        ttl_cache.set('c', 3)
+        self.assertEqual(len(ttl_cache), 2)
+        self.assertIsNone(ttl_cache.get('b'))
+        self.assertEqual(ttl_cache.get('a'), 1)
+
+    def test_ttl(self):
+        """
+        Ensure the expired keys are not returned
+        """
+        ttl_cache = TTLCache(max_size=2, ttl=60)
+        with mock.patch('api.authentication.time.monotonic', return_value=0):
+            ttl_cache.set('a', 1)
+        with mock.patch('api.authentication.time.monotonic', return_value=61):
+            self.assertIsNone(ttl_cache.get('a'))
@@ -0,0 +1,23 @@
+from api import benchmarks
+from django.test import TestCase
+
+
+class BenchmarkSuiteTests(TestCase):
+
+    def test_run_cases(self):
+        """
+        Ensure every case runs and is timed
+        """
+        results = benchmarks.run(sizes=(2,), repeat=1, min_time=0.001)
+        self.assertEqual(sorted(results), sorted(benchmarks.case_names((2,))))
+        self.assertTrue(all(seconds > 0 for seconds in results.values()))
+
+    def test_compare_with_baseline(self):
+        """
+        Ensure only the cases slower than the threshold are regressions
+        """
+        baseline = {'a': 1.0, 'b': 1.0, 'c': 1.0}
+        results = {'a': 1.1, 'b': 1.5, 'c': 0.5, 'new': 9.0}
+        self.assertEqual(
+            benchmarks.compare(baseline, results, threshold=0.2),
+            [('b', 1.0, 1.5, 0.5)])
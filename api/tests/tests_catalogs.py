@@ -0,0 +1,135 @@
+from unittest import mock
+
+from api import catalogs
+from api.models import BodyPart
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+def _catalog_queries(queries) -> list:
+    return [
+        query['sql'] for query in queries
+        if 'FROM "body_part"' in query['sql'] or 'FROM "type"' in query['sql']]
+
+
+class CatalogTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        StudyFactory(patient=self.patient1)
+        catalogs.body_parts.invalidate()
+        catalogs.types.invalidate()
+
+    def test_create_and_list_without_catalog_queries(self):
+        """
+        Ensure a warm catalog is not queried in study create and list
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        catalogs.body_parts.names()
+        catalogs.types.names()
+        data = {
+            'urgency_level': 'LOW',
+            'body_part': 'NECK',
+            'description': 'NO FINDINGS',
+            'type': 'XRAY'}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data, format='json')
+            self.assertEqual(
+                response.status_code, status.HTTP_201_CREATED, response.data)
+            response = self.client.get(url, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(_catalog_queries(context.captured_queries), [])
+        self.assertEqual(response.data['results'][-1]['body_part'], 'NECK')
+        self.assertEqual(response.data['results'][-1]['type'], 'XRAY')
+
+    def test_signal_invalidation(self):
+        """
+        Ensure a new catalog row is available without restart
+        """
+        self.assertIsNone(catalogs.body_parts.get('HEAD'))
+        BodyPart.objects.create(name='HEAD')
+        self.assertEqual(catalogs.body_parts.get('HEAD').name, 'HEAD')
+        BodyPart.objects.filter(name='HEAD').get().delete()
+        self.assertIsNone(catalogs.body_parts.get('HEAD'))
+
+    @override_settings(CATALOG_CACHE='default')
+    def test_shared_version(self):
+        """
+        Ensure a version bump from other worker reload the catalog
+        """
+        cache.clear()
+        self.assertIsNotNone(catalogs.body_parts.get('NECK'))
+        BodyPart.objects.filter(name='NECK').update(name='HEAD')
+        self.assertIsNone(catalogs.body_parts.get('HEAD'))
+        cache.add(catalogs.body_parts.version_key, 0, timeout=None)
+        cache.incr(catalogs.body_parts.version_key)
+        # the version is read again after CATALOG_CHECK_SECONDS
+        with override_settings(CATALOG_CHECK_SECONDS=0):
+            self.assertIsNotNone(catalogs.body_parts.get('HEAD'))
+        catalogs.body_parts.invalidate()
+
+    @override_settings(CATALOG_CACHE='default', CATALOG_CHECK_SECONDS=60)
+    def test_shared_version_reads(self):
+        """
+        Ensure the shared version is not read for every lookup
+        """
+        cache.clear()
+        catalogs.body_parts.names()
+        with mock.patch.object(
+                cache, 'get', wraps=cache.get) as cache_get:
+            for _ in range(100):
+                catalogs.body_parts.get('NECK')
+                catalogs.body_parts.name_of(1)
+        cache_get.assert_not_called()
+
+    def test_invalidation_after_commit(self):
+        """
+        Ensure a read between the write and the commit is not kept
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            BodyPart.objects.create(name='HEAD')
+            catalogs.body_parts.names()
+            self.assertIsNotNone(catalogs.body_parts._by_name)
+        self.assertIsNone(catalogs.body_parts._by_name)
+
+    def test_local_maps_expire(self):
+        """
+        Ensure a process without a shared version sees the changes of
+        the other workers after CATALOG_CHECK_SECONDS
+        """
+        self.assertIsNotNone(catalogs.body_parts.get('NECK'))
+        # a write of another worker (no signal in this process)
+        BodyPart.objects.filter(name='NECK').update(name='HEAD')
+        with override_settings(CATALOG_CHECK_SECONDS=60):
+            self.assertIsNone(catalogs.body_parts.get('HEAD'))
+        with override_settings(CATALOG_CHECK_SECONDS=0):
+            self.assertIsNotNone(catalogs.body_parts.get('HEAD'))
+        catalogs.body_parts.invalidate()
+
+    @override_settings(CATALOG_CACHE='default')
+    def test_serve_refuses_locmem(self):
+        """
+        Ensure serve does not start many workers with a locmem catalog
+        cache
+        """
+        with self.assertRaisesMessage(CommandError, 'CATALOG_CACHE'):
+            call_command('serve', '--workers', '2', '--no-warmup')
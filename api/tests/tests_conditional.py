@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+# the version query of every request (without api.response_cache)
+@override_settings(RESPONSE_CACHE=None)
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        self.study1 = StudyFactory(patient=self.patient1)
+        self.study2 = StudyFactory(patient=self.patient1)
+
+    def test_patient_not_modified(self):
+        """
+        Ensure api answer 304 for an unchanged patient
+        """
+        url = reverse(
+            'patient_get_update_delete', kwargs={'pk': self.patient1.id})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        # only the version is read from the patient table
+        patient_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "patient"' in query['sql']]
+        self.assertEqual(len(patient_queries), 1)
+        self.assertNotIn('first_name', patient_queries[0])
+        response = self.client.get(
+            url, format='json',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {'first_name': 'Jose'}, format='json')
+        response = self.client.get(
+            url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_studies_not_modified(self):
+        """
+        Ensure api answer 304 for an unchanged study list
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        response = self.client.get(url, format='json')
+        etag = response['ETag']
+        response = self.client.get(
+            url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.study1.delete()
+        response = self.client.get(
+            url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+        etag = response['ETag']
+        self.study2.description = 'updated'
+        self.study2.save()
+        response = self.client.get(
+            url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_version_is_bounded(self):
+        """
+        Ensure the version of a list only reads the rows of the page
+        """
+        PatientFactory()
+        url = reverse('patient_list_create') + '?page_size=1'
+        etag = self.client.get(url, format='json')['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                url, format='json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        patient_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "patient"' in query['sql']]
+        self.assertEqual(len(patient_queries), 1)
+        self.assertNotIn('COUNT(', patient_queries[0])
+        self.assertIn('LIMIT 2', patient_queries[0])
+
+        # a new patient after the page changes the next link
+        response = self.client.get(
+            reverse('patient_list_create') + '?page_size=2', format='json')
+        etag = response['ETag']
+        PatientFactory()
+        response = self.client.get(
+            reverse('patient_list_create') + '?page_size=2', format='json',
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_streamed_list_without_etag(self):
+        """
+        Ensure a streamed list (the whole table) has no etag
+        """
+        url = reverse('patient_list_create') + '?stream=true'
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_etag_per_representation(self):
+        """
+        Ensure every query string and format has its own etag
+        """
+        url = reverse('patient_list_create')
+        etags = {
+            self.client.get(url, format='json')['ETag'],
+            self.client.get(url + '?page_size=1', format='json')['ETag'],
+            self.client.get(url, HTTP_ACCEPT='text/html')['ETag'],
+        }
+        self.assertEqual(len(etags), 3)
+
+    def test_study_not_found(self):
+        """
+        Ensure an unknown study is still a 404
+        """
+        url = reverse(
+            'study_get_update_delete',
+            kwargs={'patient_pk': self.patient1.id, 'pk': 0})
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from api import db
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+class DatabaseProfileTests(TestCase):
+
+    def test_sqlite_pragmas(self):
+        """
+        Ensure the sqlite connections have the pragmas of the profile
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(DB_HEALTH_CHECKS=True)
+    def test_unusable_connection_is_closed(self):
+        """
+        Ensure a kept connection dropped by the server is closed
+        """
+        usable = mock.Mock(connection=object())
+        usable.is_usable.return_value = True
+        dropped = mock.Mock(connection=object())
+        dropped.is_usable.return_value = False
+        closed = mock.Mock(connection=None)
+        with mock.patch.object(db, 'connections') as connections:
+            connections.all.return_value = [usable, dropped, closed]
+            with self.assertLogs('debug', 'WARNING'):
+                db.check_connections()
+        usable.close.assert_not_called()
+        dropped.close.assert_called_once()
+        closed.is_usable.assert_not_called()
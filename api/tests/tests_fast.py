@@ -0,0 +1,73 @@
+from api.fast import RowSerializer
+from api.models import Patient, Study
+from api.serializers import PatientSerializer, StudySerializer
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+class RowSerializerTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory(first_name='José  ')
+        PatientFactory.create_batch(5)
+        StudyFactory.create_batch(6, patient=self.patient1)
+
+    def assertSameJson(self, serializer_class, queryset):
+        row_serializer = RowSerializer(serializer_class())
+        expected = serializer_class(queryset, many=True).data
+        data = row_serializer.many(queryset.values(*row_serializer.columns))
+        self.assertEqual(
+            JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_patients(self):
+        """
+        Ensure the row serializer output is the PatientSerializer output
+        """
+        self.assertSameJson(PatientSerializer, Patient.objects.all())
+
+    def test_studies(self):
+        """
+        Ensure the row serializer output is the StudySerializer output
+        """
+        self.assertSameJson(StudySerializer, Study.objects.all())
+
+    def test_views(self):
+        """
+        Ensure the list views return the same content with and without it
+        """
+        urls = [
+            reverse('patient_list_create'),
+            reverse(
+                'study_list_create', kwargs={'patient_pk': self.patient1.id})]
+        for url in urls:
+            response = self.client.get(url, format='json')
+            with override_settings(API_FAST_SERIALIZERS=False):
+                expected = self.client.get(url, format='json')
+            self.assertEqual(response.content, expected.content)
+
+    def test_unsupported_serializer(self):
+        """
+        Ensure a serializer with non column fields is not supported
+        """
+        class FullNameSerializer(PatientSerializer):
+            full_name = serializers.SerializerMethodField()
+
+            def get_full_name(self, obj):
+                return f'{obj.first_name} {obj.last_name}'
+
+        self.assertIsNone(RowSerializer.for_serializer(FullNameSerializer()))
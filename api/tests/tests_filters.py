@@ -0,0 +1,90 @@
+from api.models import BodyPart, Study, Type
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+class StudyFilterTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        self.studies = StudyFactory.create_batch(12, patient=self.patient1)
+        self.url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+
+    def get_ids(self, query: str) -> list:
+        response = self.client.get(self.url + query, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_200_OK, response.data)
+        return [item['id'] for item in response.data['results']]
+
+    def test_filters(self):
+        """
+        Ensure api filter the studies
+        """
+        studies = Study.objects.filter(patient=self.patient1).order_by('id')
+        self.assertEqual(
+            self.get_ids('?urgency_level=HIGH,MID'),
+            [s.id for s in studies if s.urgency_level in ('HIGH', 'MID')])
+        self.assertEqual(
+            self.get_ids('?type=XRAY'),
+            [s.id for s in studies if s.type.name == 'XRAY'])
+        self.assertEqual(
+            self.get_ids('?body_part=NECK&urgency_level=LOW'),
+            [s.id for s in studies
+             if s.body_part.name == 'NECK' and s.urgency_level == 'LOW'])
+        ids = [s.id for s in studies]
+        self.assertEqual(
+            self.get_ids(f'?min_id={ids[2]}&max_id={ids[5]}'), ids[2:6])
+
+    def test_ordering(self):
+        """
+        Ensure api order the studies by id desc
+        """
+        ids = sorted(study.id for study in self.studies)
+        self.assertEqual(self.get_ids('?ordering=-id'), ids[::-1])
+
+    def test_invalid_filters(self):
+        """
+        Ensure invalid filters are a 400
+        """
+        response = self.client.get(
+            self.url + '?urgency_level=URGENT&type=MRI&min_id=x',
+            format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertEqual(
+            set(response.data), {'urgency_level', 'type', 'min_id'})
+
+    def test_indexes(self):
+        """
+        Ensure the common filters use an index and not a table scan
+        """
+        body_part = BodyPart.objects.first()
+        type_ = Type.objects.first()
+        querysets = [
+            Study.objects.filter(
+                patient_id=self.patient1.id,
+                urgency_level__in=['HIGH']).order_by('id'),
+            Study.objects.filter(
+                type_id__in=[type_.id], urgency_level__in=['HIGH']),
+            Study.objects.filter(
+                body_part_id__in=[body_part.id], urgency_level__in=['LOW']),
+        ]
+        for queryset in querysets:
+            plan = queryset.explain()
+            self.assertIn('USING', plan)
+            self.assertNotIn('SCAN study\n', plan + '\n')
+            self.assertNotRegex(plan, r'SCAN (TABLE )?study$')
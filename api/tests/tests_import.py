@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tempfile
+
+from api.models import Patient, Study
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory
+
+User = get_user_model()
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _ndjson(rows: list) -> bytes:
+    return b'\n'.join(json.dumps(row).encode() for row in rows) + b'\n'
+
+
+def _patient_row(studies=()) -> dict:
+    patient = PatientFactory.stub()
+    return {
+        'first_name': patient.first_name,
+        'last_name': patient.last_name,
+        'birth_date': patient.birth_date,
+        'email': patient.email,
+        'studies': [dict(study) for study in studies]}
+
+
+STUDY = {
+    'urgency_level': 'HIGH',
+    'body_part': 'NECK',
+    'description': 'NORMAL THYROID',
+    'type': 'XRAY'}
+
+
+class PatientImportTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.url = reverse('patient_import')
+
+    def test_import_ndjson(self):
+        """
+        Ensure api import patients with studies in chunks and report rejects
+        """
+        rows = [_patient_row([STUDY, STUDY]) for _ in range(5)]
+        rows[2]['email'] = 'not an email'
+        rows[3]['studies'][1]['type'] = 'UNKNOWN'
+        body = _ndjson(rows) + b'{not json\n'
+        response = self.client.generic(
+            'POST', self.url + '?chunk_size=2', body,
+            content_type='application/x-ndjson')
+        self.assertEqual(
+            response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['rows'], 6)
+        self.assertEqual(response.data['patients'], 3)
+        self.assertEqual(response.data['studies'], 6)
+        self.assertEqual(
+            [reject['row'] for reject in response.data['rejects']], [3, 4, 6])
+        self.assertIn('email', response.data['rejects'][0]['errors'])
+        self.assertEqual(Patient.objects.count(), 3)
+        for patient in Patient.objects.all():
+            self.assertEqual(patient.studies.count(), 2)
+
+    def test_import_csv(self):
+        """
+        Ensure api import the patients csv
+        """
+        with open(os.path.join(DATA_DIR, 'patients.csv'), 'rb') as stream:
+            body = stream.read()
+        response = self.client.generic(
+            'POST', self.url, body, content_type='text/csv')
+        self.assertEqual(
+            response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['rejected'], 0, response.data)
+        self.assertEqual(
+            response.data['patients'], body.count(b'\n') - 1)
+        self.assertTrue(
+            Patient.objects.filter(email='pepe@ejemplo.com').exists())
+
+    def test_import_unsupported_media_type(self):
+        """
+        Ensure api reject an unknown format
+        """
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_import_no_credentials(self):
+        """
+        Unauthorized api import
+        """
+        self.client.credentials()
+        response = self.client.generic(
+            'POST', self.url, _ndjson([_patient_row()]),
+            content_type='application/x-ndjson')
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Patient.objects.count(), 0)
+
+    def test_import_command(self):
+        """
+        Ensure the import_patients command import a csv with studies
+        """
+        lines = ['first_name,last_name,birth_date,email,'
+                 'urgency_level,body_part,description,type']
+        lines += ['Jose,Villalobos,1955-04-10,pepe@ejemplo.com,'
+                  'HIGH,STOMACH,NO FINDINGS,XRAY'] * 3
+        lines += ['Jessica,Ramirez,1971-07-01,jessica@ejemplo.com,,,,']
+        lines += ['Jessica,Ramirez,1971-07-01,jessica,,,,']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as stream:
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+            stdout, stderr = io.StringIO(), io.StringIO()
+            call_command(
+                'import_patients', stream.name, chunk_size=2,
+                stdout=stdout, stderr=stderr)
+        self.assertEqual(Patient.objects.count(), 4)
+        self.assertEqual(Study.objects.count(), 3)
+        self.assertEqual(json.loads(stderr.getvalue())['row'], 6)
+        summary = json.loads(stdout.getvalue().splitlines()[-1])
+        self.assertEqual(summary['rejected'], 1)
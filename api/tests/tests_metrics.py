@@ -0,0 +1,71 @@
+from api import metrics
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE=None)
+class RequestMetricsTests(APITestCase):
+
+    def setUp(self):
+        metrics.reset()
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        patient = PatientFactory()
+        StudyFactory.create_batch(3, patient=patient)
+        self.url = reverse(
+            'study_list_create', kwargs={'patient_pk': patient.id})
+
+    def test_server_timing(self):
+        """
+        Ensure a response has the sql, serializer, render and total times
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings = dict(
+            entry.split(';', 1)
+            for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(
+            list(timings), ['sql', 'serializer', 'render', 'total'])
+        self.assertIn(
+            f'desc="{response.wsgi_request.query_count} queries"',
+            timings['sql'])
+        with override_settings(SERVER_TIMING=False):
+            response = self.client.get(self.url)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_metrics(self):
+        """
+        Ensure /metrics has the histograms of the routes for the admins
+        """
+        self.client.get(self.url)
+        self.client.get(self.url)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        labels = 'route="api/patients/<int:patient_pk>/studies",method="GET"'
+        lines = response.content.decode().splitlines()
+        self.assertIn(
+            f'api_requests_total{{{labels},status="200"}} 2', lines)
+        self.assertIn(f'api_request_duration_seconds_count{{{labels}}} 2',
+                      lines)
+        self.assertIn(
+            f'api_request_sql_queries_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertTrue(any(
+            line.startswith('api_response_cache_hits_total ')
+            for line in lines))
+
+        self.client.credentials()
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
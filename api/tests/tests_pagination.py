@@ -0,0 +1,55 @@
+from unittest import mock
+
+from api.pagination import IdCursorPagination
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class PaginationTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patients = PatientFactory.create_batch(7)
+
+    def test_walk_pages(self):
+        """
+        Ensure the cursors walk all the patients in id order
+        """
+        url = reverse('patient_list_create') + '?page_size=3'
+        ids = []
+        while url:
+            response = self.client.get(url, format='json')
+            self.assertEqual(
+                response.status_code, status.HTTP_200_OK, response.data)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, [patient.id for patient in self.patients])
+
+        response = self.client.get(response.data['previous'], format='json')
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            ids[3:6])
+
+    def test_max_page_size(self):
+        """
+        Ensure the page size is limited by max_page_size
+        """
+        url = reverse('patient_list_create') + '?page_size=5'
+        with mock.patch.object(IdCursorPagination, 'max_page_size', 2):
+            response = self.client.get(url, format='json')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
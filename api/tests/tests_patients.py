@@ -47,7 +47,7 @@ class PatientTests(APITestCase):
         response = self.client.get(url, format='json')
         self.assertEqual(
             response.status_code, status.HTTP_200_OK, response.data)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_get_patient(self):
         """
@@ -0,0 +1,104 @@
+import marshal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE=None)
+class ProfilingTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        patient = PatientFactory()
+        StudyFactory.create_batch(3, patient=patient)
+        self.url = reverse(
+            'study_list_create', kwargs={'patient_pk': patient.id})
+
+    def test_profile_response(self):
+        """
+        Ensure ?_profile=cpu returns the profile of the request and keeps it
+        """
+        response = self.client.get(self.url, {'_profile': 'cpu'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Profile-Status'], '200')
+        report = response.content.decode()
+        self.assertIn('Ordered by: cumulative time', report)
+        self.assertIn('api/views.py', report)
+
+        profiles = self.client.get(reverse('profile_list')).json()
+        self.assertEqual(profiles[0]['id'], response['X-Profile-Id'])
+        self.assertEqual(profiles[0]['path'], self.url + '?_profile=cpu')
+        url = reverse(
+            'profile_detail', kwargs={'profile_id': profiles[0]['id']})
+        download = self.client.get(url, {'output': 'pstats'})
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertTrue(marshal.loads(download.content))
+        response = self.client.get(url, {'output': 'collapsed'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PROFILE_SAMPLE_INTERVAL=0.0001)
+    def test_profile_header(self):
+        """
+        Ensure the X-Profile header keeps the normal response
+        """
+        response = self.client.get(self.url, HTTP_X_PROFILE='sample')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 3)
+        url = reverse('profile_detail', kwargs={
+            'profile_id': response['X-Profile-Id']})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # collapsed stacks (a short request can have no samples)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        for line in response.content.decode().splitlines():
+            self.assertRegex(line, r'^\S+ \d+$')
+
+    def test_only_staff(self):
+        """
+        Ensure the other users get the normal response without a profile
+        """
+        user = User.objects.create(username='user', is_active=True)
+        token = Token.objects.get(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        response = self.client.get(self.url, {'_profile': 'cpu'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(response.has_header('X-Profile-Id'))
+
+    def test_invalid_token(self):
+        """
+        Ensure an invalid token is the normal 401, not a server error
+        """
+        self.client.credentials(HTTP_AUTHORIZATION='Token bogus')
+        response = self.client.get(self.url, {'_profile': 'cpu'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(response.has_header('X-Profile-Id'))
+
+    @override_settings(PROFILE_STORE_SIZE=2)
+    def test_bounded_store(self):
+        """
+        Ensure only the last profiles are kept
+        """
+        ids = [
+            self.client.get(self.url, HTTP_X_PROFILE='cpu')['X-Profile-Id']
+            for _ in range(3)]
+        profiles = self.client.get(reverse('profile_list')).json()
+        self.assertEqual(
+            [profile['id'] for profile in profiles], ids[:0:-1])
+        response = self.client.get(
+            reverse('profile_detail', kwargs={'profile_id': ids[0]}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,105 @@
+from unittest import mock
+
+from api.middleware import QueryBudgetExceeded
+from api.views import PatientListCreateView
+from api import catalogs
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(APITestCase):
+    '''
+    every view run in its query_budget with a lot of rows
+    '''
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        PatientFactory.create_batch(50)
+        self.studies = StudyFactory.create_batch(50, patient=self.patient1)
+
+    def test_patient_views(self):
+        """
+        Ensure patient views do not exceed the query budget
+        """
+        url = reverse('patient_list_create')
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        patient = PatientFactory.stub()
+        response = self.client.post(url, patient.__dict__, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse(
+            'patient_get_update_delete', kwargs={'pk': response.data['id']})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {'first_name': 'a'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_study_views(self):
+        """
+        Ensure study views do not exceed the query budget
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = {
+            'urgency_level': 'LOW',
+            'body_part': 'NECK',
+            'description': 'NO FINDINGS',
+            'type': 'XRAY'}
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse(
+            'study_get_update_delete',
+            kwargs={'patient_pk': self.patient1.id, 'pk': response.data['id']})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_max_bulk_post(self):
+        """
+        Ensure a bulk post of STUDY_BULK_MAX_SIZE studies (cold catalogs)
+        does not exceed the query budget
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        data = [{
+            'urgency_level': 'LOW',
+            'body_part': 'NECK',
+            'description': 'NO FINDINGS',
+            'type': 'XRAY'}] * settings.STUDY_BULK_MAX_SIZE
+        catalogs.body_parts.invalidate()
+        catalogs.types.invalidate()
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), settings.STUDY_BULK_MAX_SIZE)
+
+    def test_budget_exceeded(self):
+        """
+        Ensure a view over its budget fails
+        """
+        url = reverse('patient_list_create')
+        with mock.patch.object(PatientListCreateView, 'query_budget', 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url, format='json')
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from api.middleware import count_queries
+from api.models import Patient
+from api.querylog import NPlusOneDetected, QueryInspector, normalize
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory
+
+User = get_user_model()
+
+
+@override_settings(RESPONSE_CACHE=None)
+class QueryLogTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patients = PatientFactory.create_batch(3)
+
+    def test_normalize(self):
+        """
+        Ensure the same statement with other values is the same sql
+        """
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE a IN (%s, %s, %s)\n"
+                      "AND b = 'it''s' LIMIT 21"),
+            'SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?')
+        self.assertEqual(
+            normalize('SELECT "t1"."id" FROM "t1" WHERE "t1"."id" = 7'),
+            'SELECT "t1"."id" FROM "t1" WHERE "t1"."id" = ?')
+
+    def n_plus_one(self):
+        request = SimpleNamespace(
+            method='GET', path='/test',
+            query_inspector=QueryInspector(None, 3))
+        request.query_inspector.view = 'test'
+        with count_queries(request):
+            for patient in self.patients:
+                Patient.objects.get(pk=patient.pk)
+        return request
+
+    def test_n_plus_one(self):
+        """
+        Ensure a sql repeated in a request is logged with its caller
+        """
+        request = self.n_plus_one()
+        with self.assertLogs('debug', 'WARNING') as logs:
+            request.query_inspector.report(request)
+        self.assertIn(
+            'N+1 in test (GET /test): 3 times SELECT', logs.output[0])
+        self.assertIn('api/tests/tests_querylog.py', logs.output[0])
+        with override_settings(SQL_N_PLUS_ONE_RAISE=True):
+            with self.assertRaises(NPlusOneDetected):
+                request.query_inspector.report(request)
+
+    @override_settings(SQL_SLOW_QUERY_MS=0.000001)
+    def test_slow_query(self):
+        """
+        Ensure a slow query is logged with the view and the line
+        """
+        url = reverse(
+            'patient_get_update_delete', kwargs={'pk': self.patients[0].pk})
+        with self.assertLogs('debug', 'WARNING') as logs:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'in api.views.PatientRetrieveUpdateDestroyView at api/',
+            logs.output[0])
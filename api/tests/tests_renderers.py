@@ -0,0 +1,138 @@
+import datetime
+import decimal
+from unittest import mock
+
+from api import msgpack_codec
+from api.renderers import FastJSONRenderer
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+PAYLOAD = [{
+    'id': 2 ** 40,
+    'urgency_level': 'HIGH',
+    'body_part': 'NECK',
+    'description': 'NORMAL THYROID   año',
+    'type': gettext_lazy('XRAY'),
+    'patient': 1,
+    'updated_at': datetime.datetime(
+        2021, 6, 18, 0, 55, 1, 123, tzinfo=datetime.timezone.utc),
+    'birth_date': datetime.date(1955, 4, 10),
+    'dose': decimal.Decimal('1.50'),
+    'ratio': 0.25,
+    'flags': (True, False, None),
+    'errors': {0: ['invalid']},
+}]
+
+
+class RendererTests(SimpleTestCase):
+
+    def test_fast_json(self):
+        """
+        Ensure the fast json output is the same as the JSONRenderer
+        """
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_fast_json_fallback(self):
+        """
+        Ensure the json output without orjson is the same
+        """
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(
+                FastJSONRenderer().render(PAYLOAD),
+                JSONRenderer().render(PAYLOAD))
+
+    def test_fast_json_indent(self):
+        """
+        Ensure the indent of the media type is respected
+        """
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type))
+
+    def test_msgpack_fallback(self):
+        """
+        Ensure the pure python msgpack is compatible with the msgpack lib
+        """
+        data = {
+            'ints': [0, 127, 128, -32, -33, 2 ** 16, -2 ** 31, 2 ** 63],
+            'str': 'x' * 40,
+            'long': 'y' * 70000,
+            'bin': b'\x00\x01',
+            'float': 1.5,
+            'map': {str(index): index for index in range(20)},
+            'list': list(range(20)),
+            'nil': None,
+            'bool': [True, False],
+        }
+        packed = msgpack_codec.packb(data)
+        with mock.patch.object(msgpack_codec, 'msgpack', None):
+            self.assertEqual(msgpack_codec.packb(data), packed)
+            self.assertEqual(msgpack_codec.unpackb(packed), data)
+            self.assertEqual(msgpack_codec.packb({'a': 1}), b'\x81\xa1a\x01')
+            with self.assertRaises(msgpack_codec.UnpackError):
+                msgpack_codec.unpackb(packed + b'\x01')
+            with self.assertRaises(msgpack_codec.UnpackError):
+                msgpack_codec.unpackb(packed[:-1])
+
+
+class MessagePackApiTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        StudyFactory.create_batch(3, patient=self.patient1)
+        self.url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+
+    def test_get_msgpack(self):
+        """
+        Ensure api return msgpack with the same data as json
+        """
+        response = self.client.get(self.url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        expected = self.client.get(self.url, format='json').json()
+        self.assertEqual(msgpack_codec.unpackb(response.content), expected)
+
+    def test_post_msgpack(self):
+        """
+        Ensure api create a study from a msgpack body
+        """
+        data = {
+            'urgency_level': 'LOW',
+            'body_part': 'NECK',
+            'description': 'NO FINDINGS',
+            'type': 'XRAY'}
+        response = self.client.generic(
+            'POST', self.url, msgpack_codec.packb(data),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            msgpack_codec.unpackb(response.content)['patient'],
+            self.patient1.id)
+
+    def test_post_invalid_msgpack(self):
+        """
+        Ensure api return 400 for an invalid msgpack body
+        """
+        response = self.client.generic(
+            'POST', self.url, b'\xc1', content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,151 @@
+from api.response_cache import ResponseCache, response_cache
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+# a locmem cache per worker and a cache shared by the workers
+WORKER_CACHES = {
+    'default': {'BACKEND': LOCMEM},
+    'worker1': {'BACKEND': LOCMEM, 'LOCATION': 'worker1'},
+    'worker2': {'BACKEND': LOCMEM, 'LOCATION': 'worker2'},
+    'shared': {'BACKEND': LOCMEM, 'LOCATION': 'shared'},
+}
+
+
+# a hit runs no query with a cached token
+@override_settings(RESPONSE_CACHE='default', TOKEN_CACHE='default')
+class ResponseCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        response_cache.reset_metrics()
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        self.patient2 = PatientFactory()
+        StudyFactory.create_batch(3, patient=self.patient1)
+        self.studies_url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+
+    def test_hit(self):
+        """
+        Ensure api serve a repeated get from the cache without queries
+        """
+        response = self.client.get(self.studies_url, format='json')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as context:
+            cached = self.client.get(self.studies_url, format='json')
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(len(context.captured_queries), 0)
+        # other query string and other format are other responses
+        response = self.client.get(self.studies_url + '?page_size=1')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = self.client.get(
+            self.studies_url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        # the etag is replayed
+        response = self.client.get(
+            self.studies_url, format='json',
+            HTTP_IF_NONE_MATCH=cached['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalidation(self):
+        """
+        Ensure api do not serve a cached response after a write
+        """
+        self.client.get(self.studies_url, format='json')
+        patient2_url = reverse(
+            'patient_get_update_delete', kwargs={'pk': self.patient2.id})
+        self.client.get(patient2_url, format='json')
+
+        study = {
+            'urgency_level': 'HIGH', 'body_part': 'NECK',
+            'description': 'NORMAL THYROID', 'type': 'XRAY'}
+        self.client.post(self.studies_url, [study] * 2, format='json')
+        response = self.client.get(self.studies_url, format='json')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 5)
+        # the other patient is still cached
+        response = self.client.get(patient2_url, format='json')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        self.client.patch(patient2_url, {'first_name': 'Jose'}, format='json')
+        response = self.client.get(patient2_url, format='json')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['first_name'], 'Jose')
+
+    def test_metrics(self):
+        """
+        Ensure api return the hits and misses
+        """
+        self.client.get(self.studies_url, format='json')
+        self.client.get(self.studies_url, format='json')
+        response = self.client.get(reverse('response_cache_stats'))
+        self.assertEqual(response.data['hits'], 1)
+        self.assertEqual(response.data['misses'], 1)
+        self.assertEqual(response.data['hit_ratio'], 0.5)
+
+
+@override_settings(CACHES=WORKER_CACHES)
+class ResponseCacheWorkersTests(TestCase):
+
+    def setUp(self):
+        self.response = HttpResponse(
+            b'{"id": 1}', content_type='application/json')
+
+    def test_per_process_caches(self):
+        """
+        Ensure a worker with its own cache does not see the
+        invalidations of the others
+        """
+        worker1, worker2 = ResponseCache('worker1'), ResponseCache('worker2')
+        generation = worker2.generation(1)
+        worker2.set(f'response:{generation}', self.response)
+        worker1.invalidate([1])
+        # worker2 still serves the response of the old generation
+        self.assertEqual(worker2.generation(1), generation)
+        self.assertIsNotNone(worker2.get(f'response:{generation}'))
+
+    def test_shared_cache(self):
+        """
+        Ensure the workers of a shared cache see the invalidations
+        """
+        worker1, worker2 = ResponseCache('shared'), ResponseCache('shared')
+        generation = worker2.generation(1)
+        self.assertEqual(worker1.generation(1), generation)
+        worker1.invalidate([1])
+        self.assertNotEqual(worker2.generation(1), generation)
+
+    def test_disabled_by_default(self):
+        """
+        Ensure the response cache is disabled without a shared cache
+        """
+        self.assertIsNone(ResponseCache().cache)
+
+    @override_settings(RESPONSE_CACHE='default')
+    def test_serve_refuses_locmem(self):
+        """
+        Ensure serve does not start many workers with a locmem cache
+        """
+        with self.assertRaisesMessage(CommandError, 'RESPONSE_CACHE'):
+            call_command('serve', '--workers', '2', '--no-warmup')
@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from api import checks
+from api.models import Patient
+from api.response_cache import response_cache
+from api.routers import ReplicaRouter, read_from_replicas, replicas
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+from django.test import (
+    SimpleTestCase, TransactionTestCase, override_settings)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory
+
+User = get_user_model()
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1', 'replica2'], RESPONSE_CACHE=None)
+class ReplicaRoutingTests(APITestCase):
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=self.token('test'))
+        self.patient = PatientFactory()
+        self.addCleanup(replicas.reset)
+        # the queries run on the test db, the tests check the choices
+        patcher = mock.patch.object(
+            replicas, 'choose', return_value=DEFAULT_DB_ALIAS)
+        self.choose = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def token(self, username) -> str:
+        User.objects.create(username=username,
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username=username)
+        return 'Token ' + token.key
+
+    def test_safe_request_reads_from_a_replica(self):
+        """
+        Ensure a GET choose one replica for all its reads
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.choose.assert_called_once()
+
+    def test_read_your_writes(self):
+        """
+        Ensure a client that wrote reads from the primary, the others don't
+        """
+        response = self.client.post(reverse('patient_list_create'), {
+            'first_name': 'Ana',
+            'last_name': 'Lopez',
+            'birth_date': '1990-01-01',
+            'email': 'ana@example.com',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse(
+            'patient_get_update_delete', kwargs={'pk': response.data['id']})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.choose.assert_not_called()
+
+        self.client.credentials(HTTP_AUTHORIZATION=self.token('other'))
+        self.client.get(url)
+        self.choose.assert_called_once()
+
+    @override_settings(RESPONSE_CACHE='default', REPLICA_PIN_SECONDS=5)
+    def test_replica_responses_are_cached_briefly(self):
+        """
+        Ensure a response read from a replica is cached for the pin window
+        """
+        url = reverse(
+            'patient_get_update_delete', kwargs={'pk': self.patient.id})
+        with mock.patch.object(
+                response_cache, 'set', return_value=None) as cache_set:
+            self.client.get(url)
+        self.assertEqual(cache_set.call_args[0][2], 5)
+
+    def test_router(self):
+        """
+        Ensure only the api reads of a request go to the replicas
+        """
+        router = ReplicaRouter()
+        self.choose.return_value = 'replica2'
+        self.assertIsNone(router.db_for_read(Patient))
+        with read_from_replicas():
+            self.assertEqual(router.db_for_read(Patient), 'replica2')
+            self.assertIsNone(router.db_for_read(Token))
+            self.assertEqual(router.db_for_write(Patient), DEFAULT_DB_ALIAS)
+        with read_from_replicas(False):
+            self.assertIsNone(router.db_for_read(Patient))
+        self.assertIs(router.allow_migrate('replica1', 'api'), False)
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'api'))
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1', 'replica2'], REPLICA_RETRY_SECONDS=30)
+class ReplicaHealthTests(APITestCase):
+
+    def setUp(self):
+        self.addCleanup(replicas.reset)
+        self.connections = {
+            'replica1': mock.Mock(connection=None),
+            'replica2': mock.Mock(connection=None),
+        }
+        patcher = mock.patch('api.routers.connections', self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_down_replica_is_skipped(self):
+        """
+        Ensure a replica that can not connect is skipped
+        """
+        self.connections['replica1'].ensure_connection.side_effect = (
+            OperationalError('unable to open database file'))
+        with self.assertLogs('debug', 'WARNING'):
+            chosen = [replicas.choose() for _ in range(4)]
+        self.assertEqual(chosen, ['replica2'] * 4)
+        self.assertEqual(replicas.down(), ['replica1'])
+        self.connections['replica1'].ensure_connection.assert_called_once()
+
+    def test_primary_without_healthy_replicas(self):
+        """
+        Ensure the reads go to the primary when all the replicas are down
+        """
+        for connection in self.connections.values():
+            connection.ensure_connection.side_effect = OperationalError
+        with self.assertLogs('debug', 'WARNING'):
+            self.assertIsNone(replicas.choose())
+        self.assertEqual(sorted(replicas.down()), ['replica1', 'replica2'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], RESPONSE_CACHE=None)
+class ReplicaPinCacheTests(SimpleTestCase):
+
+    def test_locmem_pin_cache(self):
+        """
+        Ensure a per process pin cache is a warning and serve refuses
+        many workers
+        """
+        warnings = checks.replica_pin_cache(None)
+        self.assertEqual([warning.id for warning in warnings], ['api.W001'])
+        with self.assertRaisesMessage(CommandError, 'REPLICA_PIN_CACHE'):
+            call_command(
+                'serve', '--workers', '2', '--no-warmup', stderr=StringIO())
+
+    def test_shared_pin_cache(self):
+        """
+        Ensure a cache shared by the processes is not a warning
+        """
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(REPLICA_PIN_CACHE='pins', CACHES={
+                    'default': {
+                        'BACKEND': (
+                            'django.core.cache.backends.locmem.LocMemCache'),
+                    },
+                    'pins': {
+                        'BACKEND': (
+                            'django.core.cache.backends.filebased.'
+                            'FileBasedCache'),
+                        'LOCATION': location,
+                    }}):
+                self.assertEqual(checks.replica_pin_cache(None), [])
+
+
+# the backup copies the committed db, not the transaction of a TestCase
+class SyncSQLiteReplicasTests(TransactionTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.replica = os.path.join(directory.name, 'replica1.sqlite3')
+
+    def test_sync(self):
+        """
+        Ensure the command copy the primary to the replicas
+        """
+        PatientFactory.create_batch(2)
+        out = StringIO()
+        with override_settings(SQLITE_REPLICAS=[self.replica]):
+            call_command('sync_sqlite_replicas', stdout=out)
+        self.assertIn('1 replicas synced', out.getvalue())
+        replica = sqlite3.connect(self.replica)
+        try:
+            count, = replica.execute(
+                'SELECT COUNT(*) FROM patient').fetchone()
+        finally:
+            replica.close()
+        self.assertEqual(count, 2)
+
+    def test_without_replicas(self):
+        """
+        Ensure the command fails without SQLITE_REPLICAS
+        """
+        with override_settings(SQLITE_REPLICAS=[]):
+            with self.assertRaisesMessage(
+                    CommandError, 'SQLITE_REPLICAS is not set'):
+                call_command('sync_sqlite_replicas')
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from api.models import Patient
+from api.search import ContainsSearchBackend
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+class SearchTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.john = PatientFactory(
+            first_name='John', last_name='Smith', email='js@example.com')
+        self.johnny = PatientFactory(
+            first_name='Johnny', last_name='Walker', email='jw@example.com')
+        self.mary = PatientFactory(
+            first_name='Mary', last_name='Johnson', email='mj@example.com')
+        self.url = reverse('patient_list_create')
+
+    def search(self, url: str, query: str) -> list:
+        response = self.client.get(url, {'q': query}, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_200_OK, response.data)
+        self.assertIsNone(response.data['next'])
+        return [item['id'] for item in response.data['results']]
+
+    def test_search_patients(self):
+        """
+        Ensure api search the patients by name prefix and email
+        """
+        self.assertCountEqual(
+            self.search(self.url, 'joh'),
+            [self.john.id, self.johnny.id, self.mary.id])
+        self.assertEqual(self.search(self.url, 'john smi'), [self.john.id])
+        self.assertEqual(self.search(self.url, 'jw@example'), [self.johnny.id])
+        self.assertEqual(self.search(self.url, 'nobody'), [])
+        # the fts syntax is not interpreted
+        self.assertEqual(self.search(self.url, '"OR NEAR( *'), [])
+
+    def test_relevance(self):
+        """
+        Ensure api order the results by relevance
+        """
+        self.assertEqual(self.search(self.url, 'john')[0], self.john.id)
+
+    def test_index_sync(self):
+        """
+        Ensure api search see the updates, deletes and bulk inserts
+        """
+        self.client.patch(
+            reverse('patient_get_update_delete',
+                    kwargs={'pk': self.mary.id}),
+            {'last_name': 'Brown'}, format='json')
+        self.assertEqual(self.search(self.url, 'brown'), [self.mary.id])
+        self.assertEqual(self.search(self.url, 'johnson'), [])
+        self.john.delete()
+        self.assertEqual(self.search(self.url, 'smith'), [])
+        Patient.objects.bulk_create([Patient(
+            first_name='Zoe', last_name='Smith', birth_date='1990-01-01',
+            email='zs@example.com')])
+        self.assertEqual(len(self.search(self.url, 'smith')), 1)
+
+    def test_search_studies(self):
+        """
+        Ensure api search the studies of the patient by description
+        """
+        thyroid = StudyFactory(
+            patient=self.john, description='Thyroid nodule follow up')
+        StudyFactory(patient=self.john, description='Knee pain')
+        StudyFactory(patient=self.mary, description='Thyroid scan')
+        url = reverse('study_list_create', kwargs={'patient_pk': self.john.id})
+        self.assertEqual(self.search(url, 'thyr'), [thyroid.id])
+
+    @mock.patch('api.search.get_search_backend', ContainsSearchBackend)
+    def test_contains_backend(self):
+        """
+        Ensure api search with the portable backend
+        """
+        self.assertEqual(
+            self.search(self.url, 'joh'),
+            [self.john.id, self.johnny.id, self.mary.id])
+        self.assertEqual(self.search(self.url, 'john smi'), [self.john.id])
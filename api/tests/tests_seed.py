@@ -0,0 +1,82 @@
+import io
+from unittest import mock
+
+from api import stats
+from api.management.commands.seed_dataset import Command
+from api.models import Patient, Study
+from api.search import SQLiteFTSBackend, get_search_backend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+
+class SeedDatasetTests(TestCase):
+
+    def seed(self, seed=0):
+        call_command(
+            'seed_dataset', '--patients', '10', '--studies', '35',
+            '--batch-size', '8', '--seed', str(seed), stdout=io.StringIO())
+
+    def test_seed_dataset(self):
+        """
+        Ensure the studies are spread over the patients and counted
+        """
+        self.seed()
+        self.assertEqual(Patient.objects.count(), 10)
+        self.assertEqual(Study.objects.count(), 35)
+        self.assertEqual(
+            Study.objects.values('patient').distinct().count(), 10)
+        self.assertEqual(stats.verify(), [])
+        patient = Patient.objects.first()
+        found = get_search_backend().search(
+            Patient.objects.all(), patient.last_name)
+        self.assertIn(patient, found)
+        # the sequences are after the explicit ids
+        self.assertEqual(
+            Patient.objects.create(
+                first_name='a', last_name='b', birth_date='1990-01-01',
+                email='a@example.com').pk, 11)
+
+    def test_same_seed_same_dataset(self):
+        """
+        Ensure a seed always generates the same rows
+        """
+        def rows():
+            return list(Study.objects.order_by('id').values_list(
+                'patient__email', 'type_id', 'body_part_id',
+                'urgency_level', 'description'))
+
+        self.seed()
+        first = rows()
+        Study.objects.all().delete()
+        Patient.objects.all().delete()
+        self.seed()
+        self.assertEqual(
+            [row[1:] for row in rows()], [row[1:] for row in first])
+        self.seed(seed=1)
+        self.assertNotEqual(rows()[-35:], first)
+
+
+# the search index is only dropped outside of a transaction
+class SeedDatasetIndexTests(TransactionTestCase):
+    # the catalogs of the data migrations
+    serialized_rollback = True
+
+    def test_index_after_a_failure(self):
+        """
+        Ensure the search index is installed again when the seed fails
+        """
+        if not isinstance(get_search_backend(), SQLiteFTSBackend):
+            self.skipTest('the search backend is not sqlite fts')
+        with mock.patch.object(
+                Command, 'seed_studies', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'seed_dataset', '--patients', '2', '--studies', '2',
+                    stdout=io.StringIO())
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        self.assertIn(SQLiteFTSBackend.fts_table(Patient), tables)
+        patient = Patient.objects.first()
+        self.assertIn(patient, get_search_backend().search(
+            Patient.objects.all(), patient.last_name))
@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+# the version query of api.conditional reads the page (id, updated_at)
+VERSION_QUERY = 'SELECT "study"."id", "study"."updated_at" FROM'
+
+
+def _study_queries(queries) -> list:
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT "study"."id"')
+        and not query['sql'].startswith(VERSION_QUERY)]
+
+
+# the queries of every request (api.response_cache would serve the repeats)
+@override_settings(RESPONSE_CACHE=None)
+class SparseFieldsTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        self.study1 = StudyFactory(patient=self.patient1)
+        StudyFactory.create_batch(3, patient=self.patient1)
+
+    def test_list_fields(self):
+        """
+        Ensure the list return and read only the requested fields
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        for fast in (True, False):
+            with override_settings(API_FAST_SERIALIZERS=fast):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(
+                        url + '?fields=id,urgency_level,type&page_size=2')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            for item in response.data['results']:
+                self.assertCountEqual(item, ['id', 'urgency_level', 'type'])
+            queries = _study_queries(context.captured_queries)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('"description"', queries[0])
+
+    def test_list_fields_without_pk(self):
+        """
+        Ensure the pagination works without the id in the fields
+        """
+        PatientFactory()
+        url = reverse('patient_list_create')
+        response = self.client.get(url + '?fields=first_name&page_size=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'][0]), ['first_name'])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_detail_exclude(self):
+        """
+        Ensure the detail exclude the fields and does not join the catalogs
+        """
+        url = reverse(
+            'study_get_update_delete',
+            kwargs={'patient_pk': self.patient1.id, 'pk': self.study1.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url + '?exclude=description')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('description', response.data)
+        self.assertEqual(response.data['type'], self.study1.type.name)
+        queries = _study_queries(context.captured_queries)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('JOIN', queries[0])
+        self.assertNotIn('"description"', queries[0])
+
+    def test_unknown_field(self):
+        """
+        Ensure an unknown field is a 400
+        """
+        url = reverse('patient_list_create')
+        response = self.client.get(url + '?fields=id,password')
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertIn('fields', response.data)
+
+    def test_write_ignore_fields(self):
+        """
+        Ensure a write return all the fields
+        """
+        url = reverse(
+            'patient_get_update_delete', kwargs={'pk': self.patient1.id})
+        response = self.client.patch(
+            url + '?fields=id', {'first_name': 'Jose'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Jose')
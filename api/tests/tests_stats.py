@@ -0,0 +1,110 @@
+import io
+
+from api import stats
+from api.models import BodyPart, Study, StudyCount, Type
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+class StudyStatsTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        self.patient2 = PatientFactory()
+        self.neck = BodyPart.objects.get(name='NECK')
+        self.chest = BodyPart.objects.get(name='CHEST')
+        self.xray = Type.objects.get(name='XRAY')
+        self.study = StudyFactory(
+            patient=self.patient1, urgency_level='HIGH',
+            body_part=self.neck, type=self.xray)
+        StudyFactory(
+            patient=self.patient2, urgency_level='LOW',
+            body_part=self.chest, type=self.xray)
+
+    def get_stats(self, patient=None) -> dict:
+        url = reverse('study_stats') if patient is None else reverse(
+            'patient_study_stats', kwargs={'patient_pk': patient.id})
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_stats(self):
+        """
+        Ensure api return the study counters, overall and per patient
+        """
+        data = self.get_stats()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['type'], {'MAMMOGRAM': 0, 'XRAY': 2})
+        self.assertEqual(data['body_part']['NECK'], 1)
+        self.assertEqual(data['body_part']['CHEST'], 1)
+        self.assertEqual(
+            data['urgency_level'], {'LOW': 1, 'MID': 0, 'HIGH': 1})
+        data = self.get_stats(self.patient1)
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['urgency_level']['HIGH'], 1)
+        response = self.client.get(
+            reverse('patient_study_stats', kwargs={'patient_pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_counters_follow_writes(self):
+        """
+        Ensure api update the counters on update, delete and bulk create
+        """
+        url = reverse(
+            'study_get_update_delete',
+            kwargs={'patient_pk': self.patient1.id, 'pk': self.study.id})
+        response = self.client.patch(
+            url, {'urgency_level': 'MID', 'body_part': 'CHEST'},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = self.get_stats(self.patient1)
+        self.assertEqual(data['urgency_level']['HIGH'], 0)
+        self.assertEqual(data['urgency_level']['MID'], 1)
+        self.assertEqual(data['body_part']['CHEST'], 1)
+
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient2.id})
+        study = {
+            'urgency_level': 'HIGH', 'body_part': 'NECK',
+            'description': 'NORMAL THYROID', 'type': 'MAMMOGRAM'}
+        response = self.client.post(url, [study] * 3, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.get_stats(self.patient2)['total'], 4)
+        self.assertEqual(self.get_stats()['type']['MAMMOGRAM'], 3)
+
+        self.study.delete()
+        self.assertEqual(self.get_stats(self.patient1)['total'], 0)
+        self.assertEqual(self.get_stats()['total'], 4)
+        self.assertEqual(stats.verify(), [])
+
+    def test_rebuild_command(self):
+        """
+        Ensure the command find and fix wrong counters
+        """
+        Study.objects.filter(pk=self.study.pk).update(urgency_level='LOW')
+        StudyCount.objects.all().update(count=7)
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_study_stats', '--verify-only',
+                stdout=io.StringIO(), stderr=io.StringIO())
+        call_command(
+            'rebuild_study_stats',
+            stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(stats.verify(), [])
+        data = self.get_stats()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['urgency_level']['LOW'], 2)
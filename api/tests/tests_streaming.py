@@ -0,0 +1,70 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+@override_settings(STREAM_CHUNK_SIZE=3)
+class StreamingListTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        PatientFactory.create_batch(9)
+        StudyFactory.create_batch(7, patient=self.patient1)
+
+    def assertStreamEqualsList(self, url):
+        response = self.client.get(url + '?page_size=1000', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        streamed = self.client.get(url + '?stream=true')
+        self.assertEqual(streamed.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed.streaming)
+        content = b''.join(streamed.streaming_content)
+        self.assertEqual(
+            content, json.dumps(
+                response.data['results'], ensure_ascii=False,
+                separators=(',', ':')).encode())
+
+    def test_stream_patients(self):
+        """
+        Ensure the streamed patients are the same as the list
+        """
+        self.assertStreamEqualsList(reverse('patient_list_create'))
+
+    def test_stream_studies(self):
+        """
+        Ensure the streamed studies are the same as the list
+        """
+        self.assertStreamEqualsList(reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id}))
+
+    def test_stream_empty(self):
+        """
+        Ensure an empty stream is an empty json array
+        """
+        url = reverse('study_list_create', kwargs={'patient_pk': 0})
+        streamed = self.client.get(url + '?stream=true')
+        self.assertEqual(b''.join(streamed.streaming_content), b'[]')
+
+    def test_stream_no_credentials(self):
+        """
+        Unauthorized api stream
+        """
+        self.client.credentials()
+        response = self.client.get(
+            reverse('patient_list_create') + '?stream=true')
+        self.assertEqual(
+            response.status_code, status.HTTP_401_UNAUTHORIZED)
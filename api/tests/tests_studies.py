@@ -18,7 +18,7 @@ User = get_user_model()
 def _study_to_dict(study: Study) -> dict:
     data = {
         'patient': study.patient.id,
-        'urgency_level': study.urgency_level[0],
+        'urgency_level': study.urgency_level,
         'body_part': study.body_part.name,
         'description': study.description,
         'type': study.type.name
@@ -64,7 +64,7 @@ class StudyTests(APITestCase):
         response = self.client.get(url, format='json')
         self.assertEqual(
             response.status_code, status.HTTP_200_OK, response.data)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_get_study(self):
         """
@@ -216,3 +216,63 @@ class StudyNoCredentialsTests(APITestCase):
         response = self.client.delete(url, format='json')
         self.assertEqual(
             response.status_code, status.HTTP_401_UNAUTHORIZED, response.data)
+
+
+class StudyBulkTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        StudyFactory(patient=self.patient1)
+
+    def test_bulk_create_studies(self):
+        """
+        Ensure api create an array of studies
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        data = [
+            _study_to_dict(StudyFactory.stub(patient=self.patient1))
+            for _ in range(300)]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(len(response.data), 300)
+        for item in response.data:
+            study = Study.objects.get(id=item['id'])
+            self.assertEqual(study.patient_id, self.patient1.id)
+            self.assertEqual(study.description, item['description'])
+            self.assertEqual(study.type.name, item['type'])
+
+    def test_bulk_create_errors(self):
+        """
+        Ensure api return the errors with the array index and create nothing
+        """
+        url = reverse(
+            'study_list_create', kwargs={'patient_pk': self.patient1.id})
+        data = [
+            _study_to_dict(StudyFactory.stub(patient=self.patient1))
+            for _ in range(3)]
+        data[1]['type'] = 'UNKNOWN'
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['index'], 1)
+        self.assertIn('type', response.data[0]['errors'])
+        self.assertEqual(Study.objects.count(), 1)
+
+    def test_bulk_create_unknown_patient(self):
+        """
+        Ensure api return 404 for an unknown patient
+        """
+        url = reverse('study_list_create', kwargs={'patient_pk': 0})
+        data = [_study_to_dict(StudyFactory.stub(patient=self.patient1))]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(
+            response.status_code, status.HTTP_404_NOT_FOUND, response.data)
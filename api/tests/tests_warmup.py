@@ -0,0 +1,64 @@
+from unittest import mock
+
+from api import catalogs, metrics, warmup
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class WarmUpTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def test_warm_up(self):
+        """
+        Ensure warm_up run every stage and load the catalogs
+        """
+        timings = warmup.warm_up()
+        self.assertEqual(
+            list(timings), [name for name, _ in warmup.STAGES])
+        with self.assertNumQueries(0):
+            catalogs.body_parts.names()
+            catalogs.types.names()
+
+    def test_warm_request_without_queries(self):
+        """
+        Ensure the warm-up request doesn't touch the db
+        """
+        with self.assertNumQueries(0):
+            warmup.warm_request()
+
+    def test_warm_request_without_metrics(self):
+        """
+        Ensure the warm-up request is not in the metrics of the workers
+        """
+        metrics.reset()
+        with mock.patch.object(
+                metrics, 'observe', wraps=metrics.observe) as observe:
+            warmup.warm_request()
+        # the request went through the middlewares
+        observe.assert_called_once()
+        self.assertNotIn('api_requests_total{', metrics.export())
+
+    def test_first_request_timer(self):
+        """
+        Ensure the time of the first request is reported once
+        """
+        report = mock.Mock()
+        timer = warmup.FirstRequestTimer(report)
+        timer.install()
+        self.addCleanup(timer.uninstall)
+        url = reverse('patient_list_create')
+        self.client.get(url)
+        self.client.get(url)
+        report.assert_called_once()
+        self.assertGreater(report.call_args[0][0], 0)
@@ -0,0 +1,78 @@
+from api.models import Study
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .factories import PatientFactory, StudyFactory
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class StudyWorklistTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create(username='test',
+                            is_superuser=True,
+                            is_staff=True,
+                            is_active=True)
+        token = Token.objects.get(user__username='test')
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        self.patient1 = PatientFactory()
+        self.patient2 = PatientFactory()
+        for patient in (self.patient1, self.patient2):
+            StudyFactory.create_batch(4, patient=patient)
+        self.url = reverse('study_worklist')
+
+    def test_worklist_order(self):
+        """
+        Ensure the worklist return HIGH, MID then LOW studies of all patients
+        """
+        expected = [
+            study.id
+            for urgency in ('HIGH', 'MID', 'LOW')
+            for study in Study.objects.filter(
+                urgency_level=urgency).order_by('id')]
+        url, ids = self.url + '?page_size=3', []
+        while url:
+            response = self.client.get(url, format='json')
+            self.assertEqual(
+                response.status_code, status.HTTP_200_OK, response.data)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_worklist_embedded_names(self):
+        """
+        Ensure the worklist embed the patient and catalog names
+        """
+        response = self.client.get(
+            self.url + '?type=XRAY', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for item in response.data['results']:
+            study = Study.objects.get(id=item['id'])
+            self.assertEqual(item['type'], 'XRAY')
+            self.assertEqual(item['body_part'], study.body_part.name)
+            self.assertEqual(
+                item['patient_first_name'], study.patient.first_name)
+            self.assertEqual(
+                item['patient_last_name'], study.patient.last_name)
+
+    def test_invalid_cursor(self):
+        """
+        Ensure an invalid cursor is a 404
+        """
+        response = self.client.get(self.url + '?cursor=xxx', format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_worklist_index(self):
+        """
+        Ensure a worklist page is an index seek
+        """
+        plan = Study.objects.filter(
+            urgency_level='HIGH', id__gt=0).order_by('id')[:10].explain()
+        self.assertIn('study_worklist_idx', plan)
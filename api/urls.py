@@ -1,27 +1,73 @@
+from django.conf import settings
 from django.urls import path
 
+from .aio import AsyncReadView
 from .views import (
+    PatientImportView,
     PatientListCreateView,
     PatientRetrieveUpdateDestroyView,
+    ProfileDetailView,
+    ProfileListView,
+    ResponseCacheStatsView,
     StudyRetrieveUpdateDestroyView,
+    StudyStatsView,
     StudytListCreateView,
+    StudyWorklistView,
 )
 
+
+def read_view(view_class):
+    '''
+    async view under ASGI (api.aio), the DRF view under WSGI
+    '''
+    if settings.API_ASYNC_VIEWS:
+        return AsyncReadView.as_view(view_class)
+    return view_class.as_view()
+
+
 urlpatterns = [
     path(
         'patients/',
-        PatientListCreateView.as_view(),
+        read_view(PatientListCreateView),
         name='patient_list_create'),
+    path(
+        'patients/import',
+        PatientImportView.as_view(),
+        name='patient_import'),
     path(
         'patients/<int:pk>/',
-        PatientRetrieveUpdateDestroyView.as_view(),
+        read_view(PatientRetrieveUpdateDestroyView),
         name='patient_get_update_delete'),
     path(
         'patients/<int:patient_pk>/studies',
-        StudytListCreateView.as_view(),
+        read_view(StudytListCreateView),
         name='study_list_create'),
     path(
         'patients/<int:patient_pk>/studies/<int:pk>/',
-        StudyRetrieveUpdateDestroyView.as_view(),
+        read_view(StudyRetrieveUpdateDestroyView),
         name='study_get_update_delete'),
+    path(
+        'patients/<int:patient_pk>/stats',
+        StudyStatsView.as_view(),
+        name='patient_study_stats'),
+    path(
+        'studies/worklist',
+        StudyWorklistView.as_view(),
+        name='study_worklist'),
+    path(
+        'stats/',
+        StudyStatsView.as_view(),
+        name='study_stats'),
+    path(
+        'stats/cache',
+        ResponseCacheStatsView.as_view(),
+        name='response_cache_stats'),
+    path(
+        'profiles/',
+        ProfileListView.as_view(),
+        name='profile_list'),
+    path(
+        'profiles/<str:profile_id>',
+        ProfileDetailView.as_view(),
+        name='profile_detail'),
 ]
@@ -1,26 +1,137 @@
-from rest_framework import generics
+import logging
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, status
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from . import metrics, profiling, stats
+from .bulk import insert_queries
+from .conditional import ConditionalGetMixin
+from .fast import FastListMixin
+from .filters import StudyFilterBackend
+from .importer import READERS, PatientImporter
 from .models import Patient, Study
-from .serializers import PatientSerializer, StudySerializer, StudyUpdateSerializer
+from .pagination import IdCursorPagination, WorklistPagination
+from .renderers import PrometheusRenderer
+from .response_cache import ResponseCacheMixin, response_cache
+from .search import SearchFilterBackend
+from .serializers import (
+    PatientSerializer,
+    StudyBulkSerializer,
+    StudySerializer,
+    StudyUpdateSerializer,
+    StudyWorklistSerializer,
+)
+from .sparse import SparseFieldsMixin
+from .streaming import StreamingListMixin
+
+logger = logging.getLogger('debug')
 
 
-class PatientListCreateView(generics.ListCreateAPIView):
+class PatientListCreateView(
+        ConditionalGetMixin,
+        SparseFieldsMixin,
+        StreamingListMixin,
+        FastListMixin,
+        generics.ListCreateAPIView):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = IdCursorPagination
+    # ?q=  (api.search)
+    filter_backends = [SearchFilterBackend]
+    # max sql queries per request (api.middleware.QueryBudgetMiddleware)
+    query_budget = 3
 
 
-class PatientRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class PatientRetrieveUpdateDestroyView(
+        ResponseCacheMixin,
+        ConditionalGetMixin,
+        SparseFieldsMixin,
+        generics.RetrieveUpdateDestroyAPIView):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
     permission_classes = [IsAdminUser]
+    cache_patient_kwarg = 'pk'
+    query_budget = 5
+
+
+class PatientImportView(APIView):
+    '''
+    Streaming import of patients (with studies)
+
+    notes:
+        the body is read line by line from the request stream
+        (request.data is never used), so a multi-GB body is not loaded
+        in memory. Content-Type: application/x-ndjson or text/csv
+        (formats in api.importer), ?chunk_size= rows per bulk insert.
+        the response is a summary with the rejected rows.
+    '''
+    permission_classes = [IsAdminUser]
+    content_types = {
+        'application/x-ndjson': 'ndjson',
+        'text/csv': 'csv',
+    }
+
+    def post(self, request, *args, **kwargs):
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type not in self.content_types:
+            raise UnsupportedMediaType(content_type)
+        try:
+            chunk_size = int(request.query_params.get(
+                'chunk_size', settings.IMPORT_CHUNK_SIZE))
+        except ValueError:
+            raise ValidationError(
+                {'chunk_size': ['A valid integer is required.']})
+        importer = PatientImporter(
+            chunk_size=max(chunk_size, 1),
+            on_progress=self.log_progress)
+        lines = iter(request.stream.readline, b'') if request.stream else []
+        reader = READERS[self.content_types[content_type]]
+        summary = importer.run(reader(lines))
+        return Response(summary, status=status.HTTP_200_OK)
+
+    def log_progress(self, importer):
+        logger.info(
+            f'import: {importer.rows} rows '
+            f'({importer.rows_per_sec:.0f} rows/sec, '
+            f'{importer.rejected} rejected)')
 
 
-class StudytListCreateView(generics.ListCreateAPIView):
+class StudytListCreateView(
+        ResponseCacheMixin,
+        ConditionalGetMixin,
+        SparseFieldsMixin,
+        StreamingListMixin,
+        FastListMixin,
+        generics.ListCreateAPIView):
+    '''
+    Notes:
+        body_part and type names come from the in-memory catalogs
+        (api.catalogs), so the list does not need a select_related
+        and runs the same queries for 1 or 10k studies.
+    '''
     queryset = Study.objects.all()
     serializer_class = StudySerializer
     permission_classes = [IsAdminUser]
+    pagination_class = IdCursorPagination
+    # the search is the last one, a ?q= is ordered by relevance
+    filter_backends = [
+        StudyFilterBackend, OrderingFilter, SearchFilterBackend]
+    # the cursor pagination needs an unique ordering (?ordering=-id)
+    ordering_fields = ['id']
+    ordering = ['id']
+    # a bulk post of STUDY_BULK_MAX_SIZE studies: the token, the patient,
+    # the savepoint and its release, one insert per batch (166 studies
+    # with sqlite), the max(id) and 2 upserts of the counters (api.stats),
+    # +2 queries when the catalogs are cold
+    query_budget = 9 + insert_queries(Study, settings.STUDY_BULK_MAX_SIZE)
 
     @property
     def patient_pk(self):
@@ -61,15 +172,53 @@ class StudytListCreateView(generics.ListCreateAPIView):
             from the url(patients/<int:patient_pk>/studies).
             This is just a convenience, so that the client does not have
             to enter the patient_pk in the url and again in the post.
+
+            a json array is a bulk post (see bulk_create)
         '''
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
         request.data.update({"patient": self.patient_pk})
         return super().create(request, *args, **kwargs)
 
+    def bulk_create(self, request):
+        '''
+        create all the studies of a json array
+
+        notes:
+            the array is validated as a batch and inserted with one
+            bulk_create in one transaction (all or nothing).
+            the errors are returned with the index of the item
+            [{"index": 3, "errors": {"type": [...]}}]
+        '''
+        if len(request.data) > settings.STUDY_BULK_MAX_SIZE:
+            raise ValidationError(
+                f'max {settings.STUDY_BULK_MAX_SIZE} studies per request')
+        patient = get_object_or_404(Patient, pk=self.patient_pk)
+        serializer = StudyBulkSerializer(
+            data=request.data,
+            many=True,
+            context=self.get_serializer_context())
+        if not serializer.is_valid():
+            errors = [
+                {'index': index, 'errors': error}
+                for index, error in enumerate(serializer.errors) if error]
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(patient=patient)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class StudyRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+
+class StudyRetrieveUpdateDestroyView(
+        ResponseCacheMixin,
+        ConditionalGetMixin,
+        SparseFieldsMixin,
+        generics.RetrieveUpdateDestroyAPIView):
     queryset = Study.objects.select_related('body_part', 'type').all()
     serializer_class = StudyUpdateSerializer
     permission_classes = [IsAdminUser]
+    # an update is a transaction with the UPDATE, the read of the old
+    # stats counter and 2 upserts of the counters (api.stats),
+    # +2 queries when the catalogs are cold
+    query_budget = 8
 
     @property
     def patient_pk(self):
@@ -77,3 +226,109 @@ class StudyRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         return super().get_queryset().filter(patient_id=self.patient_pk)
+
+
+class StudyWorklistView(generics.ListAPIView):
+    '''
+    Radiology worklist: the studies of all the patients,
+    HIGH first, then MID, then LOW (oldest first in every level)
+
+    notes:
+        see api.pagination.WorklistPagination for the keyset paging.
+        the filters of the study list (?type=, ?body_part=, etc.) work too.
+    '''
+    queryset = Study.objects.select_related('patient').only(
+        'id', 'urgency_level', 'body_part_id', 'type_id', 'description',
+        'updated_at', 'patient__id', 'patient__first_name',
+        'patient__last_name')
+    serializer_class = StudyWorklistSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = WorklistPagination
+    filter_backends = [StudyFilterBackend]
+    # up to 3 index seeks per page (+2 when the catalogs are cold)
+    query_budget = 6
+
+
+class StudyStatsView(APIView):
+    '''
+    Number of studies by type, body_part and urgency_level
+    (api/stats/ all the studies, api/patients/<patient_pk>/stats a patient)
+
+    notes:
+        read from the counters tables (api.stats), the cost does not
+        depend on the number of studies.
+    '''
+    permission_classes = [IsAdminUser]
+    # +2 queries when the catalogs are cold
+    query_budget = 4
+
+    def get(self, request, patient_pk=None, *args, **kwargs):
+        if patient_pk is not None:
+            get_object_or_404(Patient.objects.only('id'), pk=patient_pk)
+        return Response(stats.study_stats(patient_pk))
+
+
+class ResponseCacheStatsView(APIView):
+    '''
+    hits/misses of the response cache (api.response_cache) of this process
+    '''
+    permission_classes = [IsAdminUser]
+    # the token (api.authentication)
+    query_budget = 1
+
+    def get(self, request, *args, **kwargs):
+        return Response(response_cache.metrics())
+
+
+class MetricsView(APIView):
+    '''
+    request histograms and response cache counters of this process
+    (api.metrics) in the prometheus text format
+    '''
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+    # the token (api.authentication)
+    query_budget = 1
+
+    def get(self, request, *args, **kwargs):
+        response = Response(metrics.export())
+        # the exposition format version
+        response.content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        return response
+
+
+class ProfileListView(APIView):
+    '''
+    the stored request profiles, newest first (api.profiling)
+    '''
+    permission_classes = [IsAdminUser]
+    # the token (api.authentication)
+    query_budget = 1
+
+    def get(self, request, *args, **kwargs):
+        return Response(profiling.profiles.list())
+
+
+class ProfileDetailView(APIView):
+    '''
+    download a stored request profile,
+    ?output=text|pstats (cpu) or collapsed (sample)
+    '''
+    permission_classes = [IsAdminUser]
+    # the token (api.authentication)
+    query_budget = 1
+
+    def get(self, request, profile_id, *args, **kwargs):
+        profile = profiling.profiles.get(profile_id)
+        if profile is None:
+            raise Http404
+        content, content_type = profiling.output(
+            profile, request.query_params.get('output'))
+        if content is None:
+            raise ValidationError(
+                {'output': f'not available for a {profile["mode"]} profile'})
+        response = HttpResponse(content, content_type=content_type)
+        if content_type == 'application/octet-stream':
+            response['Content-Disposition'] = (
+                f'attachment; filename="{profile_id}.pstats"')
+        return response
@@ -0,0 +1,168 @@
+'''
+Warm-up of a process before it accepts traffic (manage.py serve)
+
+Notes:
+    the first request of a cold process pays the url resolver (the
+    regexes are compiled and the reverse maps populated on first use),
+    the serializer fields (and the compiled RowSerializer of api.fast),
+    the lazy imports of the request path (sessions, messages, caches),
+    the catalog tables (api.catalogs) and the db connection.
+    warm_up() does it before the first request. In the master of a
+    pre-fork server it is done once and the workers share the result
+    (copy-on-write), but not the db connections: the master closes them
+    and every worker opens its own (connect_databases).
+'''
+import io
+import logging
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from . import catalogs, metrics
+from .fast import RowSerializer
+
+
+def _walk(resolver):
+    '''
+    compile the regexes of the urlconf, yield the view classes
+    '''
+    resolver.pattern.regex
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern)
+        elif isinstance(pattern, URLPattern):
+            pattern.pattern.regex
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                yield view_class
+
+
+def warm_urls():
+    list(_walk(get_resolver()))
+
+
+def warm_serializers():
+    for view_class in set(_walk(get_resolver())):
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None:
+            continue
+        serializer = serializer_class()
+        serializer.fields
+        RowSerializer.for_serializer(serializer)
+
+
+def allowed_host() -> str:
+    '''
+    a host of settings.ALLOWED_HOSTS for the warm-up request
+    '''
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            # .example.com also matches example.com
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def warm_request():
+    '''
+    an anonymous GET through the wsgi handler, the middlewares and a DRF
+    view: a 401 without queries
+
+    Notes:
+        the request is not a real one, the metrics of the process
+        (api.metrics, inherited by the forked workers) are reset.
+    '''
+    for alias in settings.CACHES:
+        caches[alias]
+    host = allowed_host()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': reverse('patient_list_create'),
+        'HTTP_HOST': host,
+        'SERVER_NAME': host,
+        'wsgi.input': io.BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    logging.disable(logging.WARNING)
+    try:
+        response = WSGIHandler()(environ, lambda status, headers: None)
+        response.close()
+    finally:
+        logging.disable(logging.NOTSET)
+        metrics.reset()
+
+
+def warm_catalogs():
+    for catalog in catalogs.CATALOGS.values():
+        catalog.names()
+
+
+def connect_databases():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+STAGES = (
+    ('urls', warm_urls),
+    ('catalogs', warm_catalogs),
+    ('serializers', warm_serializers),
+    ('request', warm_request),
+    ('db', connect_databases),
+)
+
+
+def warm_up(stages=STAGES) -> dict:
+    '''
+    run the stages, return the seconds of each one
+    '''
+    timings = {}
+    for name, stage in stages:
+        started = time.perf_counter()
+        stage()
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+class FirstRequestTimer:
+    '''
+    report the time of the first request of the process (once)
+
+    Notes:
+        request_started/request_finished are sent by the wsgi and the
+        asgi handlers, the time is until the response is closed.
+    '''
+
+    def __init__(self, report):
+        self.report = report
+        self._lock = threading.Lock()
+        self._started = None
+        self._done = False
+
+    def install(self):
+        request_started.connect(self.request_started, weak=False)
+        request_finished.connect(self.request_finished, weak=False)
+
+    def uninstall(self):
+        request_started.disconnect(self.request_started)
+        request_finished.disconnect(self.request_finished)
+
+    def request_started(self, **kwargs):
+        with self._lock:
+            if self._started is None:
+                self._started = time.perf_counter()
+
+    def request_finished(self, **kwargs):
+        with self._lock:
+            if self._started is None or self._done:
+                return
+            self._done = True
+            elapsed = time.perf_counter() - self._started
+        self.uninstall()
+        self.report(elapsed)
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +55,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.QueryInspectionMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
+    'api.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -82,11 +87,58 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # django.db.backends.sqlite3 with BEGIN IMMEDIATE (api.db)
+        'ENGINE': 'api.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Database profile (api.db)
+# seconds a thread keeps its connection between requests
+# (0: a connection per request)
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE') or 60)
+DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+# check the kept connections at the start of every request
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+# pragmas of every new sqlite connection (SQLITE_PRAGMAS=0: none)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    # ms
+    'busy_timeout': 5000,
+    # bytes (256 MiB)
+    'mmap_size': 268435456,
+} if os.getenv('SQLITE_PRAGMAS', '1') == '1' else {}
+# BEGIN of the transactions of api.backends.sqlite3 ('': DEFERRED)
+SQLITE_TRANSACTION_MODE = os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+
+# Read replicas (api.routers.ReplicaRouter)
+# aliases of DATABASES for the reads of the safe requests
+DATABASE_REPLICAS = []
+# local replicas: comma separated sqlite files, copies of the primary
+# (python manage.py sync_sqlite_replicas)
+SQLITE_REPLICAS = [
+    BASE_DIR / name
+    for name in os.getenv('SQLITE_REPLICAS', '').split(',') if name]
+for index, name in enumerate(SQLITE_REPLICAS, 1):
+    DATABASES[f'replica{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # read only, a missing file is an error (not a new empty db)
+        'NAME': f'file:{name}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# seconds a client reads from the primary after a write
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS') or 5)
+# seconds before a replica that failed is tried again
+REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS') or 30)
+# cache alias of the pins, it must be shared by the workers (the check
+# api.W001 warns of a locmem cache, manage.py serve refuses many workers)
+REPLICA_PIN_CACHE = os.getenv('REPLICA_PIN_CACHE') or 'default'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -134,21 +186,122 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
+    # api.renderers / api.parsers use orjson and msgpack when installed
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.MessagePackRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'api.parsers.FastJSONParser',
+        'api.parsers.MessagePackParser',
     ),
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
-    # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    # 'PAGE_SIZE': 100
 }
 
+# pagination of the list views (api.pagination)
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE') or 100)
+# upper limit for the ?page_size= query param
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE') or 1000)
+
+
+# backend of the 'default' django cache (locmem per process if unset), a
+# shared cache for the caches of many workers, e.g.
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# CACHE_LOCATION=127.0.0.1:11211
+CACHE_BACKEND = os.getenv('CACHE_BACKEND')
+if CACHE_BACKEND:
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        }
+    }
+
+
+# In-memory catalogs (api.catalogs)
+# cache alias used to share the catalog version between the workers, the
+# default with CACHE_BACKEND ('': each process reloads its catalogs after
+# CATALOG_CHECK_SECONDS)
+CATALOG_CACHE = os.getenv(
+    'CATALOG_CACHE', 'default' if CACHE_BACKEND else '') or None
+# seconds between the reads of the shared version (or the reloads)
+CATALOG_CHECK_SECONDS = float(os.getenv('CATALOG_CHECK_SECONDS') or 5)
+
+# max studies per bulk post (api.views.StudytListCreateView.bulk_create)
+STUDY_BULK_MAX_SIZE = int(os.getenv('STUDY_BULK_MAX_SIZE') or 1000)
+
+# patients per bulk insert in the streaming import (api.importer)
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE') or 1000)
+
+# rows per db fetch in the streaming lists ?stream=true (api.streaming)
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE') or 2000)
+
+# Token auth cache (api.authentication)
+# cache alias, it must be shared by the workers: a revoked token stays valid
+# in the caches the invalidation does not reach ('': disabled, the default
+# without CACHE_BACKEND)
+TOKEN_CACHE = os.getenv(
+    'TOKEN_CACHE', 'default' if CACHE_BACKEND else '') or None
+# in-process map instead of a cache alias, one worker only (runserver,
+# manage.py serve --workers 1)
+TOKEN_CACHE_LOCAL = os.getenv('TOKEN_CACHE_LOCAL', '0') == '1'
+TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE') or 10000)
+# seconds
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL') or 300)
+
+# list views serialize values() rows with a compiled RowSerializer (api.fast)
+API_FAST_SERIALIZERS = os.getenv('API_FAST_SERIALIZERS', '1') == '1'
+
+# Response cache of the patient/study GETs (api.response_cache)
+# cache alias, it must be shared by the workers: a write only invalidates
+# the cache it can see ('': disabled, the default without CACHE_BACKEND)
+RESPONSE_CACHE = os.getenv(
+    'RESPONSE_CACHE', 'default' if CACHE_BACKEND else '') or None
+# seconds
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT') or 300)
+
+# Server-Timing header and the per route histograms of GET /metrics
+# (api.metrics, api.middleware.RequestMetricsMiddleware)
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', '1') == '1'
+SERVER_TIMING = os.getenv('SERVER_TIMING', '1') == '1'
+
+# full text search ?q= (api.search)
+# dotted path of an api.search.SearchBackend
+# (None: sqlite fts5 on sqlite, icontains on the other databases)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND') or None
+
+# ASGI (api.aio): the read endpoints are async views (app.asgi set it)
+API_ASYNC_VIEWS = os.getenv('API_ASYNC_VIEWS') == '1'
+# threads (and db connections) per process for the async views
+ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE') or 8)
+
+# worker processes of manage.py serve (0: 2 x cpus + 1)
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS') or 0)
+
+# Query budget per view (api.middleware.QueryBudgetMiddleware)
+# True: raise QueryBudgetExceeded (tests), False: log a warning
+QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE') == '1'
+
+# Slow query log and N+1 detection in the debug logger (api.querylog)
+# milliseconds (0: off)
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS') or 0)
+# the same sql this many times in a request is an N+1 (0: off)
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD') or 0)
+# raise api.querylog.NPlusOneDetected (for the tests)
+SQL_N_PLUS_ONE_RAISE = os.getenv('SQL_N_PLUS_ONE_RAISE') == '1'
+
+# ?_profile=cpu|sample of the staff users (api.profiling)
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', '1') == '1'
+# cache alias of the profiles, use a shared cache with many workers
+PROFILE_CACHE = os.getenv('PROFILE_CACHE') or 'default'
+# profiles kept
+PROFILE_STORE_SIZE = int(os.getenv('PROFILE_STORE_SIZE') or 20)
+# seconds between the samples of ?_profile=sample
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL') or 0.001)
 
 LOGGING = {
     'version': 1,
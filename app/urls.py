@@ -17,8 +17,11 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework.documentation import include_docs_urls
 
+from api.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-docs/', include_docs_urls(title='api doc', public=True)),
     path("api/", include("api.urls")),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]